@@ -37,31 +37,22 @@ def main():
     
     processes = []
     
-    # Start data generator
+    # Start WebSocket server (hosts the data generator and is fed by it directly)
     p1 = run_command(
-        'python src/enhanced_demo.py',
-        'Data Generator (enhanced_demo)',
-        'logs/enhanced_demo_ws.out'
-    )
-    processes.append(('Data Generator', p1))
-    time.sleep(2)
-    
-    # Start WebSocket server
-    p2 = run_command(
-        'python src/api/websocket_server.py',
-        'WebSocket Server',
+        'python -m src.api.websocket_server',
+        'WebSocket Server + Data Generator',
         'logs/websocket_server.out'
     )
-    processes.append(('WebSocket Server', p2))
+    processes.append(('WebSocket Server', p1))
     time.sleep(2)
     
     # Start dashboard
-    p3 = run_command(
+    p2 = run_command(
         'python src/championship_dashboard.py',
         'Championship Dashboard',
         'logs/championship_dashboard_ws.out'
     )
-    processes.append(('Dashboard', p3))
+    processes.append(('Dashboard', p2))
     time.sleep(2)
     
     print("\n" + "="*60)
@@ -16,6 +16,7 @@ class BaseAgent(ABC):
         self.is_running = False
         self.last_execution = 0
         self.execution_interval = 60  # Default: 60 seconds
+        self.listeners = []  # async callbacks receiving published records
         
         logger.info(f"Initialized {self.agent_id}")
     
@@ -24,6 +25,18 @@ class BaseAgent(ABC):
         """Main execution logic - must be implemented by subclasses"""
         pass
     
+    def add_listener(self, callback):
+        """Register an async callback for records this agent emits"""
+        self.listeners.append(callback)
+    
+    async def emit(self, record: Dict[str, Any]):
+        """Push a record to every listener; one failing listener can't stall the rest"""
+        for callback in self.listeners:
+            try:
+                await callback(record)
+            except Exception as e:
+                logger.error(f"[{self.agent_id}] Listener error: {e}")
+    
     async def run(self):
         """Run agent in continuous loop"""
         self.is_running = True
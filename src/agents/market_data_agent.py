@@ -3,32 +3,52 @@ Market Data Collection Agent - WITH DATABASE
 """
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import pandas as pd
 import numpy as np
 from loguru import logger
 
 from .base_agent import BaseAgent
 from src.utils.database import AgentSpoonsDB
+from src.utils.market_replay import MarketReplay
+from src.neo.dex_client import DexClient
+from src.utils.candle_aggregator import CandleAggregator
 
 class MarketDataAgent(BaseAgent):
-    """Collects price data from Neo DEXs"""
+    """Collects price data from Neo DEXs, or from a recorded replay"""
     
     def __init__(self, agent_id: str, wallet_address: str,
                  token_pairs: List[str], dex_endpoints: List[str],
-                 db: AgentSpoonsDB):
+                 db: AgentSpoonsDB, replay: Optional[MarketReplay] = None,
+                 dex_client: Optional[DexClient] = None,
+                 aggregator: Optional[CandleAggregator] = None):
         super().__init__(agent_id, wallet_address)
         self.token_pairs = token_pairs
         self.dex_endpoints = dex_endpoints
         self.price_history = {}
         self.db = db
+        self.replay = replay
+        self.dex_client = dex_client
+        self.aggregator = aggregator  # Builds higher timeframes from each polled candle
+        self.quotes: Dict[str, List[Dict]] = {}  # This round's DEX answers, fetched in one fan-out
         self.execution_interval = 30  # 30 seconds
+        if replay is not None:
+            self.execution_interval = 0  # The replay paces itself
         
         logger.info(f"Tracking pairs: {token_pairs}")
     
     async def execute(self) -> Dict[str, Any]:
         """Fetch latest price data"""
         collected_data = {}
+        timestamp = datetime.now()
+        
+        if self.replay is not None:
+            if await self.replay.next_step() is None:
+                self.stop()
+                return {'status': 'replay_complete', 'pairs_collected': 0, 'data': {}}
+            timestamp = self.replay.now()
+        elif self.dex_client is not None:
+            self.quotes = await self.dex_client.fetch(self.token_pairs)
         
         for pair in self.token_pairs:
             try:
@@ -41,7 +61,7 @@ class MarketDataAgent(BaseAgent):
                         self.price_history[pair] = []
                     
                     candle = {
-                        'timestamp': datetime.now(),
+                        'timestamp': timestamp,
                         'open': aggregated['open'],
                         'high': aggregated['high'],
                         'low': aggregated['low'],
@@ -53,6 +73,8 @@ class MarketDataAgent(BaseAgent):
                     
                     # Save to database
                     self.db.insert_market_data(pair, candle)
+                    if self.aggregator is not None:
+                        await self.aggregator.ingest_candle(pair, candle)
                     
                     # Keep last 1000 candles
                     if len(self.price_history[pair]) > 1000:
@@ -70,10 +92,16 @@ class MarketDataAgent(BaseAgent):
         }
     
     async def fetch_from_dexs(self, pair: str) -> List[Dict]:
-        """Fetch from multiple DEXs (mock implementation for now)"""
+        """Quotes for a pair from every DEX (mock data without a DEX client)"""
+        if self.replay is not None:
+            return self.replay.candles(pair)
+        if self.dex_client is not None:
+            if pair in self.quotes:
+                return self.quotes[pair]
+            return (await self.dex_client.fetch([pair]))[pair]
+        
         prices = []
         
-        # TODO: Replace with actual Neo DEX API calls
         # For hackathon demo, generate realistic mock data
         base_price = 15.0 if 'NEO' in pair else 3.5
         
@@ -90,6 +118,9 @@ class MarketDataAgent(BaseAgent):
     
     def aggregate_prices(self, prices: List[Dict]) -> Dict:
         """Aggregate using VWAP"""
+        if len(prices) == 1:
+            return {k: prices[0][k] for k in ('open', 'high', 'low', 'close', 'volume')}
+        
         total_volume = sum(p['volume'] for p in prices)
         
         if total_volume == 0:
@@ -111,8 +142,14 @@ class MarketDataAgent(BaseAgent):
             'volume': total_volume
         }
     
-    def get_ohlcv_dataframe(self, pair: str, lookback: int = 100) -> pd.DataFrame:
-        """Get historical data as DataFrame"""
+    def get_ohlcv_dataframe(self, pair: str, lookback: int = 100,
+                            timeframe: Optional[str] = None) -> pd.DataFrame:
+        """Get historical data as DataFrame; `timeframe` reads the aggregator's candles"""
+        if timeframe is not None:
+            if self.aggregator is None or timeframe not in self.aggregator.timeframes:
+                raise ValueError(f"No aggregator building {timeframe} candles")
+            return self.aggregator.frame(pair, timeframe, lookback)
+        
         if pair not in self.price_history or not self.price_history[pair]:
             return pd.DataFrame()
         
@@ -3,13 +3,16 @@ Oracle Publisher Agent - Publishes volatility data to Neo blockchain
 """
 import asyncio
 from datetime import datetime
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List, Set
 from loguru import logger
 
 from .base_agent import BaseAgent
 from .volatility_calculator_agent import VolatilityCalculatorAgent
 from .implied_vol_agent import ImpliedVolAgent
+from .publication_policy import PublicationPolicy
+from src.utils.segmented_log import SegmentedLog, ZSTD_AVAILABLE
+
+FEED_LOG_DIR = 'data/oracle_feeds'
 
 class OraclePublisherAgent(BaseAgent):
     """Publishes volatility oracle data to Neo blockchain"""
@@ -17,17 +20,31 @@ class OraclePublisherAgent(BaseAgent):
     def __init__(self, agent_id: str, wallet_address: str,
                  vol_calculator: VolatilityCalculatorAgent,
                  implied_vol_agent: ImpliedVolAgent,
-                 contract_hash: str = ""):
+                 contract_hash: str = "",
+                 policy: PublicationPolicy = None,
+                 batcher=None,
+                 feed_log: SegmentedLog = None):
         super().__init__(agent_id, wallet_address)
         self.vol_calculator = vol_calculator
         self.implied_vol_agent = implied_vol_agent
         self.contract_hash = contract_hash  # Neo smart contract hash
-        self.execution_interval = 300  # Publish every 5 minutes
+        self.policy = policy or PublicationPolicy()
+        self.batcher = batcher  # neo.blockchain_client.OracleBatcher: one tx per round
+        # Audit trail: daily or 16 MB segments, compressed once closed
+        self.feed_log = feed_log if feed_log is not None else SegmentedLog(
+            FEED_LOG_DIR,
+            key_func=lambda feed: feed['pair'],
+            segment_bytes=16 * 1024 * 1024,
+            segment_seconds=24 * 3600,
+            compress='zstd' if ZSTD_AVAILABLE else 'gzip'
+        )
+        self.execution_interval = 30  # Check often; the policy decides what is published
         self.last_published = {}
     
     async def execute(self) -> Dict[str, Any]:
         """Publish volatility data to blockchain"""
-        published_count = 0
+        skipped_count = 0
+        round_feeds = {}  # pair -> (feed, reason)
         
         for pair in self.vol_calculator.market_data_agent.token_pairs:
             try:
@@ -54,20 +71,30 @@ class OraclePublisherAgent(BaseAgent):
                 # Create oracle feed
                 oracle_feed = self.create_oracle_feed(pair, vol_data, surface_data)
                 
-                # Publish to Neo (mock for now - will integrate with Neo SDK)
-                success = await self.publish_to_neo(oracle_feed)
+                publish, reason = self.policy.should_publish(pair, oracle_feed)
+                if not publish:
+                    skipped_count += 1
+                    continue
                 
-                if success:
-                    published_count += 1
-                    self.last_published[pair] = datetime.now()
-                    logger.success(f"Published {pair} oracle data to Neo")
+                round_feeds[pair] = (oracle_feed, reason)
                 
             except Exception as e:
                 logger.error(f"Error publishing {pair}: {e}")
         
+        # Every pair due this round goes out in a single transaction
+        published_count = 0
+        published = await self.publish_round([feed for feed, _ in round_feeds.values()]) if round_feeds else set()
+        for pair, (oracle_feed, reason) in round_feeds.items():
+            if pair in published:
+                published_count += 1
+                self.policy.record(pair, oracle_feed)
+                self.last_published[pair] = datetime.now()
+                logger.success(f"Published {pair} oracle data to Neo ({reason})")
+        
         return {
             'status': 'success',
-            'pairs_published': published_count
+            'pairs_published': published_count,
+            'pairs_skipped': skipped_count
         }
     
     def create_oracle_feed(self, pair: str, vol_data: Dict, surface_data: Dict) -> Dict:
@@ -88,7 +115,27 @@ class OraclePublisherAgent(BaseAgent):
             'version': '1.0.0'
         }
     
-    async def publish_to_neo(self, oracle_feed: Dict) -> bool:
+    async def publish_round(self, feeds: List[Dict]) -> Set[str]:
+        """Publish a round of feeds as batched contract invocations; returns the pairs that landed"""
+        if self.batcher is None:
+            return {feed['pair'] for feed in feeds} if await self.publish_to_neo(feeds) else set()
+        
+        for feed in feeds:
+            self.batcher.add_feed(feed)
+        if self.batcher.is_async:
+            tx_hashes = await self.batcher.aflush()
+        else:
+            tx_hashes = await asyncio.to_thread(self.batcher.flush)
+        # Pairs in failed chunks stay pending for the next round; the rest are on-chain
+        published = {feed['pair'] for feed in feeds} - set(self.batcher.pending)
+        if tx_hashes:
+            logger.info(f"Published {len(published)} pairs in {len(tx_hashes)} tx: {', '.join(tx_hashes)}")
+        for feed in feeds:
+            if feed['pair'] in published:
+                self.feed_log.append(feed)
+        return published
+    
+    async def publish_to_neo(self, oracle_feeds) -> bool:
         """
         Publish data to Neo smart contract
         
@@ -100,18 +147,21 @@ class OraclePublisherAgent(BaseAgent):
             # Mock implementation for hackathon demo
             # In production, this would:
             # 1. Connect to Neo RPC node
-            # 2. Invoke smart contract method 'updateVolatility'
+            # 2. Invoke 'update_volatility_batch' with every feed in the round
             # 3. Sign and broadcast transaction
             # 4. Wait for confirmation
             
-            logger.debug(f"Publishing to Neo contract {self.contract_hash}: {oracle_feed['pair']}")
+            if isinstance(oracle_feeds, dict):
+                oracle_feeds = [oracle_feeds]
+            pairs = ', '.join(feed['pair'] for feed in oracle_feeds)
+            logger.debug(f"Publishing to Neo contract {self.contract_hash}: {pairs}")
             
-            # Simulate transaction
+            # Simulate one transaction for the whole batch
             await asyncio.sleep(0.1)
             
-            # Log to file for demo
-            with open('data/oracle_feeds.jsonl', 'a') as f:
-                f.write(json.dumps(oracle_feed) + '\n')
+            # Audit trail
+            for oracle_feed in oracle_feeds:
+                self.feed_log.append(oracle_feed)
             
             return True
             
@@ -119,6 +169,10 @@ class OraclePublisherAgent(BaseAgent):
             logger.error(f"Neo publish error: {e}")
             return False
     
+    def get_published_feeds(self, pair: str = None, start: int = None, end: int = None) -> List[Dict]:
+        """Published feeds for a pair and/or Unix timestamp range, from the audit log"""
+        return list(self.feed_log.read(pair, start, end))
+    
     def get_last_publish_time(self, pair: str) -> datetime:
         """Get timestamp of last publish for a pair"""
         return self.last_published.get(pair)
@@ -0,0 +1,88 @@
+"""
+Oracle publication policy - deviation and heartbeat triggers
+
+A pair is published when any tracked field has moved more than its
+deviation threshold since the last publish, or when the heartbeat interval
+has expired. Everything in between is skipped, so on-chain cost follows
+how much the market moves rather than the wall clock.
+"""
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# Flattened oracle feed fields compared against the last published state
+DEFAULT_TRACKED_FIELDS = (
+    'spot_price',
+    'volatility.realized_vol_30d',
+    'volatility.garch_forecast',
+    'volatility.implied_vol_1m',
+    'volatility.implied_vol_3m',
+    'volatility.vol_skew_30d',
+    'regime',
+)
+
+def flatten(feed: Dict, prefix: str = '') -> Dict:
+    """{'volatility': {'garch_forecast': x}} -> {'volatility.garch_forecast': x}"""
+    flat = {}
+    for key, value in feed.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+def relative_change(old, new) -> float:
+    """|new - old| / |old|; appearing, vanishing or non-numeric changes are infinite"""
+    if old == new:
+        return 0.0
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (old, new)):
+        return float('inf')
+    if old == 0:
+        return float('inf')
+    return abs(new - old) / abs(old)
+
+class PublicationPolicy:
+    """Decides per pair whether a fresh oracle feed is worth a transaction"""
+
+    def __init__(self, deviation: float = 0.005, heartbeat: float = 3600,
+                 pair_deviation: Optional[Dict[str, float]] = None,
+                 tracked_fields: Iterable[str] = DEFAULT_TRACKED_FIELDS):
+        self.deviation = deviation  # 0.005 = 0.5% move
+        self.heartbeat = heartbeat  # Seconds
+        self.pair_deviation = pair_deviation or {}
+        self.tracked_fields = tuple(tracked_fields)
+        self.published = {}  # pair -> (monotonic time, flattened feed)
+        self.stats = {'checked': 0, 'deviation': 0, 'heartbeat': 0, 'first': 0, 'skipped': 0}
+
+    def threshold(self, pair: str) -> float:
+        return self.pair_deviation.get(pair, self.deviation)
+
+    def evaluate(self, pair: str, feed: Dict, now: Optional[float] = None) -> Tuple[bool, str]:
+        """Return (publish?, reason) without changing state"""
+        now = time.monotonic() if now is None else now
+        last = self.published.get(pair)
+        if last is None:
+            return True, 'first'
+
+        published_at, previous = last
+        current = flatten(feed)
+        threshold = self.threshold(pair)
+        for field in self.tracked_fields:
+            if relative_change(previous.get(field), current.get(field)) > threshold:
+                return True, 'deviation'
+
+        if now - published_at >= self.heartbeat:
+            return True, 'heartbeat'
+        return False, 'skipped'
+
+    def should_publish(self, pair: str, feed: Dict, now: Optional[float] = None) -> Tuple[bool, str]:
+        """evaluate() plus bookkeeping of why each check did or didn't publish"""
+        publish, reason = self.evaluate(pair, feed, now)
+        self.stats['checked'] += 1
+        self.stats[reason] += 1
+        return publish, reason
+
+    def record(self, pair: str, feed: Dict, now: Optional[float] = None):
+        """Remember a successfully published feed as the new reference"""
+        now = time.monotonic() if now is None else now
+        self.published[pair] = (now, flatten(feed))
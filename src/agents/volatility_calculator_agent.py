@@ -3,7 +3,7 @@ Volatility Calculator Agent
 """
 import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import pandas as pd
 from loguru import logger
 
@@ -18,9 +18,10 @@ class VolatilityCalculatorAgent(BaseAgent):
     
     def __init__(self, agent_id: str, wallet_address: str,
                  market_data_agent: MarketDataAgent,
-                 db: AgentSpoonsDB):
+                 db: AgentSpoonsDB, timeframe: Optional[str] = None):
         super().__init__(agent_id, wallet_address)
         self.market_data_agent = market_data_agent
+        self.timeframe = timeframe  # Aggregated candle timeframe, or None for raw polled candles
         self.db = db
         self.volatility_results = {}
         self.execution_interval = 60  # Every 60 seconds
@@ -32,7 +33,8 @@ class VolatilityCalculatorAgent(BaseAgent):
         for pair in self.market_data_agent.token_pairs:
             try:
                 # Get historical data
-                df = self.market_data_agent.get_ohlcv_dataframe(pair, lookback=100)
+                df = self.market_data_agent.get_ohlcv_dataframe(pair, lookback=100,
+                                                                timeframe=self.timeframe)
                 
                 if len(df) < 30:
                     logger.warning(f"Insufficient data for {pair}: {len(df)} candles")
@@ -47,6 +49,7 @@ class VolatilityCalculatorAgent(BaseAgent):
                 # Store results
                 results[pair] = vol_metrics
                 self.volatility_results[pair] = vol_metrics
+                await self.emit({'pair': pair, **vol_metrics})
                 
                 logger.debug(f"{pair}: GK Vol={vol_metrics['garman_klass_vol']:.2%}")
                 
@@ -88,7 +91,7 @@ class VolatilityCalculatorAgent(BaseAgent):
         realized_vol = vol_engine.returns.tail(30).std() * (252 ** 0.5)
         
         return {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': pd.Timestamp(df['timestamp'].iloc[-1]).isoformat(),
             'current_price': float(df['close'].iloc[-1]),
             'close_to_close_vol': float(close_to_close),
             'parkinson_vol': float(parkinson),
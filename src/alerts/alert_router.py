@@ -0,0 +1,321 @@
+"""
+Alert routing: deduplication, throttling, digests and queued email
+
+AlertRouter.route() is non-blocking. Alerts are keyed by (pair, type):
+a repeat of a key already waiting for the next digest is merged into it,
+and each key may reach email at most `per_key_limit` times per
+`window` seconds, with the rest counted as suppressed. Pending alerts go
+out as one compact digest per flush (every `digest_interval` seconds,
+or at once for urgent severities but no more than once per
+`urgent_interval`, so an urgent storm shares digests) through
+EmailQueue, whose worker sends on a single reused SMTP connection off
+the event loop.
+
+AlertStore keeps a bounded alert history and appends it to a JSONL file
+instead of rewriting it.
+"""
+import asyncio
+import json
+import os
+import smtplib
+import time
+from collections import deque
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from html import escape
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+SEVERITY_RANK = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2}
+
+class AlertStore:
+    """Bounded alert history with an append-only JSONL log"""
+
+    def __init__(self, maxlen: int = 10000, path: Optional[str] = None):
+        self.maxlen = maxlen
+        self.path = path
+        self.alerts: Deque[Dict] = deque(maxlen=maxlen)
+        self.logged = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            self.alerts.append(json.loads(line))
+                            self.logged += 1
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def __iter__(self):
+        return iter(self.alerts)
+
+    def __getitem__(self, index):
+        return self.alerts[index]
+
+    def extend(self, alerts: Iterable[Dict]):
+        alerts = list(alerts)
+        self.alerts.extend(alerts)
+        if self.path and alerts:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(a, default=str) + '\n' for a in alerts))
+            self.logged += len(alerts)
+            if self.logged > 2 * self.maxlen:
+                self.compact()
+
+    def append(self, alert: Dict):
+        self.extend([alert])
+
+    def compact(self):
+        """Rewrite the log down to the retained history"""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(a, default=str) + '\n' for a in self.alerts))
+        os.replace(tmp, self.path)
+        self.logged = len(self.alerts)
+
+class SmtpSender:
+    """Blocking SMTP client that keeps one connection open across messages"""
+
+    def __init__(self, host: str = 'localhost', port: int = 25, username: str = '', password: str = '',
+                 starttls: bool = False, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.server: Optional[smtplib.SMTP] = None
+        self.stats = {'connections': 0, 'sent': 0}
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.password:
+            server.login(self.username, self.password)
+        self.stats['connections'] += 1
+        return server
+
+    def send(self, messages: List[MIMEMultipart]):
+        """Send on the open connection, reconnecting once if the server dropped it"""
+        for message in messages:
+            for attempt in (0, 1):
+                if self.server is None:
+                    self.server = self._connect()
+                try:
+                    self.server.send_message(message)
+                    self.stats['sent'] += 1
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    self.server = None
+                    if attempt:
+                        raise
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                pass
+            self.server = None
+
+class EmailQueue:
+    """Bounded async queue drained by one worker; a full queue drops the oldest message"""
+
+    def __init__(self, sender: SmtpSender, maxsize: int = 1000, batch_size: int = 50):
+        self.sender = sender
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.stats = {'queued': 0, 'sent': 0, 'dropped': 0, 'failed': 0}
+
+    def submit(self, message: MIMEMultipart):
+        """Enqueue without waiting; starts the worker on first use"""
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.maxsize)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.stats['dropped'] += 1
+        self.queue.put_nowait(message)
+        self.stats['queued'] += 1
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                # One thread hop per batch; the SMTP session is reused inside it
+                await asyncio.to_thread(self.sender.send, batch)
+                self.stats['sent'] += len(batch)
+            except Exception as e:
+                self.stats['failed'] += len(batch)
+                self.sender.server = None
+                logger.error(f"Email delivery failed for {len(batch)} messages: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def close(self):
+        """Deliver what is queued, then stop the worker and the SMTP session"""
+        if self.queue is not None and self.worker is not None and not self.worker.done():
+            await self.queue.join()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        await asyncio.to_thread(self.sender.close)
+
+class AlertRouter:
+    """Dedupe and throttle alerts by (pair, type) and deliver them as digests"""
+
+    def __init__(self, queue: EmailQueue, recipients: Iterable[str], sender_email: str = 'agentspoons@example.com',
+                 digest_interval: float = 60.0, window: float = 300.0, per_key_limit: int = 3,
+                 urgent: Iterable[str] = ('HIGH',), urgent_interval: float = 1.0, max_digest: int = 200,
+                 store: Optional[AlertStore] = None):
+        self.queue = queue
+        self.recipients = list(recipients)
+        self.sender_email = sender_email
+        self.digest_interval = digest_interval
+        self.window = window
+        self.per_key_limit = per_key_limit
+        self.urgent = set(urgent)
+        self.urgent_interval = urgent_interval
+        self.max_digest = max_digest
+        self.store = store
+        self.pending: Dict[Tuple[str, str], Dict] = {}
+        self.sent_times: Dict[Tuple[str, str], Deque[float]] = {}
+        self.suppressed: Dict[Tuple[str, str], int] = {}
+        self.flusher: Optional[asyncio.Task] = None
+        self.flush_due = float('inf')
+        self.last_flush = float('-inf')
+        self.stats = {'routed': 0, 'merged': 0, 'throttled': 0, 'digests': 0}
+
+    def route(self, alert: Dict, now: Optional[float] = None) -> str:
+        """Accept an alert; returns 'pending', 'merged' or 'throttled'"""
+        now = time.monotonic() if now is None else now
+        key = (alert.get('pair', 'default'), alert['type'])
+        self.stats['routed'] += 1
+        if self.store is not None:
+            self.store.append(alert)
+
+        pending = self.pending.get(key)
+        if pending is not None:
+            pending['count'] += 1
+            pending['last'] = alert
+            if SEVERITY_RANK.get(alert.get('severity'), 0) > SEVERITY_RANK.get(pending['severity'], 0):
+                pending['severity'] = alert['severity']
+            self.stats['merged'] += 1
+            outcome = 'merged'
+        else:
+            sent = self.sent_times.setdefault(key, deque())
+            while sent and now - sent[0] >= self.window:
+                sent.popleft()
+            if len(sent) >= self.per_key_limit:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                self.stats['throttled'] += 1
+                return 'throttled'
+            sent.append(now)
+            self.pending[key] = {'first': alert, 'last': alert, 'count': 1,
+                                 'severity': alert.get('severity', 'MEDIUM')}
+            outcome = 'pending'
+
+        if len(self.pending) >= self.max_digest:
+            self.flush(now)
+        elif alert.get('severity') in self.urgent:
+            # Urgent alerts close behind the last flush wait for the next one together
+            wait = self.last_flush + self.urgent_interval - now
+            if wait <= 0:
+                self.flush(now)
+            else:
+                self._schedule(wait)
+        else:
+            self._schedule(self.digest_interval)
+        return outcome
+
+    def _schedule(self, delay: float):
+        """Flush within `delay` seconds, keeping an earlier flush if one is due"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop: flush() must be called explicitly
+        due = loop.time() + delay
+        if self.flusher is not None and not self.flusher.done():
+            if self.flush_due <= due:
+                return
+            self.flusher.cancel()
+        self.flush_due = due
+        self.flusher = loop.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        self.flush()
+
+    def flush(self, now: Optional[float] = None) -> Optional[MIMEMultipart]:
+        """Queue one digest for everything pending; returns the message (None if idle or not queued)"""
+        if not self.pending:
+            return None
+        entries = sorted(self.pending.items(),
+                         key=lambda kv: -SEVERITY_RANK.get(kv[1]['severity'], 0))
+        message = self.render_digest(entries, self.suppressed)
+        try:
+            self.queue.submit(message)
+        except RuntimeError:
+            # No running event loop: keep everything for a later flush
+            logger.warning(f"No running event loop: {len(self.pending)} alerts kept pending")
+            return None
+        self.last_flush = time.monotonic() if now is None else now
+        self.pending, self.suppressed = {}, {}
+        self.stats['digests'] += 1
+        return message
+
+    def render_digest(self, entries: List[Tuple[Tuple[str, str], Dict]],
+                      suppressed: Dict[Tuple[str, str], int]) -> MIMEMultipart:
+        """Compact plain-text and HTML digest of grouped alerts"""
+        highest = entries[0][1]['severity']
+        subject = f"[{highest}] AgentSpoons: {len(entries)} alert{'s' if len(entries) != 1 else ''}"
+        if len(entries) == 1:
+            (pair, alert_type), _ = entries[0]
+            subject += f" - {alert_type} {pair}"
+
+        lines, rows = [], []
+        for (pair, alert_type), entry in entries:
+            last = entry['last']
+            repeat = f" (x{entry['count']})" if entry['count'] > 1 else ''
+            lines.append(f"{entry['severity']:<6} {pair:<12} {alert_type:<24} {last.get('message', '')}{repeat}")
+            rows.append(f"<tr><td>{escape(entry['severity'])}</td><td>{escape(pair)}</td>"
+                        f"<td>{escape(alert_type)}</td><td>{escape(str(last.get('message', '')))}{repeat}</td></tr>")
+        if suppressed:
+            total = sum(suppressed.values())
+            lines.append(f"\n{total} more alerts throttled for: " +
+                         ', '.join(f"{t} {p} ({n})" for (p, t), n in suppressed.items()))
+
+        text = '\n'.join(lines)
+        html = ("<html><body style=\"font-family: 'Courier New', monospace\">"
+                f"<h3>AgentSpoons alerts - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</h3>"
+                "<table border=\"1\" cellpadding=\"4\"><tr><th>Severity</th><th>Pair</th><th>Type</th>"
+                f"<th>Detail</th></tr>{''.join(rows)}</table>"
+                + (f"<p>{escape(lines[-1].strip())}</p>" if suppressed else '') + "</body></html>")
+
+        message = MIMEMultipart('alternative')
+        message['From'] = self.sender_email
+        message['To'] = ', '.join(self.recipients)
+        message['Subject'] = subject
+        message.attach(MIMEText(text, 'plain'))
+        message.attach(MIMEText(html, 'html'))
+        return message
+
+    async def close(self):
+        """Send anything pending and wait for delivery"""
+        if self.flusher is not None:
+            self.flusher.cancel()
+            self.flusher = None
+        self.flush()
+        await self.queue.close()
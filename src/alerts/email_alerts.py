@@ -11,6 +11,8 @@ from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from src.alerts.alert_router import AlertRouter, EmailQueue, SmtpSender
+
 load_dotenv()
 
 class EmailAlertSystem:
@@ -20,8 +22,8 @@ class EmailAlertSystem:
     """
     
     def __init__(self):
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
+        self.smtp_server = os.getenv('SMTP_SERVER', "smtp.gmail.com")
+        self.smtp_port = int(os.getenv('SMTP_PORT', "587"))
         self.sender_email = os.getenv('ALERT_EMAIL', 'agentspoons@example.com')
         self.sender_password = os.getenv('ALERT_PASSWORD', '')
         
@@ -265,8 +267,14 @@ class EmailAlertSystem:
         </html>
         """
     
+    def create_router(self, recipients, **kwargs):
+        """Non-blocking AlertRouter sending digests over one reused SMTP session"""
+        sender = SmtpSender(self.smtp_server, self.smtp_port, self.sender_email, self.sender_password,
+                            starttls=True)
+        return AlertRouter(EmailQueue(sender), recipients, sender_email=self.sender_email, **kwargs)
+    
     def send_alert(self, recipient, alert_type, data, attach_pdf=None):
-        """Send email alert"""
+        """Send one email synchronously; use create_router() on hot paths"""
         
         subject, html_body = self.create_alert_email(alert_type, data)
         
@@ -1,21 +1,110 @@
 """
 Intelligent Alert System
-Machine learning-based anomaly detection
+Streaming statistical anomaly detection across many pairs
+
+Each metric (price return, volatility, volume) has a StreamingDetector
+holding per-pair state in NumPy arrays: an EWMA mean and variance for
+z-scores and baselines, an upper quantile tracked by stochastic
+approximation and a two-sided CUSUM on the z-scores. A tick for every
+pair is evaluated as one vectorized batch, each in O(1) per pair.
 """
 import numpy as np
 from datetime import datetime
 import json
-from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+from src.alerts.alert_router import AlertStore
+
+class StreamingDetector:
+    """EWMA z-score, tracked upper quantile and CUSUM for one metric across pairs"""
+    
+    def __init__(self, halflife=20, quantile=0.95, quantile_rate=0.05,
+                 cusum_k=0.5, cusum_h=8.0, cusum_clip=4.0, warmup=10):
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.tau = quantile
+        self.quantile_rate = quantile_rate  # Quantile step, in EWMA standard deviations
+        self.cusum_k = cusum_k  # Drift allowance per tick, in standard deviations
+        self.cusum_h = cusum_h  # Alarm level
+        self.cusum_clip = cusum_clip  # A single outlier is a spike, not a shift
+        self.warmup = warmup
+        
+        self.mean = np.zeros(0)
+        self.var = np.zeros(0)
+        self.q = np.zeros(0)
+        self.s_up = np.zeros(0)
+        self.s_down = np.zeros(0)
+        self.count = np.zeros(0, dtype=np.int64)
+    
+    def grow(self, n):
+        """Make room for pairs 0..n-1"""
+        extra = n - len(self.mean)
+        if extra > 0:
+            for name in ('mean', 'var', 'q', 's_up', 's_down', 'count'):
+                current = getattr(self, name)
+                setattr(self, name, np.concatenate([current, np.zeros(extra, dtype=current.dtype)]))
+    
+    def update(self, idx, x):
+        """Score then absorb one value per pair; NaN values are skipped
+        
+        Returns arrays aligned with `x`: z (against the state before this
+        value), baseline (EWMA mean before it), above_quantile, cusum
+        (+1/-1 on an upward/downward shift alarm, else 0) and warm.
+        """
+        x = np.asarray(x, dtype=float)
+        n = len(x)
+        out = {'z': np.full(n, np.nan), 'baseline': np.full(n, np.nan),
+               'above_quantile': np.zeros(n, dtype=bool), 'cusum': np.zeros(n, dtype=np.int8),
+               'warm': np.zeros(n, dtype=bool)}
+        ok = np.isfinite(x)
+        i, v = idx[ok], x[ok]
+        if not len(i):
+            return out
+        
+        mean, var, count, q = self.mean[i], self.var[i], self.count[i], self.q[i]
+        first = count == 0
+        warm = count >= self.warmup
+        std = np.sqrt(var)
+        z = np.divide(v - mean, std, out=np.zeros_like(v), where=std > 0)
+        
+        # CUSUM only accumulates once the baseline has settled; it restarts after an alarm
+        zc = np.where(warm, np.clip(z, -self.cusum_clip, self.cusum_clip), 0.0)
+        s_up = np.maximum(0.0, self.s_up[i] + zc - self.cusum_k)
+        s_down = np.maximum(0.0, self.s_down[i] - zc - self.cusum_k)
+        cusum = np.where(s_up > self.cusum_h, 1, np.where(s_down > self.cusum_h, -1, 0)).astype(np.int8)
+        s_up[cusum != 0] = 0.0
+        s_down[cusum != 0] = 0.0
+        
+        # Weight 1/(n+1) until it drops below alpha: a running sample mean/variance at first,
+        # so the variance isn't biased toward its zero start
+        a = np.maximum(self.alpha, 1.0 / (count + 1))
+        delta = v - mean
+        self.mean[i] = mean + a * delta
+        self.var[i] = (1 - a) * (var + a * delta ** 2)
+        step = self.quantile_rate * np.sqrt(self.var[i])
+        self.q[i] = np.where(first, v, q + step * (self.tau - (v <= q)) / (1 - self.tau))
+        self.s_up[i], self.s_down[i] = s_up, s_down
+        self.count[i] = count + 1
+        
+        out['z'][ok] = np.where(first, np.nan, z)
+        out['baseline'][ok] = np.where(first, np.nan, mean)
+        out['above_quantile'][ok] = warm & (v > q)
+        out['cusum'][ok] = cusum
+        out['warm'][ok] = warm
+        return out
 
 class SmartAlertSystem:
     """
     Intelligent alert system using statistical anomaly detection
     """
     
-    def __init__(self):
-        self.price_history = deque(maxlen=100)
-        self.vol_history = deque(maxlen=100)
-        self.alerts = []
+    METRICS = ('return', 'vol', 'volume')
+    
+    def __init__(self, halflife=20, warmup=10, max_alerts=10000, history_path=None, router=None):
+        self.alerts = AlertStore(max_alerts, history_path)
+        self.router = router  # Optional AlertRouter for deduplicated email digests
+        self.pairs: Dict[str, int] = {}
+        self.last_price = np.zeros(0)
+        self.detectors = {m: StreamingDetector(halflife=halflife, warmup=warmup) for m in self.METRICS}
         
         # Alert thresholds
         self.thresholds = {
@@ -23,60 +112,88 @@ class SmartAlertSystem:
             'vol_spike': 0.20,         # 20% volatility increase
             'spread_threshold': 0.10,  # 10% IV-RV spread
             'volume_spike': 2.0,       # 2x average volume
+            'z_score': 5.0,            # Return this many EWMA std devs from its mean
         }
     
-    def add_data_point(self, price, vol, volume):
-        """Add new data point and check for alerts"""
+    def _index(self, pairs: Sequence[str]) -> np.ndarray:
+        for pair in pairs:
+            if pair not in self.pairs:
+                self.pairs[pair] = len(self.pairs)
+        n = len(self.pairs)
+        if n > len(self.last_price):
+            self.last_price = np.concatenate([self.last_price, np.full(n - len(self.last_price), np.nan)])
+            for detector in self.detectors.values():
+                detector.grow(n)
+        return np.fromiter((self.pairs[p] for p in pairs), dtype=np.int64, count=len(pairs))
+    
+    def add_batch(self, pairs: Sequence[str], prices, vols, volumes=None) -> List[Dict]:
+        """Evaluate one tick for many pairs at once (each pair at most once per batch)"""
+        idx = self._index(pairs)
+        prices = np.asarray(prices, dtype=float)
+        vols = np.asarray(vols, dtype=float)
+        volumes = np.full(len(idx), np.nan) if volumes is None else \
+            np.array([np.nan if v is None else v for v in volumes], dtype=float)
         
-        self.price_history.append(price)
-        self.vol_history.append(vol)
+        previous = self.last_price[idx]
+        returns = np.divide(prices - previous, previous, out=np.full(len(idx), np.nan), where=previous > 0)
+        self.last_price[idx] = prices
         
-        alerts_triggered = []
+        ret = self.detectors['return'].update(idx, returns)
+        vol = self.detectors['vol'].update(idx, vols)
+        volume = self.detectors['volume'].update(idx, volumes)
         
-        # Check price spike
-        if len(self.price_history) >= 2:
-            price_change = (price - self.price_history[-2]) / self.price_history[-2]
-            if abs(price_change) > self.thresholds['price_spike']:
-                alerts_triggered.append({
-                    'type': 'PRICE_SPIKE',
-                    'severity': 'HIGH' if abs(price_change) > 0.10 else 'MEDIUM',
-                    'message': f"Price {'surged' if price_change > 0 else 'dropped'} {abs(price_change):.2%}",
-                    'timestamp': datetime.now().isoformat(),
-                    'value': price_change
-                })
-        
-        # Check volatility spike
-        if len(self.vol_history) >= 10:
-            avg_vol = np.mean(list(self.vol_history)[:-1])
-            vol_change = (vol - avg_vol) / avg_vol
-            if vol_change > self.thresholds['vol_spike']:
-                alerts_triggered.append({
-                    'type': 'VOLATILITY_SPIKE',
-                    'severity': 'HIGH' if vol_change > 0.40 else 'MEDIUM',
-                    'message': f"Volatility increased {vol_change:.2%} above average",
-                    'timestamp': datetime.now().isoformat(),
-                    'value': vol_change
-                })
-        
-        # Check volume anomaly
-        if volume is not None:
-            # Simulate average volume check
-            avg_volume = 1000000  # Example
-            if volume > avg_volume * self.thresholds['volume_spike']:
-                alerts_triggered.append({
-                    'type': 'VOLUME_SPIKE',
-                    'severity': 'MEDIUM',
-                    'message': f"Volume {volume/avg_volume:.1f}x above average",
-                    'timestamp': datetime.now().isoformat(),
-                    'value': volume/avg_volume
-                })
-        
-        # Save alerts
-        for alert in alerts_triggered:
-            self.alerts.append(alert)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vol_change = vols / vol['baseline'] - 1
+            volume_ratio = volumes / volume['baseline']
+        flags = {
+            'PRICE_SPIKE': (np.abs(returns) > self.thresholds['price_spike']) |
+                           (ret['warm'] & (np.abs(ret['z']) > self.thresholds['z_score'])),
+            'VOLATILITY_SPIKE': vol['warm'] & (vol_change > self.thresholds['vol_spike']),
+            # Above the usual range as well as the mean, so bursty volume needs a real outlier
+            'VOLUME_SPIKE': volume['warm'] & volume['above_quantile'] &
+                            (volume_ratio > self.thresholds['volume_spike']),
+            'VOLATILITY_REGIME_SHIFT': vol['cusum'] != 0,
+        }
         
+        timestamp = datetime.now().isoformat()
+        alerts_triggered = []
+        for alert_type, mask in flags.items():
+            for k in np.flatnonzero(mask):
+                pair = pairs[k]
+                if alert_type == 'PRICE_SPIKE':
+                    change = float(returns[k])
+                    alert = {'severity': 'HIGH' if abs(change) > 0.10 else 'MEDIUM',
+                             'message': f"Price {'surged' if change > 0 else 'dropped'} {abs(change):.2%}",
+                             'value': change, 'z_score': float(ret['z'][k])}
+                elif alert_type == 'VOLATILITY_SPIKE':
+                    change = float(vol_change[k])
+                    alert = {'severity': 'HIGH' if change > 0.40 else 'MEDIUM',
+                             'message': f"Volatility increased {change:.2%} above average",
+                             'value': change, 'z_score': float(vol['z'][k])}
+                elif alert_type == 'VOLUME_SPIKE':
+                    ratio = float(volume_ratio[k])
+                    alert = {'severity': 'MEDIUM', 'message': f"Volume {ratio:.1f}x above average",
+                             'value': ratio, 'z_score': float(volume['z'][k])}
+                else:
+                    direction = int(vol['cusum'][k])
+                    alert = {'severity': 'MEDIUM',
+                             'message': f"Volatility regime shifted {'up' if direction > 0 else 'down'}",
+                             'value': direction}
+                alerts_triggered.append({'type': alert_type, 'pair': pair, 'timestamp': timestamp, **alert})
+        
+        self._record(alerts_triggered)
         return alerts_triggered
     
+    def _record(self, alerts):
+        self.alerts.extend(alerts)
+        if self.router is not None:
+            for alert in alerts:
+                self.router.route(alert)
+    
+    def add_data_point(self, price, vol, volume, pair='default'):
+        """Add new data point and check for alerts"""
+        return self.add_batch([pair], [price], [vol], [volume])
+    
     def check_spread_alert(self, iv, rv):
         """Check for IV-RV spread alerts"""
         
@@ -93,7 +210,7 @@ class SmartAlertSystem:
                 'action': 'SELL_VOLATILITY' if spread > 0 else 'BUY_VOLATILITY'
             }
             
-            self.alerts.append(alert)
+            self._record([alert])
             return alert
         
         return None
@@ -188,7 +305,7 @@ class SmartAlertSystem:
             json.dump({
                 'generated_at': datetime.now().isoformat(),
                 'alert_count': len(self.alerts),
-                'alerts': self.alerts
+                'alerts': list(self.alerts)
             }, f, indent=2)
         
         print(f"OK Alerts saved to: {filename}")
@@ -0,0 +1,105 @@
+"""
+Compact binary frames for the WebSocket stream
+
+Fixed little-endian struct layout, no third-party codec:
+
+    header  <BBIdB   version, kind, seq (uint32), timestamp (epoch float64), pair length
+    pair    utf-8 bytes
+    count   <B       number of fields
+    fields  <Bd      field id, float64 value  (repeated)
+
+SNAPSHOT frames carry every known field for a pair; DELTA frames only the
+fields that changed. Sequence numbers are per connection and per pair, so
+a client that sees a jump knows it missed a frame and should resync.
+"""
+import struct
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+PROTOCOL_VERSION = 1
+
+SNAPSHOT = 1
+DELTA = 2
+
+HEADER = struct.Struct('<BBIdB')
+COUNT = struct.Struct('<B')
+FIELD = struct.Struct('<Bd')
+
+# Append only: ids are part of the wire format
+FIELDS = (
+    'price',
+    'realized_vol',
+    'implied_vol',
+    'garch_forecast',
+    'spread',
+    'current_price',
+    'close_to_close_vol',
+    'parkinson_vol',
+    'garman_klass_vol',
+    'rogers_satchell_vol',
+    'yang_zhang_vol',
+    'realized_vol_30d',
+    'volume',
+)
+FIELD_IDS = {name: i for i, name in enumerate(FIELDS)}
+
+class ProtocolError(ValueError):
+    """Malformed or unsupported binary frame"""
+
+def encode_fields(data: Dict[str, object]) -> bytes:
+    """Pack the numeric fields that have a wire id; others are skipped"""
+    packed = [
+        FIELD.pack(FIELD_IDS[name], float(value))
+        for name, value in data.items()
+        if name in FIELD_IDS and isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+    return COUNT.pack(len(packed)) + b''.join(packed)
+
+def to_epoch(timestamp) -> float:
+    """Epoch seconds from an ISO string or number; now if unparseable"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+def encode_frame(kind: int, seq: int, timestamp, pair: str,
+                 data: Optional[Dict[str, object]] = None, body: Optional[bytes] = None) -> bytes:
+    """Build a frame; pass a pre-encoded body to skip re-packing shared fields"""
+    pair_bytes = pair.encode('utf-8')
+    if body is None:
+        body = encode_fields(data or {})
+    header = HEADER.pack(PROTOCOL_VERSION, kind, seq & 0xFFFFFFFF,
+                         to_epoch(timestamp), len(pair_bytes))
+    return header + pair_bytes + body
+
+def decode_frame(frame: bytes) -> dict:
+    """Unpack a frame into kind, seq, timestamp, pair and field values"""
+    try:
+        version, kind, seq, timestamp, pair_len = HEADER.unpack_from(frame, 0)
+        if version != PROTOCOL_VERSION:
+            raise ProtocolError(f"Unsupported protocol version: {version}")
+        offset = HEADER.size
+        pair = frame[offset:offset + pair_len].decode('utf-8')
+        offset += pair_len
+        (count,) = COUNT.unpack_from(frame, offset)
+        offset += COUNT.size
+
+        data = {}
+        for _ in range(count):
+            field_id, value = FIELD.unpack_from(frame, offset)
+            offset += FIELD.size
+            if field_id < len(FIELDS):
+                data[FIELDS[field_id]] = value
+    except struct.error as e:
+        raise ProtocolError(f"Truncated frame: {e}") from e
+
+    return {
+        'kind': kind,
+        'seq': seq,
+        'timestamp': timestamp,
+        'pair': pair,
+        'data': data
+    }
@@ -42,6 +42,10 @@ class HealthResponse(BaseModel):
     last_update: str
     data_points: int
 
+class BatchVolatilityRequest(BaseModel):
+    pairs: List[str]
+    fields: Optional[List[str]] = None  # None = all VolatilityData fields
+
 class ArbitrageSignal(BaseModel):
     timestamp: str
     pair: str
@@ -59,6 +63,33 @@ def load_data():
         logger.error(f"Error loading data: {e}")
         return []
 
+def latest_by_pair(data, pairs=None):
+    """Latest record per pair in one backwards pass over a snapshot"""
+    wanted = set(pairs) if pairs is not None else None
+    latest = {}
+    for d in reversed(data):
+        pair = d.get('pair')
+        if pair is None or pair in latest:
+            continue
+        if wanted is not None and pair not in wanted:
+            continue
+        latest[pair] = d
+        if wanted is not None and len(latest) == len(wanted):
+            break
+    return latest
+
+def to_volatility_data(pair: str, record: dict) -> VolatilityData:
+    """Normalise a raw results record into the API model"""
+    return VolatilityData(
+        pair=pair,
+        timestamp=record.get('timestamp', ''),
+        price=float(record.get('price', 0)),
+        realized_vol=float(record.get('realized_vol', 0)),
+        implied_vol=float(record.get('implied_vol', 0)),
+        garch_forecast=float(record.get('garch_forecast', 0)),
+        spread=float(record.get('spread', 0))
+    )
+
 # Endpoints
 @app.get("/", tags=["General"])
 async def root():
@@ -72,6 +103,7 @@ async def root():
         "endpoints": {
             "health": "/health",
             "volatility": "/api/v1/volatility/{pair}",
+            "volatility_batch": "/api/v1/volatility/batch",
             "latest": "/api/v1/latest",
             "arbitrage": "/api/v1/arbitrage",
             "history": "/api/v1/history/{pair}",
@@ -96,22 +128,39 @@ async def get_volatility(pair: str):
     """Get latest volatility data for a specific trading pair"""
     data = load_data()
     
-    # Filter for pair
-    pair_data = [d for d in data if d.get('pair') == pair]
+    latest = latest_by_pair(data, [pair]).get(pair)
     
-    if not pair_data:
+    if latest is None:
         raise HTTPException(status_code=404, detail=f"No data available for pair: {pair}")
     
-    latest = pair_data[-1]
-    return VolatilityData(
-        pair=pair,
-        timestamp=latest.get('timestamp', ''),
-        price=float(latest.get('price', 0)),
-        realized_vol=float(latest.get('realized_vol', 0)),
-        implied_vol=float(latest.get('implied_vol', 0)),
-        garch_forecast=float(latest.get('garch_forecast', 0)),
-        spread=float(latest.get('spread', 0))
-    )
+    return to_volatility_data(pair, latest)
+
+@app.post("/api/v1/volatility/batch", tags=["Volatility"])
+async def get_volatility_batch(request: BatchVolatilityRequest):
+    """Get latest volatility for many pairs from one consistent snapshot"""
+    fields = request.fields or list(VolatilityData.model_fields)
+    unknown = [f for f in fields if f not in VolatilityData.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+    if len(request.pairs) > 500:
+        raise HTTPException(status_code=400, detail="At most 500 pairs per batch")
+    
+    # One read of the dataset serves every pair in the request
+    data = load_data()
+    latest = latest_by_pair(data, request.pairs)
+    
+    results = {}
+    for pair, record in latest.items():
+        full = to_volatility_data(pair, record).model_dump()
+        results[pair] = {f: full[f] for f in fields}
+    
+    return {
+        "as_of": data[-1].get('timestamp') if data else None,
+        "data_points": len(data),
+        "fields": fields,
+        "results": results,
+        "missing": [p for p in request.pairs if p not in latest]
+    }
 
 @app.get("/api/v1/latest", response_model=List[dict], tags=["Volatility"])
 async def get_latest(limit: int = Query(default=10, ge=1, le=100, description="Number of latest records")):
@@ -7,14 +7,23 @@ import json
 from loguru import logger
 from datetime import datetime
 
+from . import binary_protocol
+
 class WebSocketDashboardClient:
     """WebSocket client for real-time dashboard updates"""
     
-    def __init__(self, uri="ws://localhost:8765"):
+    def __init__(self, uri="ws://localhost:8765", pairs=None, metrics=None, protocol='json'):
         self.uri = uri
         self.websocket = None
         self.connected = False
         self.data_buffer = []
+        self.pairs = pairs or ['*']      # Subscribed on connect
+        self.metrics = metrics or ['*']
+        self.latest = {}                 # pair -> {metric: value}
+        self.protocol = protocol         # 'json' or 'binary' (snapshot + delta frames)
+        self.seq = {}                    # pair -> last binary sequence number seen
+        self.awaiting_resync = set()
+        self.gaps = 0
         
     async def connect(self):
         """Connect to WebSocket server"""
@@ -22,6 +31,9 @@ class WebSocketDashboardClient:
             self.websocket = await websockets.connect(self.uri)
             self.connected = True
             logger.info(f"Connected to WebSocket server at {self.uri}")
+            if self.protocol != 'json':
+                await self.send({'action': 'protocol', 'format': self.protocol})
+            await self.subscribe(self.pairs, self.metrics)
             return True
         except Exception as e:
             logger.error(f"Failed to connect to WebSocket: {e}")
@@ -35,14 +47,25 @@ class WebSocketDashboardClient:
         
         try:
             async for message in self.websocket:
-                data = json.loads(message)
+                if isinstance(message, bytes):
+                    data = await self.handle_binary(message)
+                    if data is None:
+                        continue
+                else:
+                    data = json.loads(message)
                 
                 if data.get('type') == 'connected':
                     logger.info(f"Server message: {data.get('message')}")
                 
+                elif data.get('type') == 'subscribed':
+                    for pair, values in data.get('snapshot', {}).items():
+                        self.latest.setdefault(pair, {}).update(values)
+                
                 elif data.get('type') == 'volatility_update':
                     self.data_buffer.append(data)
-                    logger.info(f"Received volatility update: {data.get('data', {}).get('volatility', 'N/A'):.4f}")
+                    self.latest.setdefault(data.get('pair'), {}).update(data.get('data', {}))
+                    logger.debug(f"Received volatility update for {data.get('pair')}: "
+                                f"{sorted(data.get('data', {}))}")
                     
                     # Call callback if provided
                     if callback:
@@ -55,6 +78,36 @@ class WebSocketDashboardClient:
             logger.error(f"Listen error: {e}")
             self.connected = False
     
+    async def handle_binary(self, frame: bytes):
+        """Apply a binary frame; on a sequence gap, request a resync and
+        ignore deltas for that pair until the snapshot arrives"""
+        decoded = binary_protocol.decode_frame(frame)
+        pair, seq = decoded['pair'], decoded['seq']
+        
+        if decoded['kind'] == binary_protocol.SNAPSHOT:
+            self.awaiting_resync.discard(pair)
+            self.latest[pair] = dict(decoded['data'])
+        else:
+            if pair in self.awaiting_resync:
+                return None
+            if seq != self.seq.get(pair, 0) + 1:
+                self.gaps += 1
+                self.awaiting_resync.add(pair)
+                logger.warning(f"Sequence gap on {pair}: expected {self.seq.get(pair, 0) + 1}, got {seq}")
+                await self.send({'action': 'resync', 'pairs': [pair]})
+                return None
+            self.latest.setdefault(pair, {}).update(decoded['data'])
+        
+        self.seq[pair] = seq
+        return {
+            'type': 'volatility_update',
+            'pair': pair,
+            'data': decoded['data'],
+            'seq': seq,
+            'snapshot': decoded['kind'] == binary_protocol.SNAPSHOT,
+            'timestamp': datetime.fromtimestamp(decoded['timestamp']).isoformat()
+        }
+    
     async def send(self, message: dict):
         """Send message to server"""
         if self.websocket and self.connected:
@@ -63,6 +116,16 @@ class WebSocketDashboardClient:
             except Exception as e:
                 logger.error(f"Send error: {e}")
     
+    async def subscribe(self, pairs=None, metrics=None):
+        """Subscribe to (pair, metric) topics; '*' matches everything"""
+        await self.send({'action': 'subscribe',
+                         'pairs': pairs or ['*'], 'metrics': metrics or ['*']})
+    
+    async def unsubscribe(self, pairs=None, metrics=None):
+        """Drop (pair, metric) topic subscriptions"""
+        await self.send({'action': 'unsubscribe',
+                         'pairs': pairs or ['*'], 'metrics': metrics or ['*']})
+    
     async def disconnect(self):
         """Disconnect from server"""
         if self.websocket:
@@ -4,91 +4,472 @@ WebSocket server for real-time data streaming
 import asyncio
 import websockets
 import json
+import itertools
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Set, Tuple
 from loguru import logger
 from datetime import datetime
 
+from . import binary_protocol
+
+WILDCARD = '*'
+
+# Record keys that identify an update rather than carry a metric value
+NON_METRIC_KEYS = {'pair', 'timestamp'}
+
+# Close code for clients cut off for falling too far behind ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+PROTOCOLS = ('json', 'binary')
+
+class PendingMessage:
+    """Queued outbound frame; payload/body are None once coalescing changed it"""
+
+    __slots__ = ('payload', 'message', 'enqueued_at', 'body', 'seq', 'snapshot')
+
+    def __init__(self, payload: Optional[str], message: Optional[dict], enqueued_at: float,
+                 body: Optional[bytes] = None, seq: int = 0, snapshot: bool = False):
+        self.payload = payload
+        self.message = message
+        self.enqueued_at = enqueued_at
+        self.body = body
+        self.seq = seq
+        self.snapshot = snapshot
+
+class ClientConnection:
+    """Bounded outbound queue and writer task for one client
+
+    Updates for the same pair coalesce latest-value-wins: a newer update
+    merges into the one still waiting instead of queueing behind it. When
+    the queue is full the oldest entry is dropped; a client that keeps
+    dropping, lags too far or stalls a send is disconnected. Producers
+    only enqueue, so a slow socket never delays anyone else.
+    """
+
+    def __init__(self, websocket, on_close, max_queue=256, max_drops=1000,
+                 max_lag=10.0, send_timeout=5.0):
+        self.websocket = websocket
+        self.protocol = 'json'
+        self.seq = defaultdict(int)  # pair -> last binary sequence number
+        self.on_close = on_close
+        self.max_queue = max_queue
+        self.max_drops = max_drops
+        self.max_lag = max_lag
+        self.send_timeout = send_timeout
+
+        self.pending: "OrderedDict[object, PendingMessage]" = OrderedDict()
+        self.connected_at = time.monotonic()
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.peak_lag = 0.0
+        self.close_reason = None
+
+        self._keys = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._writer())
+
+    @property
+    def closed(self):
+        return self.close_reason is not None
+
+    def enqueue(self, payload: Optional[str], message: Optional[dict] = None, key=None,
+                body: Optional[bytes] = None, snapshot: bool = False):
+        """Queue a frame without blocking; key enables coalescing"""
+        if self.closed:
+            return False
+
+        now = time.monotonic()
+        if key is not None and key in self.pending:
+            entry = self.pending[key]
+            # Copy before merging: the message dict is shared across clients
+            entry.message = {**entry.message,
+                             'data': {**entry.message['data'], **message['data']},
+                             'timestamp': message['timestamp']}
+            entry.payload = None
+            entry.body = None
+            entry.snapshot = entry.snapshot or snapshot
+            self.coalesced += 1
+        else:
+            if key is None:
+                key = ('frame', next(self._keys))
+            seq = 0
+            if message is not None and self.protocol == 'binary':
+                # A dropped entry leaves a hole in the sequence the client can see
+                self.seq[message['pair']] += 1
+                seq = self.seq[message['pair']]
+            self.pending[key] = PendingMessage(payload, message, now, body, seq, snapshot)
+            while len(self.pending) > self.max_queue:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+
+        if self.dropped > self.max_drops:
+            self.close('too many dropped messages')
+        elif now - self.oldest_enqueued_at(now) > self.max_lag:
+            self.close('lag exceeded')
+        else:
+            self._wakeup.set()
+        return not self.closed
+
+    def oldest_enqueued_at(self, default: float) -> float:
+        for entry in self.pending.values():
+            return entry.enqueued_at
+        return default
+
+    async def _writer(self):
+        """Drain the queue into the socket, oldest first"""
+        try:
+            while True:
+                if not self.pending:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                _, entry = self.pending.popitem(last=False)
+                payload = self._encode(entry)
+                await asyncio.wait_for(self.websocket.send(payload), self.send_timeout)
+
+                self.sent += 1
+                self.last_lag = time.monotonic() - entry.enqueued_at
+                self.peak_lag = max(self.peak_lag, self.last_lag)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.close('send timeout')
+        except Exception as e:
+            self.close(f"send failed: {e.__class__.__name__}")
+
+    def _encode(self, entry: PendingMessage):
+        """Frame an entry for this connection's protocol"""
+        if entry.message is None:
+            return entry.payload
+        if self.protocol == 'binary':
+            message = entry.message
+            return binary_protocol.encode_frame(
+                binary_protocol.SNAPSHOT if entry.snapshot else binary_protocol.DELTA,
+                entry.seq, message['timestamp'], message['pair'],
+                data=message['data'], body=entry.body)
+        return entry.payload or json.dumps(entry.message)
+
+    def close(self, reason: str):
+        """Stop writing and hand the socket back to the server for pruning"""
+        if self.closed:
+            return
+        self.close_reason = reason
+        self.pending.clear()
+        if self._writer_task is not asyncio.current_task():
+            self._writer_task.cancel()
+        asyncio.ensure_future(self.on_close(self.websocket, reason))
+
+    def stats(self) -> dict:
+        """Per-connection delivery and lag metrics"""
+        now = time.monotonic()
+        return {
+            'queued': len(self.pending),
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'last_lag_ms': round(self.last_lag * 1000, 3),
+            'peak_lag_ms': round(self.peak_lag * 1000, 3),
+            'oldest_pending_ms': round((now - self.oldest_enqueued_at(now)) * 1000, 3),
+            'connected_s': round(now - self.connected_at, 3)
+        }
+
 class AgentSpoonsWebSocketServer:
-    """Real-time data streaming via WebSockets"""
-    
-    def __init__(self, host='0.0.0.0', port=8765):
+    """Real-time data streaming via WebSockets
+
+    Clients subscribe to (pair, metric) topics, '*' matching any pair or
+    metric. The agent pipeline pushes records through publish() and only
+    metrics whose value changed are sent, and only to subscribed clients.
+    """
+
+    def __init__(self, host='0.0.0.0', port=8765, max_queue=256, max_drops=1000,
+                 max_lag=10.0, send_timeout=5.0):
         self.host = host
         self.port = port
         self.clients = set()
-        
+        self.connections: Dict[object, ClientConnection] = {}
+        self.connection_options = {
+            'max_queue': max_queue,
+            'max_drops': max_drops,
+            'max_lag': max_lag,
+            'send_timeout': send_timeout
+        }
+        self.forced_disconnects = 0
+        self.subscriptions: Dict[object, Set[Tuple[str, str]]] = {}
+        self.topics: Dict[Tuple[str, str], Set[object]] = defaultdict(set)
+        self.last_values: Dict[Tuple[str, str], object] = {}
+
     async def register(self, websocket):
         """Register new client"""
         self.clients.add(websocket)
+        self.subscriptions[websocket] = set()
+        self.connections[websocket] = ClientConnection(
+            websocket, self._connection_closed, **self.connection_options)
         logger.info(f"Client connected. Total: {len(self.clients)}")
-        
+
     async def unregister(self, websocket):
         """Unregister client"""
-        self.clients.remove(websocket)
+        if websocket not in self.clients:
+            return
+        self.clients.discard(websocket)
+        for topic in self.subscriptions.pop(websocket, set()):
+            self._drop_topic_client(topic, websocket)
+        connection = self.connections.pop(websocket, None)
+        if connection is not None:
+            connection.close('unregistered')
         logger.info(f"Client disconnected. Total: {len(self.clients)}")
-    
+
+    async def _connection_closed(self, websocket, reason):
+        """Prune a connection whose writer gave up on it"""
+        if websocket not in self.clients:
+            return
+        logger.warning(f"Dropping client: {reason}")
+        self.forced_disconnects += 1
+        await self.unregister(websocket)
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason=reason)
+        except Exception:
+            pass
+
+    def send_to(self, websocket, message: dict) -> bool:
+        """Queue a non-coalescing frame for one client"""
+        connection = self.connections.get(websocket)
+        return connection is not None and connection.enqueue(json.dumps(message))
+
+    def client_stats(self) -> Dict[str, object]:
+        """Lag and delivery metrics for every connection"""
+        clients = [c.stats() for c in self.connections.values()]
+        return {
+            'clients': len(clients),
+            'forced_disconnects': self.forced_disconnects,
+            'queued': sum(c['queued'] for c in clients),
+            'dropped': sum(c['dropped'] for c in clients),
+            'peak_lag_ms': max((c['peak_lag_ms'] for c in clients), default=0.0),
+            'connections': clients
+        }
+
+    def _drop_topic_client(self, topic, websocket):
+        clients = self.topics.get(topic)
+        if clients is not None:
+            clients.discard(websocket)
+            if not clients:
+                del self.topics[topic]
+
+    def subscribe(self, websocket, pairs, metrics) -> Set[Tuple[str, str]]:
+        """Subscribe a client to every (pair, metric) combination"""
+        added = set()
+        for pair in pairs:
+            for metric in metrics:
+                topic = (pair, metric)
+                self.topics[topic].add(websocket)
+                added.add(topic)
+        self.subscriptions.setdefault(websocket, set()).update(added)
+        return added
+
+    def unsubscribe(self, websocket, pairs, metrics):
+        """Remove (pair, metric) subscriptions for a client"""
+        current = self.subscriptions.get(websocket, set())
+        for pair in pairs:
+            for metric in metrics:
+                topic = (pair, metric)
+                current.discard(topic)
+                self._drop_topic_client(topic, websocket)
+
+    def snapshot_for(self, websocket, pairs=None) -> Dict[str, dict]:
+        """Last known values matching a client's subscriptions"""
+        topics = self.subscriptions.get(websocket, set())
+        snapshot = defaultdict(dict)
+        for (pair, metric), value in self.last_values.items():
+            if pairs is not None and pair not in pairs:
+                continue
+            if ((pair, metric) in topics or (pair, WILDCARD) in topics or
+                    (WILDCARD, metric) in topics or (WILDCARD, WILDCARD) in topics):
+                snapshot[pair][metric] = value
+        return dict(snapshot)
+
+    def _interested(self, pair, metric):
+        """Clients subscribed to a topic directly or through a wildcard"""
+        clients = set()
+        for topic in ((pair, metric), (pair, WILDCARD),
+                      (WILDCARD, metric), (WILDCARD, WILDCARD)):
+            clients |= self.topics.get(topic, set())
+        return clients
+
+    async def publish(self, record: dict):
+        """Push a pipeline record; fan out only the metrics that changed"""
+        pair = record.get('pair')
+        if pair is None:
+            return 0
+
+        changed = {}
+        for metric, value in record.items():
+            if metric in NON_METRIC_KEYS or isinstance(value, (dict, list)):
+                continue
+            key = (pair, metric)
+            if self.last_values.get(key, object()) != value:
+                self.last_values[key] = value
+                changed[metric] = value
+
+        if not changed or not self.topics:
+            return 0
+
+        # Group clients by the exact metric set they should receive so
+        # each distinct payload is serialised once
+        per_client = defaultdict(set)
+        for metric in changed:
+            for client in self._interested(pair, metric):
+                per_client[client].add(metric)
+
+        if not per_client:
+            return 0
+
+        groups = defaultdict(list)
+        for client, metrics in per_client.items():
+            groups[frozenset(metrics)].append(client)
+
+        timestamp = record.get('timestamp') or datetime.now().isoformat()
+        for metrics, clients in groups.items():
+            message = {
+                'type': 'volatility_update',
+                'pair': pair,
+                'data': {m: changed[m] for m in metrics},
+                'timestamp': timestamp
+            }
+            # Each encoding is produced at most once per group, and only if used
+            message_str = body = None
+            for client in clients:
+                connection = self.connections.get(client)
+                if connection is None:
+                    continue
+                if connection.protocol == 'binary':
+                    if body is None:
+                        body = binary_protocol.encode_fields(message['data'])
+                elif message_str is None:
+                    message_str = json.dumps(message)
+                connection.enqueue(message_str, message, key=('volatility_update', pair), body=body)
+
+        return len(per_client)
+
+    def send_snapshots(self, websocket, pairs=None) -> int:
+        """Queue SNAPSHOT updates (binary clients) superseding pending deltas"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return 0
+        snapshot = self.snapshot_for(websocket, pairs)
+        timestamp = datetime.now().isoformat()
+        for pair, data in snapshot.items():
+            connection.enqueue(None, {
+                'type': 'volatility_update',
+                'pair': pair,
+                'data': data,
+                'timestamp': timestamp
+            }, key=('volatility_update', pair), snapshot=True)
+        return len(snapshot)
+
     async def broadcast(self, message: dict):
         """Broadcast message to all clients"""
         if self.clients:
             message_str = json.dumps(message)
-            await asyncio.gather(
-                *[client.send(message_str) for client in self.clients],
-                return_exceptions=True
-            )
-    
-    async def handler(self, websocket, path):
+            for connection in list(self.connections.values()):
+                connection.enqueue(message_str)
+
+    async def handle_message(self, websocket, message: str):
+        """Apply a client control message and return the reply"""
+        try:
+            request = json.loads(message)
+        except (TypeError, ValueError):
+            return {'type': 'error', 'message': 'Invalid JSON'}
+        if not isinstance(request, dict):
+            return {'type': 'error', 'message': 'Expected a JSON object'}
+        for field in ('pairs', 'metrics'):
+            value = request.get(field)
+            if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                return {'type': 'error', 'message': f"'{field}' must be a list of strings"}
+
+        action = request.get('action')
+        pairs = request.get('pairs') or [WILDCARD]
+        metrics = request.get('metrics') or [WILDCARD]
+
+        connection = self.connections.get(websocket)
+        binary = connection is not None and connection.protocol == 'binary'
+
+        if action == 'subscribe':
+            self.subscribe(websocket, pairs, metrics)
+            if binary:
+                self.send_snapshots(websocket)
+                return {'type': 'subscribed', 'pairs': pairs, 'metrics': metrics}
+            return {
+                'type': 'subscribed',
+                'pairs': pairs,
+                'metrics': metrics,
+                'snapshot': self.snapshot_for(websocket)
+            }
+        if action == 'unsubscribe':
+            self.unsubscribe(websocket, pairs, metrics)
+            return {'type': 'unsubscribed', 'pairs': pairs, 'metrics': metrics}
+        if action == 'ping':
+            return {'type': 'pong', 'timestamp': datetime.now().isoformat()}
+        if action == 'protocol':
+            fmt = request.get('format', 'json')
+            if fmt not in PROTOCOLS or connection is None:
+                return {'type': 'error', 'message': f"Unknown protocol: {fmt}"}
+            connection.protocol = fmt
+            reply = {'type': 'protocol', 'format': fmt}
+            if fmt == 'binary':
+                reply['version'] = binary_protocol.PROTOCOL_VERSION
+                reply['fields'] = binary_protocol.FIELD_IDS
+            return reply
+        if action == 'resync':
+            requested = request.get('pairs')
+            sent = self.send_snapshots(websocket, set(requested) if requested else None)
+            return {'type': 'resync', 'pairs': sent}
+        if action == 'stats':
+            return {'type': 'stats', 'connection': connection.stats() if connection else None}
+
+        return {'type': 'error', 'message': f"Unknown action: {action}"}
+
+    async def handler(self, websocket, path=None):
         """Handle client connection"""
         await self.register(websocket)
-        
+
         try:
             # Send welcome message
-            await websocket.send(json.dumps({
+            self.send_to(websocket, {
                 'type': 'connected',
                 'message': 'AgentSpoons WebSocket Server',
+                'actions': ['subscribe', 'unsubscribe', 'protocol', 'resync', 'ping', 'stats'],
                 'timestamp': datetime.now().isoformat()
-            }))
-            
-            # Keep connection alive
+            })
+
             async for message in websocket:
-                # Echo back for now
-                await websocket.send(message)
-                
+                reply = await self.handle_message(websocket, message)
+                self.send_to(websocket, reply)
+
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
             await self.unregister(websocket)
-    
-    async def data_streamer(self):
-        """Stream live data to all clients"""
-        while True:
-            try:
-                # Load latest data
-                with open('data/results.json', 'r') as f:
-                    data = json.load(f)
-                
-                if data:
-                    latest = data[-1]
-                    
-                    # Broadcast to all clients
-                    await self.broadcast({
-                        'type': 'volatility_update',
-                        'data': latest,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                
-                await asyncio.sleep(2)  # Stream every 2 seconds
-                
-            except Exception as e:
-                logger.error(f"Stream error: {e}")
-                await asyncio.sleep(5)
-    
+
     async def start(self):
-        """Start WebSocket server"""
+        """Start WebSocket server
+
+        Data arrives through publish(); wire it to the agent pipeline
+        (e.g. ``agent.add_listener(server.publish)``).
+        """
         logger.info(f"WebSocket server starting on ws://{self.host}:{self.port}")
-        
-        # Start server
+
         async with websockets.serve(self.handler, self.host, self.port):
-            # Start data streamer
-            await self.data_streamer()
+            await asyncio.Future()  # Serve until cancelled
 
 if __name__ == "__main__":
-    server = AgentSpoonsWebSocketServer()
-    asyncio.run(server.start())
+    from src.enhanced_demo import AdvancedDataGenerator
+
+    async def main():
+        server = AgentSpoonsWebSocketServer()
+        generator = AdvancedDataGenerator(on_result=server.publish)
+        await asyncio.gather(server.start(), generator.run())
+
+    asyncio.run(main())
@@ -1 +1,7 @@
 """Backtesting module"""
+from .vectorized import VectorizedBacktester
+from .optimizer import ParameterOptimizer
+from .data_loader import MarketDataLoader, align
+from .portfolio import PortfolioBacktester
+
+__all__ = ['VectorizedBacktester', 'ParameterOptimizer', 'MarketDataLoader', 'align', 'PortfolioBacktester']
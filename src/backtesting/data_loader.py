@@ -0,0 +1,169 @@
+"""
+Multi-pair market data loading for backtests
+
+Reads every pair at once from the JSON results file, the SQLite
+database (AgentSpoonsDB schema) or a Parquet archive into one frame per
+pair with price, OHLC and volatility columns. Parsed frames are cached
+in memory and on disk, keyed by the source's path and pairs and
+validated against its size and mtime, so repeated runs skip parsing
+until the source changes. A rewritten source replaces its cache file
+instead of adding another.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+from loguru import logger
+
+COLUMNS = ['price', 'open', 'high', 'low', 'close', 'volume',
+           'realized_vol', 'implied_vol', 'garch_forecast']
+
+def _finish(frame: pd.DataFrame) -> pd.DataFrame:
+    """Index by timestamp and fill OHLC from price where the source has no bars"""
+    frame = frame.copy()
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], format='ISO8601')
+    frame = frame.set_index('timestamp').sort_index()
+    frame = frame[~frame.index.duplicated(keep='last')]
+    if 'price' not in frame:
+        frame['price'] = frame['close']
+    for column in ('open', 'high', 'low', 'close'):
+        # A tick has no range: its bar is the price itself, not an invented +/-1%
+        frame[column] = frame[column].fillna(frame['price']) if column in frame else frame['price']
+    if 'volume' not in frame:
+        frame['volume'] = 0.0
+    for column in ('realized_vol', 'implied_vol', 'garch_forecast'):
+        if column not in frame:
+            frame[column] = float('nan')
+    return frame[COLUMNS].astype(float)
+
+def _split(frame: pd.DataFrame, pairs: Optional[Iterable[str]]) -> Dict[str, pd.DataFrame]:
+    wanted = set(pairs) if pairs else None
+    return {pair: _finish(group.drop(columns='pair'))
+            for pair, group in frame.groupby('pair', sort=True)
+            if wanted is None or pair in wanted}
+
+def read_json(path: str, pairs: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    with open(path) as f:
+        records = json.load(f)
+    return _split(pd.DataFrame(records), pairs)
+
+def read_parquet(path: str, pairs: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    filters = [('pair', 'in', list(pairs))] if pairs else None
+    return _split(pd.read_parquet(path, filters=filters), pairs)
+
+def read_sqlite(path: str, pairs: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    """Volatility metrics joined as-of with OHLC bars and implied vol"""
+    where, params = '', []
+    if pairs:
+        pairs = list(pairs)
+        where = f" WHERE pair IN ({','.join('?' * len(pairs))})"
+        params = pairs
+
+    with sqlite3.connect(path) as conn:
+        vol = pd.read_sql_query(
+            "SELECT pair, timestamp, COALESCE(realized_vol_30d, garman_klass_vol) AS realized_vol, "
+            f"garch_forecast FROM volatility_metrics{where}", conn, params=params)
+        bars = pd.read_sql_query(
+            f"SELECT pair, timestamp, open, high, low, close, volume FROM market_data{where}",
+            conn, params=params)
+        implied = pd.read_sql_query(
+            "SELECT pair, timestamp, atm_vol_1m AS implied_vol, spot_price "
+            f"FROM implied_volatility{where}", conn, params=params)
+
+    for table in (vol, bars, implied):
+        table['timestamp'] = pd.to_datetime(table['timestamp'], format='ISO8601')
+        table.sort_values('timestamp', inplace=True)
+
+    merged = vol if not vol.empty else bars[['pair', 'timestamp']]
+    for table in (bars, implied):
+        if table.empty:  # An empty table can't be as-of joined (its key dtypes differ)
+            merged = merged.assign(**{c: float('nan') for c in table.columns if c not in merged})
+        else:
+            merged = pd.merge_asof(merged, table, on='timestamp', by='pair')
+    merged['price'] = merged['close'].fillna(merged['spot_price'])
+    merged = merged.drop(columns='spot_price').dropna(subset=['price'])
+    merged['timestamp'] = merged['timestamp'].astype(str)
+    return _split(merged, pairs)
+
+READERS = {
+    '.json': read_json,
+    '.parquet': read_parquet,
+    '.db': read_sqlite,
+    '.sqlite': read_sqlite,
+}
+
+def align(frames: Dict[str, pd.DataFrame], freq: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Put every pair on one clock: the union of timestamps, or `freq` bars
+
+    Values carry forward between a pair's own observations; rows before
+    a pair's first observation stay NaN.
+    """
+    if not frames:
+        return {}
+    if freq:
+        bars = {'price': 'last', 'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+                'volume': 'sum', 'realized_vol': 'last', 'implied_vol': 'last', 'garch_forecast': 'last'}
+        frames = {pair: frame.resample(freq).agg(bars).dropna(subset=['price'])
+                  for pair, frame in frames.items()}
+    clock = frames[next(iter(frames))].index
+    for frame in list(frames.values())[1:]:
+        clock = clock.union(frame.index)
+    return {pair: frame.reindex(clock).ffill() for pair, frame in frames.items()}
+
+class MarketDataLoader:
+    """Cached multi-pair loader; frames are shared, treat them as read-only"""
+
+    def __init__(self, cache_dir: Optional[str] = 'data/cache'):
+        self.cache_dir = cache_dir
+        # (path, pairs) -> (source signature, frames); a changed source replaces its entry
+        self.memory: Dict[tuple, tuple] = {}
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'parsed': 0}
+
+    def load(self, source: str = 'data/results.json',
+             pairs: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+        """{pair: frame} for every pair (or just `pairs`) in `source`"""
+        suffix = os.path.splitext(source)[1].lower()
+        if suffix not in READERS:
+            raise ValueError(f"Unsupported data source: {source} (expected {sorted(READERS)})")
+        pairs = tuple(sorted(pairs)) if pairs else ()
+        stat = os.stat(source)
+        key = (os.path.abspath(source), pairs)
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        cached = self.memory.get(key)
+        if cached is not None and cached[0] == signature:
+            self.stats['memory_hits'] += 1
+            return cached[1]
+
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        cache_path = os.path.join(self.cache_dir, f"{digest}.pkl") if self.cache_dir else None
+        stored = pd.read_pickle(cache_path) if cache_path and os.path.exists(cache_path) else None
+        if isinstance(stored, tuple) and stored[0] == signature:
+            frames = stored[1]
+            self.stats['disk_hits'] += 1
+        else:
+            try:
+                frames = READERS[suffix](source, pairs or None)
+            except ImportError:
+                logger.warning("Parquet support missing. Install with: pip install pyarrow")
+                raise
+            self.stats['parsed'] += 1
+            logger.info(f"Loaded {len(frames)} pairs from {source}")
+            if cache_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = cache_path + '.tmp'
+                pd.to_pickle((signature, frames), tmp)
+                os.replace(tmp, cache_path)
+
+        self.memory[key] = (signature, frames)
+        return frames
+
+    def load_aligned(self, source: str = 'data/results.json', pairs: Optional[Iterable[str]] = None,
+                     freq: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        return align(self.load(source, pairs), freq)
+
+# Shared by BacktestEngine instances in one process
+loader = MarketDataLoader()
@@ -0,0 +1,232 @@
+"""
+Parallel parameter optimizer for the vectorized backtester
+
+The price/volatility frame is copied once into a shared memory block;
+pool workers attach to it read-only and keep one VectorizedBacktester
+per data window, so a task is just (strategy, window, parameter sets).
+Grid, random and successive-halving search and walk-forward analysis
+all evaluate through that pool and return compact DataFrames.
+"""
+import itertools
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .vectorized import VectorizedBacktester, _strategy_name
+
+COLUMNS = ('price', 'realized_vol', 'implied_vol', 'garch_forecast')
+METRICS = ('final_value', 'total_return', 'max_drawdown', 'sharpe_ratio',
+           'sharpe_annualized', 'total_trades', 'win_rate')
+MONEY = ('final_value',)  # float32 keeps ~7 digits, too few for portfolio values
+
+# Per-process state: the attached frame and backtesters keyed by window
+_WORKER: Dict = {}
+
+def _init_worker(spec: Dict):
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    n, k = spec['shape']
+    values = np.ndarray((n, k), dtype=np.float64, buffer=shm.buf)
+    stamps = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=values.nbytes)
+    index = pd.DatetimeIndex(stamps) if spec['datetime'] else pd.RangeIndex(n)
+    _set_frame(pd.DataFrame(values, index=index, columns=spec['columns'], copy=False),
+               spec['cash'], spec['commission'])
+    _WORKER['shm'] = shm  # Keep the mapping alive
+
+def _set_frame(frame: pd.DataFrame, cash: float, commission: float):
+    _WORKER.update(frame=frame, cash=cash, commission=commission, engines={})
+
+def _engine(start: int, stop: int) -> VectorizedBacktester:
+    engines = _WORKER['engines']
+    if (start, stop) not in engines:
+        engines[(start, stop)] = VectorizedBacktester(_WORKER['frame'].iloc[start:stop],
+                                                      _WORKER['cash'], _WORKER['commission'])
+    return engines[(start, stop)]
+
+def _evaluate(task: Tuple) -> List[Dict]:
+    strategy, start, stop, param_sets = task
+    engine = _engine(start, stop)
+    rows = []
+    for params in param_sets:
+        result = engine.run(strategy, **params)
+        rows.append({**params, **{m: result[m] for m in METRICS}})
+    return rows
+
+def compact(table: pd.DataFrame, columns: Sequence[str] = METRICS) -> pd.DataFrame:
+    """Downcast metric columns (float32, int32 counts); parameters and money keep full precision"""
+    def matches(column, names):
+        return any(column == m or column.endswith('_' + m) for m in names)
+
+    for column in table.columns:
+        if not matches(column, columns) or matches(column, MONEY):
+            continue
+        if table[column].dtype == np.float64:
+            table[column] = table[column].astype(np.float32)
+        elif table[column].dtype == np.int64:
+            table[column] = table[column].astype(np.int32)
+    return table
+
+class ParameterOptimizer:
+    """Grid/random/successive-halving sweeps and walk-forward over a process pool"""
+
+    def __init__(self, data: pd.DataFrame, initial_cash: float = 100000, commission: float = 0.001,
+                 workers: Optional[int] = None, chunk_size: int = 32,
+                 objective: str = 'sharpe_annualized'):
+        self.columns = [c for c in COLUMNS if c in data]
+        self.n = len(data)
+        self.index = data.index
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.objective = objective
+        self.data = data
+        self.shm = None
+        self.pool = None
+
+    # Pool and shared data
+
+    def _share(self) -> Dict:
+        values = self.data[self.columns].to_numpy(dtype=np.float64)
+        is_datetime = isinstance(self.index, pd.DatetimeIndex)
+        stamps = self.index.as_unit('ns').asi8 if is_datetime else np.arange(self.n, dtype=np.int64)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes + stamps.nbytes, 1))
+        np.ndarray(values.shape, dtype=np.float64, buffer=self.shm.buf)[:] = values
+        np.ndarray(stamps.shape, dtype=np.int64, buffer=self.shm.buf, offset=values.nbytes)[:] = stamps
+        return {'name': self.shm.name, 'shape': values.shape, 'columns': self.columns,
+                'datetime': is_datetime, 'cash': self.initial_cash, 'commission': self.commission}
+
+    def _map(self, tasks: List[Tuple]) -> List[Dict]:
+        if self.workers <= 1:
+            if _WORKER.get('frame') is not self.data:
+                _set_frame(self.data, self.initial_cash, self.commission)
+            return [row for task in tasks for row in _evaluate(task)]
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self._share(),))
+            logger.info(f"Optimizer pool: {self.workers} workers sharing {self.shm.size} bytes")
+        return [row for rows in self.pool.map(_evaluate, tasks) for row in rows]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Evaluation
+
+    def evaluate(self, strategy, param_sets: Sequence[Dict], start: int = 0,
+                 stop: Optional[int] = None) -> pd.DataFrame:
+        """Backtest every parameter set on bars [start, stop); best objective first"""
+        name = _strategy_name(strategy)
+        stop = self.n if stop is None else stop
+        param_sets = list(param_sets)
+        # Enough chunks to keep every worker busy, few enough to amortize IPC
+        size = max(1, min(self.chunk_size, math.ceil(len(param_sets) / (self.workers * 4))))
+        tasks = [(name, start, stop, param_sets[i:i + size]) for i in range(0, len(param_sets), size)]
+
+        table = pd.DataFrame(self._map(tasks))
+        if table.empty:
+            return table
+        table['sharpe_ratio'] = table['sharpe_ratio'].astype(float)
+        table['sharpe_annualized'] = table['sharpe_annualized'].astype(float)
+        table['win_rate'] = table['win_rate'].astype(float)
+        table = table.sort_values(self.objective, ascending=False, na_position='last', kind='stable')
+        return compact(table.reset_index(drop=True))
+
+    @staticmethod
+    def best_params(table: pd.DataFrame, space: Dict) -> Dict:
+        row = table.iloc[0]
+        return {k: row[k].item() if hasattr(row[k], 'item') else row[k] for k in space}
+
+    # Search strategies
+
+    def grid(self, strategy, space: Dict[str, Sequence], **window) -> pd.DataFrame:
+        """Every combination of the listed values"""
+        keys = list(space)
+        param_sets = [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+        return self.evaluate(strategy, param_sets, **window)
+
+    @staticmethod
+    def sample(space: Dict, n: int, seed: Optional[int] = None) -> List[Dict]:
+        """n random parameter sets; lists are sampled from, (low, high) tuples uniformly"""
+        rng = random.Random(seed)
+        return [{k: rng.uniform(*v) if isinstance(v, tuple) else rng.choice(list(v))
+                 for k, v in space.items()} for _ in range(n)]
+
+    def random(self, strategy, space: Dict, n_iter: int = 100, seed: Optional[int] = None,
+               **window) -> pd.DataFrame:
+        return self.evaluate(strategy, self.sample(space, n_iter, seed), **window)
+
+    def successive_halving(self, strategy, space: Dict, n_configs: int = 81, eta: int = 3,
+                           min_fraction: float = 1 / 9, seed: Optional[int] = None,
+                           start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """Score many configs on a short history, keep the best 1/eta on a longer one
+
+        Each rung uses the first `fraction` of the window, growing by eta
+        until the full window; a lone survivor skips straight to it, so the
+        final table always scores the full window. Lists-only spaces with
+        n_configs=None use the whole grid. Returns the final rung's table.
+        """
+        stop = self.n if stop is None else stop
+        if n_configs is None:
+            configs = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+        else:
+            configs = self.sample(space, n_configs, seed)
+
+        fraction = min_fraction if len(configs) > 1 else 1.0
+        rung = 0
+        while True:
+            fraction = min(fraction, 1.0)
+            bars = max(int((stop - start) * fraction), 1)
+            table = self.evaluate(strategy, configs, start=start, stop=start + bars)
+            table['rung'] = np.int8(rung)
+            logger.debug(f"Successive halving rung {rung}: {len(configs)} configs on {bars} bars")
+            if fraction >= 1.0:
+                return table
+            keep = max(1, len(configs) // eta)
+            configs = [{k: row[k] for k in space} for row in table.head(keep).to_dict('records')]
+            fraction = fraction * eta if len(configs) > 1 else 1.0
+            rung += 1
+
+    def walk_forward(self, strategy, space: Dict, train_bars: int, test_bars: int,
+                     step: Optional[int] = None, search: str = 'grid', **search_kwargs) -> pd.DataFrame:
+        """Optimize on each training window, score the winner on the window after it"""
+        step = step or test_bars
+        searches = {'grid': self.grid, 'random': self.random, 'halving': self.successive_halving}
+        if search not in searches:
+            raise ValueError(f"Unknown search: {search} (choose from {sorted(searches)})")
+
+        folds = []
+        for fold, train_start in enumerate(range(0, self.n - train_bars - test_bars + 1, step)):
+            train_stop = train_start + train_bars
+            trained = searches[search](strategy, space, start=train_start, stop=train_stop, **search_kwargs)
+            params = self.best_params(trained, space)
+            tested = self.evaluate(strategy, [params], start=train_stop, stop=train_stop + test_bars)
+            folds.append({
+                'fold': fold,
+                'train_start': self.index[train_start],
+                'test_start': self.index[train_stop],
+                'test_end': self.index[train_stop + test_bars - 1],
+                **params,
+                f'train_{self.objective}': trained[self.objective].iloc[0],
+                **{f'test_{m}': tested[m].iloc[0] for m in METRICS},
+            })
+        return compact(pd.DataFrame(folds))
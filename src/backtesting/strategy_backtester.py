@@ -6,6 +6,13 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 import json
+import sys
+from pathlib import Path
+
+# Allow running as a script from the repo root
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.backtesting.data_loader import loader
 
 class VolatilityArbitrageStrategy(bt.Strategy):
     """Volatility arbitrage strategy"""
@@ -121,21 +128,28 @@ class GARCHMomentumStrategy(bt.Strategy):
         
         # Moving averages
         self.vol_ma_short = bt.indicators.SMA(self.realized_vol, period=10)
-        self.vol_ma_long = bt.indicators.SMA(self.realized_vol, period=50)
+        self.vol_ma_long = bt.indicators.SMA(self.realized_vol, period=self.params.lookback)
         
         self.order = None
-    
+
+    def notify_order(self, order):
+        """Clear the pending order once it completes or fails"""
+        if order.status in [order.Submitted, order.Accepted]:
+            return
+
+        self.order = None
+
     def next(self):
         """Strategy logic"""
         if self.order:
             return
-        
+
         forecast = self.garch_forecast[0]
         current_vol = self.realized_vol[0]
         
         # Volatility regime detection
         vol_increasing = self.vol_ma_short[0] > self.vol_ma_long[0]
-        forecast_spike = forecast > current_vol * 1.2
+        forecast_spike = forecast > current_vol * (1 + self.params.forecast_threshold)
         
         if not self.position:
             # Buy if expecting volatility spike
@@ -179,24 +193,16 @@ class BacktestEngine:
         self.cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
         self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
     
-    def load_data(self, data_file='data/results.json'):
-        """Load data from JSON"""
-        with open(data_file, 'r') as f:
-            data = json.load(f)
-        
-        neo_data = [d for d in data if d['pair'] == 'NEO/USDT']
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(neo_data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.set_index('timestamp', inplace=True)
-        
-        # Ensure all required fields
-        df['high'] = df['price'] * 1.01
-        df['low'] = df['price'] * 0.99
-        df['volume'] = 0
-        
-        return df
+    def load_data(self, data_file='data/results.json', pair='NEO/USDT'):
+        """Load one pair from JSON, SQLite or Parquet (parsed once, then cached)"""
+        frames = loader.load(data_file, [pair])
+        if pair not in frames:
+            raise ValueError(f"No {pair} data in {data_file}")
+        return frames[pair]
+    
+    def load_pairs(self, data_file='data/results.json', pairs=None, freq=None):
+        """Load several pairs aligned on one clock"""
+        return loader.load_aligned(data_file, pairs, freq)
     
     def add_strategy(self, strategy_class, **params):
         """Add strategy with parameters"""
@@ -237,7 +243,8 @@ class BacktestEngine:
         
         if 'total' in trades and trades.total.total > 0:
             print(f'  Total Trades:     {trades.total.total}')
-            print(f'  Win Rate:         {trades.won.total / trades.total.total:.2%}')
+            won = trades.won.total if 'won' in trades else 0
+            print(f'  Win Rate:         {won / trades.total.total:.2%}')
         else:
             print(f'  Total Trades:     0')
             print(f'  Win Rate:         N/A')
@@ -334,36 +341,56 @@ def run_backtest():
 def run_optimization():
     """Run parameter optimization"""
     
+    from src.backtesting.optimizer import ParameterOptimizer
+
     engine = BacktestEngine()
     data = engine.load_data()
     
-    optimizer = StrategyOptimizer(data)
-    
     param_grid = {
         'spread_threshold': [0.05, 0.08, 0.10, 0.12],
         'position_size': [0.80, 0.90, 0.95],
         'stop_loss': [0.03, 0.05, 0.07],
     }
     
-    best_params, results = optimizer.optimize(
-        VolatilityArbitrageStrategy,
-        param_grid
-    )
+    with ParameterOptimizer(data) as optimizer:
+        results = optimizer.grid(VolatilityArbitrageStrategy, param_grid)
+    
+    print(f"\nBest parameters: {optimizer.best_params(results, param_grid)}")
+    print(results.head(10).to_string(index=False))
     
     # Save results
-    pd.DataFrame(results).to_csv('data/optimization_results.csv', index=False)
+    results.to_csv('data/optimization_results.csv', index=False)
     print("\n✅ Results saved to data/optimization_results.csv")
 
+def run_portfolio_backtest():
+    """Run the arbitrage strategy across every pair in the data"""
+    from src.backtesting.portfolio import PortfolioBacktester
+
+    frames = loader.load()
+    
+    portfolio = PortfolioBacktester(frames, initial_cash=100000, allocation='inverse_vol')
+    result = portfolio.run(VolatilityArbitrageStrategy, spread_threshold=0.08, position_size=0.90)
+    
+    print('='*70)
+    print(f"PORTFOLIO BACKTEST ({len(frames)} pairs)")
+    print('='*70)
+    print(result['pairs'].to_string())
+    print(f"\nFinal Portfolio Value: ${result['final_value']:,.2f}")
+    print(f"Max Drawdown:          {result['max_drawdown']:.2f}%")
+
 if __name__ == "__main__":
     print("Choose mode:")
     print("1. Run backtest")
     print("2. Run optimization")
+    print("3. Run portfolio backtest")
     
-    choice = input("Enter choice (1 or 2): ")
+    choice = input("Enter choice (1, 2 or 3): ")
     
     if choice == '1':
         run_backtest()
     elif choice == '2':
         run_optimization()
+    elif choice == '3':
+        run_portfolio_backtest()
     else:
         print("Invalid choice")
@@ -0,0 +1,249 @@
+"""
+Vectorized backtesting engine
+
+Reproduces BacktestEngine's accounting for the bundled strategies without
+backtrader's per-bar event loop: market orders fill at the next bar's
+open, 0.1% commission on each fill, one position at a time, and the same
+Sharpe/drawdown/return/trade statistics as the backtrader analyzers.
+
+Indicators and entry/exit conditions are whole-array NumPy operations.
+The only Python loop is over trades, each of which finds its exit bar
+with a vectorized search, so a run over thousands of bars takes
+milliseconds and can be repeated across large parameter sweeps.
+"""
+import math
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Mirrors the backtrader strategy params so sweeps don't need backtrader
+DEFAULT_PARAMS = {
+    'VolatilityArbitrageStrategy': {
+        'spread_threshold': 0.10,
+        'position_size': 0.95,
+        'stop_loss': 0.05,
+        'take_profit': 0.15,
+    },
+    'GARCHMomentumStrategy': {
+        'forecast_threshold': 0.15,
+        'lookback': 50,
+    },
+}
+
+RISK_FREE_RATE = 0.01  # backtrader SharpeRatio default
+SPREAD_NORMALIZED = 0.03
+
+def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average; NaN until `period` values are available"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        csum = np.cumsum(np.insert(values.astype(float), 0, 0.0))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """Largest peak-to-trough fall, in percent like backtrader's DrawDown"""
+    peak = np.maximum.accumulate(equity)
+    return float(np.max((peak - equity) / peak) * 100)
+
+def annualized_sharpe(equity: np.ndarray, index) -> Optional[float]:
+    """Per-bar Sharpe scaled by bars per year; usable on intraday data"""
+    if not isinstance(index, pd.DatetimeIndex) or len(equity) < 3:
+        return None
+    step = np.median(np.diff(index.as_unit('ns').asi8)) / 1e9
+    returns = np.diff(equity) / equity[:-1]
+    std = returns.std()
+    if step <= 0 or std == 0:
+        return None
+    return float(returns.mean() / std * math.sqrt(365.25 * 86400 / step))
+
+def _strategy_name(strategy) -> str:
+    return strategy if isinstance(strategy, str) else strategy.__name__
+
+class VectorizedBacktester:
+    """Array-based backtester over one price/volatility DataFrame
+
+    The frame is the same one BacktestEngine.run() takes: a price column
+    plus realized_vol, implied_vol and garch_forecast, indexed by
+    timestamp. Arrays and indicators are prepared once and reused by
+    every run().
+    """
+
+    def __init__(self, data: pd.DataFrame, initial_cash: float = 100000, commission: float = 0.001):
+        self.initial_cash = float(initial_cash)
+        self.commission = commission
+        self.index = data.index
+        self.price = data['price'].to_numpy(dtype=float)
+        self.columns = {
+            name: data[name].to_numpy(dtype=float)
+            for name in ('realized_vol', 'implied_vol', 'garch_forecast') if name in data
+        }
+        self.n = len(self.price)
+        self._cache: Dict = {}
+
+        self.strategies: Dict[str, Callable] = {
+            'VolatilityArbitrageStrategy': self._vol_arbitrage,
+            'GARCHMomentumStrategy': self._garch_momentum,
+        }
+
+    def _cached(self, key, compute: Callable) -> np.ndarray:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def sma(self, column: str, period: int) -> np.ndarray:
+        return self._cached(('sma', column, period), lambda: rolling_mean(self.columns[column], period))
+
+    # Strategies: each returns (first tradable bar, entry direction per bar,
+    # size function, exit search)
+
+    def _vol_arbitrage(self, p: Dict):
+        spread = self._cached('spread', lambda: self.columns['implied_vol'] - self.columns['realized_vol'])
+        abs_spread = self._cached('abs_spread', lambda: np.abs(spread))
+        normalized = self._cached('normalized', lambda: np.flatnonzero(abs_spread < SPREAD_NORMALIZED))
+
+        direction = np.zeros(self.n, dtype=np.int8)
+        direction[spread > p['spread_threshold']] = -1  # Sell volatility
+        direction[spread < -p['spread_threshold']] = 1  # Buy volatility
+        band = min(p['stop_loss'], p['take_profit'])
+        price = self.price
+
+        def size(cash: float, bar: int) -> int:
+            return int(cash * p['position_size'] / price[bar])
+
+        def find_exit(first: int, entry_price: float) -> int:
+            j = np.searchsorted(normalized, first)
+            limit = normalized[j] if j < len(normalized) else self.n
+            hits = np.flatnonzero(np.abs((price[first:limit] - entry_price) / entry_price) > band)
+            return first + hits[0] if len(hits) else limit
+
+        return 19, direction, size, find_exit  # SMA(20) of the spread gates next()
+
+    def _garch_momentum(self, p: Dict):
+        rv = self.columns['realized_vol']
+        lookback = int(p['lookback'])
+        vol_increasing = self.sma('realized_vol', 10) > self.sma('realized_vol', lookback)
+        spike = self.columns['garch_forecast'] > rv * (1 + p['forecast_threshold'])
+        direction = (vol_increasing & spike).astype(np.int8)
+        peaked = self._cached(('peaked', lookback), lambda: np.flatnonzero(~vol_increasing))
+
+        def size(cash: float, bar: int) -> int:
+            return 1  # backtrader's default FixedSize sizer
+
+        def find_exit(first: int, entry_price: float) -> int:
+            j = np.searchsorted(peaked, first)
+            return peaked[j] if j < len(peaked) else self.n
+
+        return max(10, lookback) - 1, direction, size, find_exit  # The longer SMA gates next()
+
+    # Simulation
+
+    def _margin_ok(self, cash: float, size: int, bar: int) -> bool:
+        """backtrader's cash check: buying `size` at this bar's price must not overdraw"""
+        return cash - size * self.price[bar] * (1 + self.commission) >= 0
+
+    def _simulate(self, start: int, direction: np.ndarray, size_fn: Callable, find_exit: Callable) -> List[Dict]:
+        price, n, c = self.price, self.n, self.commission
+        entries = np.flatnonzero(direction)
+        cash = self.initial_cash
+        trades = []
+        bar = start
+
+        while True:
+            i = np.searchsorted(entries, bar)
+            if i == len(entries) or entries[i] >= n - 1:
+                break  # Orders placed on the last bar never fill
+            signal = entries[i]
+            side = int(direction[signal])
+            size = size_fn(cash, signal)
+            # Longs are checked on submit (signal close) and again on fill (next open)
+            if size <= 0 or (side > 0 and not (self._margin_ok(cash, size, signal)
+                                               and self._margin_ok(cash, size, signal + 1))):
+                bar = signal + 1
+                continue
+
+            opened = signal + 1
+            entry_price = price[opened]
+            open_comm = size * entry_price * c
+            cash -= side * size * entry_price + open_comm
+            trade = {'side': side, 'size': size, 'entry_bar': opened, 'entry_price': entry_price,
+                     'exit_bar': None, 'exit_price': None, 'pnl': None, 'pnlcomm': None,
+                     'commission': open_comm}
+            trades.append(trade)
+
+            exit_signal = find_exit(opened, entry_price)
+            # Closing a short buys back at the close price: retry while it would overdraw
+            while side < 0 and exit_signal < n - 1 and not self._margin_ok(cash, size, exit_signal):
+                exit_signal = find_exit(exit_signal + 1, entry_price)
+            if exit_signal >= n - 1:
+                break  # Still open at the end of the data
+
+            closed = exit_signal + 1
+            exit_price = price[closed]
+            close_comm = size * exit_price * c
+            cash += side * size * exit_price - close_comm
+            pnl = side * size * (exit_price - entry_price)
+            trade.update(exit_bar=closed, exit_price=exit_price, pnl=pnl,
+                         pnlcomm=pnl - open_comm - close_comm, commission=open_comm + close_comm)
+            bar = closed
+
+        return trades
+
+    def _equity(self, trades: List[Dict]) -> np.ndarray:
+        """Portfolio value at each bar's close"""
+        position = np.zeros(self.n)
+        cash_flow = np.zeros(self.n)
+        c = self.commission
+        for t in trades:
+            end = t['exit_bar'] if t['exit_bar'] is not None else self.n
+            position[t['entry_bar']:end] = t['side'] * t['size']
+            cash_flow[t['entry_bar']] -= t['side'] * t['size'] * t['entry_price'] * (1 + t['side'] * c)
+            if t['exit_bar'] is not None:
+                cash_flow[t['exit_bar']] += t['side'] * t['size'] * t['exit_price'] * (1 - t['side'] * c)
+        return self.initial_cash + np.cumsum(cash_flow) + position * self.price
+
+    def _yearly_sharpe(self, equity: np.ndarray) -> Optional[float]:
+        """backtrader SharpeRatio defaults: yearly returns, 1% risk-free, population stddev"""
+        if not isinstance(self.index, pd.DatetimeIndex):
+            return None
+        years = self.index.year.to_numpy()
+        year_end = np.flatnonzero(np.append(years[1:] != years[:-1], True))
+        values = np.insert(equity[year_end], 0, self.initial_cash)
+        excess = values[1:] / values[:-1] - 1.0 - RISK_FREE_RATE
+        std = excess.std()
+        return float(excess.mean() / std) if std > 0 else None
+
+    def run(self, strategy='VolatilityArbitrageStrategy', **params) -> Dict:
+        """Backtest one parameter set; `strategy` is a class or its name"""
+        name = _strategy_name(strategy)
+        if name not in self.strategies:
+            raise ValueError(f"No vectorized implementation of {name}")
+        unknown = set(params) - set(DEFAULT_PARAMS[name])
+        if unknown:
+            raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}")
+        p = {**DEFAULT_PARAMS[name], **params}
+
+        trades = self._simulate(*self.strategies[name](p)) if self.n else []
+        equity = self._equity(trades) if self.n else np.array([self.initial_cash])
+
+        closed = [t for t in trades if t['exit_bar'] is not None]
+        won = sum(1 for t in closed if t['pnlcomm'] > 0)
+        final_value = float(equity[-1])
+
+        return {
+            'strategy': name,
+            'params': p,
+            'final_value': final_value,
+            'total_return': math.log(final_value / self.initial_cash),
+            'max_drawdown': max_drawdown(equity),
+            'sharpe_ratio': self._yearly_sharpe(equity),
+            'sharpe_annualized': annualized_sharpe(equity, self.index),
+            'total_trades': len(trades),
+            'closed_trades': len(closed),
+            'won': won,
+            'lost': len(closed) - won,
+            'win_rate': won / len(trades) if trades else None,
+            'trades': trades,
+            'equity': equity,
+        }
@@ -10,6 +10,7 @@ class Config:
     # Neo Blockchain
     NEO_RPC_URL = os.getenv("NEO_RPC_URL", "https://testnet1.neo.coz.io:443")
     NEO_NETWORK = os.getenv("NEO_NETWORK", "testnet")
+    ORACLE_CONTRACT_HASH = os.getenv("ORACLE_CONTRACT_HASH", "")  # Invoke the contract when set (dry run: no signer)
     
     # Wallet Configuration
     WALLET_PATH = os.getenv("WALLET_PATH", "./wallet.json")
@@ -20,12 +21,28 @@ class Config:
     VOL_CALCULATION_INTERVAL = int(os.getenv("VOL_CALCULATION_INTERVAL", "60"))
     IV_CALCULATION_INTERVAL = int(os.getenv("IV_CALCULATION_INTERVAL", "120"))
     
+    ORACLE_CHECK_INTERVAL = int(os.getenv("ORACLE_CHECK_INTERVAL", "30"))
+    ORACLE_DEVIATION = float(os.getenv("ORACLE_DEVIATION", "0.005"))  # 0.5% move
+    ORACLE_HEARTBEAT = int(os.getenv("ORACLE_HEARTBEAT", "3600"))
+    
     # Market Data
     TOKEN_PAIRS = ["NEO/USDT", "GAS/USDT"]
     DEX_ENDPOINTS = [
         "https://api.flamingo.finance",  # Example
-        # Add more DEX endpoints
+        # Add more DEX endpoints (URL or dict of DexEndpoint arguments)
     ]
+    DEX_LIVE = os.getenv("DEX_LIVE", "false").lower() == "true"  # Poll DEX_ENDPOINTS instead of mock quotes
+    DEX_TIMEOUT = float(os.getenv("DEX_TIMEOUT", "5"))
+    DEX_HEDGE_AFTER = float(os.getenv("DEX_HEDGE_AFTER", "1"))  # Duplicate a request still pending after this
+    DEX_RATE_LIMIT = float(os.getenv("DEX_RATE_LIMIT", "10"))  # Requests per second per endpoint
+    
+    # Candles aggregated from each poll; VOL_TIMEFRAME picks the ones volatility is computed on
+    CANDLE_TIMEFRAMES = [tf for tf in os.getenv("CANDLE_TIMEFRAMES", "1m,5m,1h").split(",") if tf]
+    VOL_TIMEFRAME = os.getenv("VOL_TIMEFRAME", "") or None  # e.g. "5m"; unset uses raw poll candles
+    
+    # Replay recorded candles instead of polling DEXs (market_data DB or archive file)
+    REPLAY_SOURCE = os.getenv("REPLAY_SOURCE", "")
+    REPLAY_SPEED = os.getenv("REPLAY_SPEED", "1")  # 1, 10, ... or "max"
     
     # Risk Parameters
     RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.05"))
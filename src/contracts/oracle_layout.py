@@ -0,0 +1,62 @@
+"""
+Fixed-width binary layout shared by the oracle contract and its clients
+
+Record (40 bytes, little-endian signed int64, what NeoVM's to_int reads):
+
+    spot_price | realized_vol | implied_vol | garch_forecast | timestamp
+
+Prices and vols are scaled by 10^8; timestamp is Unix seconds. A batch is
+a concatenation of entries:
+
+    pair length (1 byte) | pair utf-8 | record
+
+volatility_oracle.py duplicates these constants because neo3-boa compiles
+the contract on its own.
+"""
+import struct
+from typing import Dict, Iterable, List, Tuple
+
+SCALE = 10 ** 8
+RECORD = struct.Struct('<qqqqq')
+RECORD_FIELDS = ('spot_price', 'realized_vol', 'implied_vol', 'garch_forecast', 'timestamp')
+MAX_PAIR_LENGTH = 255
+
+def scale(value) -> int:
+    """Float -> scaled integer; None counts as 0"""
+    return int(round((value or 0) * SCALE))
+
+def pack_record(spot_price: float, realized_vol: float, implied_vol: float,
+                garch_forecast: float, timestamp: int) -> bytes:
+    return RECORD.pack(scale(spot_price), scale(realized_vol), scale(implied_vol),
+                       scale(garch_forecast), int(timestamp))
+
+def unpack_record(record: bytes) -> Dict[str, float]:
+    values = RECORD.unpack(record)
+    data = {name: value / SCALE for name, value in zip(RECORD_FIELDS[:-1], values[:-1])}
+    data['timestamp'] = values[-1]
+    return data
+
+def pack_entry(pair: str, record: bytes) -> bytes:
+    pair_bytes = pair.encode('utf-8')
+    if not 0 < len(pair_bytes) <= MAX_PAIR_LENGTH:
+        raise ValueError(f"Pair name must be 1-{MAX_PAIR_LENGTH} bytes: {pair!r}")
+    return bytes([len(pair_bytes)]) + pair_bytes + record
+
+def pack_batch(records: Iterable[Tuple[str, bytes]]) -> bytes:
+    return b''.join(pack_entry(pair, record) for pair, record in records)
+
+def unpack_batch(packed: bytes) -> List[Tuple[str, Dict[str, float]]]:
+    """Inverse of pack_batch, mirroring the contract's parsing loop"""
+    entries = []
+    offset = 0
+    while offset < len(packed):
+        pair_len = packed[offset]
+        offset += 1
+        pair = packed[offset:offset + pair_len].decode('utf-8')
+        offset += pair_len
+        record = packed[offset:offset + RECORD.size]
+        if len(record) != RECORD.size:
+            raise ValueError(f"Truncated record for {pair}")
+        offset += RECORD.size
+        entries.append((pair, unpack_record(record)))
+    return entries
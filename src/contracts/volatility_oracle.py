@@ -3,14 +3,13 @@ Neo N3 Smart Contract - Volatility Oracle
 Compile with: neo3-boa compile volatility_oracle.py
 """
 from typing import Any
-from boa3.builtin import NeoMetadata, metadata, public
-from boa3.builtin.contract import Nep17TransferEvent, abort
-from boa3.builtin.interop.runtime import check_witness, calling_script_hash
-from boa3.builtin.interop.storage import get, put, delete
-from boa3.builtin.type import UInt160
+from boa3.sc.compiletime import NeoMetadata, public
+from boa3.sc.runtime import check_witness, script_container
+from boa3.sc.storage import get, get_uint160, put, put_uint160, delete
+from boa3.sc.types import UInt160
+from boa3.sc.utils import abort, to_bytes
 
 # Contract metadata
-@metadata
 def manifest_metadata() -> NeoMetadata:
     meta = NeoMetadata()
     meta.author = "AgentSpoons Team"
@@ -23,28 +22,50 @@ OWNER_KEY = b'owner'
 ORACLE_PREFIX = b'oracle_'
 PUBLISHER_PREFIX = b'publisher_'
 
+# Fixed-width record, see src/contracts/oracle_layout.py:
+# spot_price | realized_vol | implied_vol | garch_forecast | timestamp,
+# each a little-endian int64 (values scaled by 10^8)
+FIELD_SIZE = 8
+RECORD_SIZE = 40
+
+def _pack_int(value: int) -> bytes:
+    """Non-negative integer as a FIELD_SIZE little-endian slot"""
+    if value < 0:
+        abort()
+    data = to_bytes(value)
+    if len(data) > FIELD_SIZE:
+        abort()
+    while len(data) < FIELD_SIZE:
+        data = data + b'\x00'
+    return data
+
+def _require_publisher():
+    """Transaction must be sent and signed by an authorized publisher"""
+    sender = script_container.sender
+    if len(get(PUBLISHER_PREFIX + sender)) == 0 or not check_witness(sender):
+        abort()
+
 @public
 def _deploy(data: Any, update: bool):
     """
     Initializes the contract on deployment
     """
     if not update:
-        # Set contract owner
-        tx = calling_script_hash
-        put(OWNER_KEY, tx)
+        # Deployer becomes the contract owner
+        put_uint160(OWNER_KEY, script_container.sender)
 
-@public
+@public(safe=True)
 def get_owner() -> UInt160:
     """Get contract owner"""
-    return UInt160(get(OWNER_KEY))
+    return get_uint160(OWNER_KEY)
 
 @public
-def update_volatility(pair: str, spot_price: int, realized_vol: int, 
-                      implied_vol: int, garch_forecast: int, 
+def update_volatility(pair: str, spot_price: int, realized_vol: int,
+                      implied_vol: int, garch_forecast: int,
                       timestamp: int) -> bool:
     """
     Update volatility data for a trading pair
-    
+
     Args:
         pair: Trading pair (e.g., "NEO/USDT")
         spot_price: Current spot price (scaled by 10^8)
@@ -52,70 +73,76 @@ def update_volatility(pair: str, spot_price: int, realized_vol: int,
         implied_vol: Implied volatility (scaled by 10^8)
         garch_forecast: GARCH forecast (scaled by 10^8)
         timestamp: Unix timestamp
-    
+
     Returns:
         True if successful
     """
-    # Verify caller is authorized publisher
-    caller = calling_script_hash
-    publisher_key = PUBLISHER_PREFIX + caller
-    
-    if get(publisher_key) is None:
-        abort()
-    
-    # Store volatility data
-    oracle_key = ORACLE_PREFIX + pair.encode()
-    
-    data = {
-        'pair': pair,
-        'spot_price': spot_price,
-        'realized_vol': realized_vol,
-        'implied_vol': implied_vol,
-        'garch_forecast': garch_forecast,
-        'timestamp': timestamp,
-        'publisher': caller
-    }
-    
-    # Serialize and store (simplified - use proper serialization in production)
-    put(oracle_key, str(data).encode())
-    
+    _require_publisher()
+
+    record = (_pack_int(spot_price) + _pack_int(realized_vol) + _pack_int(implied_vol)
+              + _pack_int(garch_forecast) + _pack_int(timestamp))
+    put(ORACLE_PREFIX + to_bytes(pair), record)
+
     return True
 
 @public
-def get_volatility(pair: str) -> str:
+def update_volatility_batch(packed: bytes) -> int:
+    """
+    Update many pairs in one invocation
+
+    Args:
+        packed: Concatenated entries of pair length (1 byte), pair bytes
+                and a RECORD_SIZE record, as built by oracle_layout.pack_batch
+
+    Returns:
+        Number of pairs stored
+    """
+    _require_publisher()
+
+    size = len(packed)
+    offset = 0
+    count = 0
+
+    while offset < size:
+        pair_len: int = packed[offset]
+        start = offset + 1
+        end = start + pair_len + RECORD_SIZE
+        if pair_len == 0 or end > size:
+            abort()
+
+        put(ORACLE_PREFIX + packed[start:start + pair_len], packed[start + pair_len:end])
+        offset = end
+        count += 1
+
+    return count
+
+@public(safe=True)
+def get_volatility(pair: str) -> bytes:
     """
     Get latest volatility data for a pair
-    
+
     Args:
         pair: Trading pair
-    
+
     Returns:
-        Volatility data as string
+        RECORD_SIZE-byte record, empty if the pair was never published
     """
-    oracle_key = ORACLE_PREFIX + pair.encode()
-    data = get(oracle_key)
-    
-    if data is None:
-        return ""
-    
-    return data.decode()
+    return get(ORACLE_PREFIX + to_bytes(pair))
 
 @public
 def add_publisher(publisher: UInt160) -> bool:
     """
     Add authorized oracle publisher (owner only)
-    
+
     Args:
         publisher: Address to authorize
     """
-    owner = UInt160(get(OWNER_KEY))
-    
-    if not check_witness(owner):
+    if not check_witness(get_uint160(OWNER_KEY)):
         abort()
-    
+
     publisher_key = PUBLISHER_PREFIX + publisher
     put(publisher_key, b'1')
-    
+
     return True
 
 @public
@@ -123,18 +150,16 @@ def remove_publisher(publisher: UInt160) -> bool:
     """
     Remove oracle publisher (owner only)
     """
-    owner = UInt160(get(OWNER_KEY))
-    
-    if not check_witness(owner):
+    if not check_witness(get_uint160(OWNER_KEY)):
         abort()
-    
-    publisher_key = PUBLISHER_PREFIX + address
+
+    publisher_key = PUBLISHER_PREFIX + publisher
     delete(publisher_key)
-    
+
     return True
 
-@public
+@public(safe=True)
 def is_publisher(address: UInt160) -> bool:
     """Check if address is authorized publisher"""
     publisher_key = PUBLISHER_PREFIX + address
-    return get(publisher_key) is not None
+    return len(get(publisher_key)) > 0
@@ -8,7 +8,8 @@ import json
 import os
 
 class AdvancedDataGenerator:
-    def __init__(self):
+    def __init__(self, on_result=None):
+        self.on_result = on_result  # async callback fed every result record
         self.current_price = {"NEO/USDT": 15.0, "GAS/USDT": 3.5}
         self.history = {"NEO/USDT": [], "GAS/USDT": []}
         self.vol_state = 0.5  # Current volatility level
@@ -103,6 +104,9 @@ class AdvancedDataGenerator:
                 
                 results.append(result)
                 
+                if self.on_result:
+                    await self.on_result(result)
+                
                 status = 'RED' if abs(result['spread']) > 0.1 else 'GREEN'
                 print(f"{status} {pair}: ${candle['close']:.2f} | "
                       f"RV={vol:.1%} | IV={implied_vol:.1%} | "
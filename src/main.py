@@ -12,6 +12,13 @@ from src.agents.volatility_calculator_agent import VolatilityCalculatorAgent
 from src.agents.implied_vol_agent import ImpliedVolAgent
 from src.agents.arbitrage_detector_agent import ArbitrageDetectorAgent
 from src.agents.oracle_publisher_agent import OraclePublisherAgent
+from src.agents.publication_policy import PublicationPolicy
+from src.api.websocket_server import AgentSpoonsWebSocketServer
+from src.utils.market_replay import MarketReplay, ReplayRunner
+from src.neo.dex_client import DexClient
+from src.neo.rpc_client import AsyncNeoRpcClient
+from src.neo.blockchain_client import OracleBatcher
+from src.utils.candle_aggregator import CandleAggregator
 
 # Configure logging
 logger.remove()
@@ -42,13 +49,29 @@ async def main():
     db = AgentSpoonsDB(config.DB_PATH)
     logger.success("✓ Database initialized")
     
+    # Recorded market data replaces the DEX feed when configured
+    replay = None
+    if config.REPLAY_SOURCE:
+        replay = MarketReplay.open(config.REPLAY_SOURCE, pairs=config.TOKEN_PAIRS,
+                                   speed=config.REPLAY_SPEED)
+        logger.info(f"Replaying {len(replay)} steps from {config.REPLAY_SOURCE} at {config.REPLAY_SPEED}x")
+    
+    dex_client = None
+    if config.DEX_LIVE and replay is None:
+        dex_client = DexClient(config.DEX_ENDPOINTS, timeout=config.DEX_TIMEOUT,
+                               hedge_after=config.DEX_HEDGE_AFTER, rate_limit=config.DEX_RATE_LIMIT)
+        logger.info(f"Polling {len(config.DEX_ENDPOINTS)} DEX endpoints")
+    
     # Initialize Agent 1: Market Data Collector
     market_data_agent = MarketDataAgent(
         agent_id="MarketDataCollector",
         wallet_address=config.WALLET_PATH,
         token_pairs=config.TOKEN_PAIRS,
         dex_endpoints=config.DEX_ENDPOINTS,
-        db=db
+        db=db,
+        replay=replay,
+        dex_client=dex_client,
+        aggregator=CandleAggregator(config.CANDLE_TIMEFRAMES)
     )
     
     # Initialize Agent 2: Volatility Calculator
@@ -56,7 +79,8 @@ async def main():
         agent_id="VolatilityCalculator",
         wallet_address=config.WALLET_PATH,
         market_data_agent=market_data_agent,
-        db=db
+        db=db,
+        timeframe=config.VOL_TIMEFRAME
     )
     
     # Initialize Agent 3: Implied Vol Engine
@@ -76,16 +100,45 @@ async def main():
         threshold=0.10  # 10% threshold
     )
     
+    # Oracle rounds go out over the pooled async RPC client once a contract is configured
+    rpc_client = None
+    if config.ORACLE_CONTRACT_HASH and replay is None:
+        rpc_client = AsyncNeoRpcClient(config.NEO_RPC_URL, contract_hash=config.ORACLE_CONTRACT_HASH)
+        # No transaction signer is wired up yet: invocations are test-run only
+        logger.warning("Oracle publishing is a dry run (no signer): rounds are invoked but not "
+                       "broadcast, and the recorded tx hashes are placeholders")
+    
     # Initialize Agent 5: Oracle Publisher
     oracle_agent = OraclePublisherAgent(
         agent_id="OraclePublisher",
         wallet_address=config.WALLET_PATH,
         vol_calculator=vol_calculator_agent,
         implied_vol_agent=implied_vol_agent,
-        contract_hash=""  # Add your Neo contract hash
+        contract_hash=config.ORACLE_CONTRACT_HASH,
+        policy=PublicationPolicy(deviation=config.ORACLE_DEVIATION,
+                                 heartbeat=config.ORACLE_HEARTBEAT),
+        batcher=OracleBatcher(rpc_client) if rpc_client is not None else None
     )
+    oracle_agent.execution_interval = config.ORACLE_CHECK_INTERVAL
+    
+    # WebSocket fan-out is fed directly by the volatility agent
+    ws_server = AgentSpoonsWebSocketServer()
+    vol_calculator_agent.add_listener(ws_server.publish)
     
     logger.success("✓ All 5 agents initialized")
+    
+    if replay is not None:
+        # Agents run on replay time, so results don't depend on the replay speed.
+        # The oracle publisher stays out: its heartbeats use the wall clock and
+        # replayed feeds must not reach the production feed log or the chain.
+        runner = ReplayRunner(replay, market_data_agent,
+                              [vol_calculator_agent, implied_vol_agent, arbitrage_agent])
+        report = await runner.run()
+        for agent_id, timing in report['agents'].items():
+            logger.info(f"{agent_id}: {timing['executions']} runs, {timing['seconds']:.2f}s")
+        db.close()
+        return
+    
     logger.info("🚀 Starting agent loops...")
     logger.info("Press Ctrl+C to stop")
     logger.info("=" * 70)
@@ -96,7 +149,8 @@ async def main():
         vol_calculator_agent.run(),
         implied_vol_agent.run(),
         arbitrage_agent.run(),
-        oracle_agent.run()
+        oracle_agent.run(),
+        ws_server.start()
     ]
     
     try:
@@ -111,6 +165,10 @@ async def main():
         arbitrage_agent.stop()
         oracle_agent.stop()
         
+        if dex_client is not None:
+            await dex_client.close()
+        if rpc_client is not None:
+            await rpc_client.close()
         db.close()
         
         logger.success("✓ All agents stopped gracefully")
@@ -12,6 +12,8 @@ from sklearn.linear_model import Ridge
 import joblib
 from loguru import logger
 
+from src.ml.features import ENSEMBLE_EXCLUDED, ensemble_frame, ensemble_pipeline, tail_records
+
 # ========== LSTM MODEL ==========
 def create_lstm_model():
     """Create LSTM model for volatility forecasting"""
@@ -205,43 +207,15 @@ class EnsembleVolatility:
         self.meta_model = Ridge(alpha=1.0)
         self.is_trained = False
         self.feature_cols = []
+        self.pipeline = None
     
     def prepare_features(self, data):
         """Feature engineering"""
         df = pd.DataFrame(data)
+        pipeline = ensemble_pipeline(df)
+        features, target = ensemble_frame(df, pipeline)
         
-        # Price features
-        df['returns'] = df['price'].pct_change()
-        df['log_returns'] = np.log(df['price'] / df['price'].shift(1))
-        
-        # Lagged volatility
-        for lag in [1, 2, 3, 5, 10]:
-            df[f'rv_lag{lag}'] = df['realized_vol'].shift(lag)
-        
-        # Rolling statistics
-        for window in [5, 10, 20]:
-            df[f'rv_ma{window}'] = df['realized_vol'].rolling(window).mean()
-            df[f'rv_std{window}'] = df['realized_vol'].rolling(window).std()
-            df[f'price_ma{window}'] = df['price'].rolling(window).mean()
-        
-        # Volatility of volatility
-        df['vol_of_vol'] = df['realized_vol'].rolling(10).std()
-        
-        # Momentum
-        for period in [5, 10, 20]:
-            df[f'momentum{period}'] = df['price'] / df['price'].shift(period) - 1
-        
-        # Realized variance
-        df['realized_variance'] = df['realized_vol'] ** 2
-        
-        df = df.dropna()
-        
-        feature_cols = [col for col in df.columns if col not in ['timestamp', 'pair', 'price', 'realized_vol']]
-        
-        X = df[feature_cols].values
-        y = df['realized_vol'].values
-        
-        return X, y, feature_cols
+        return features.values, target.values, pipeline.names
     
     def train(self, data, test_size=0.2):
         """Train ensemble model"""
@@ -249,6 +223,7 @@ class EnsembleVolatility:
         
         X, y, feature_cols = self.prepare_features(data)
         self.feature_cols = feature_cols
+        self.pipeline = ensemble_pipeline(pd.DataFrame(data))
         
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=test_size, shuffle=False
@@ -294,13 +269,39 @@ class EnsembleVolatility:
         if not self.is_trained:
             raise ValueError("Model not trained")
         
-        X, _, _ = self.prepare_features(data)
+        # The last rows are enough unless gaps push the last complete row further back
+        X = None
+        if self.pipeline is not None:
+            pipeline, records = self.pipeline.fresh(), tail_records(data, self.pipeline.warmup)
+            for record in records:
+                row = pipeline.update('predict', record)
+            if records and self._complete(records[-1], row):
+                X = row[None, :]
+        if X is None:
+            X, _, _ = self.prepare_features(data)
+        
+        return self._predict_row(X[-1:])
+    
+    def update(self, observation, pair='default'):
+        """Feed one observation; returns a prediction once its feature row is complete"""
+        if not self.is_trained or self.pipeline is None:
+            raise ValueError("Model not trained")
         
+        row = self.pipeline.update(pair, observation)
+        return self._predict_row(row[None, :]) if self._complete(observation, row) else None
+    
+    @staticmethod
+    def _complete(observation, row):
+        """Whether the batch path would keep this row"""
+        return not np.isnan(row).any() and all(
+            pd.notna(observation[c]) for c in ENSEMBLE_EXCLUDED if c in observation)
+    
+    def _predict_row(self, X):
         # Get predictions from base models
         base_predictions = np.zeros((1, len(self.models)))
         
         for i, model in enumerate(self.models.values()):
-            base_predictions[0, i] = model.predict(X[-1:])
+            base_predictions[0, i] = model.predict(X)[0]
         
         # Meta prediction
         final_pred = self.meta_model.predict(base_predictions)
@@ -0,0 +1,224 @@
+"""
+Incremental feature pipeline for the volatility predictors
+
+A FeaturePipeline is an ordered list of feature definitions
+(name, kind, column, n). batch() computes them over a whole history
+with pandas for training; update() keeps only the last few values of
+each input per pair and produces the same row for one new observation,
+so online inference costs the same at any history length. A feature
+can read an earlier feature by name (e.g. a rolling std of returns).
+
+Kinds: value, constant (n is the constant), pct_change (over n rows),
+log_return, lag (n rows), mean and std (n-row window, sample std),
+square, hour, day_of_week.
+"""
+import math
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+Feature = Tuple[str, str, Optional[str], float]
+
+def _float(value) -> np.float64:
+    try:
+        return np.float64(value if value is not None else np.nan)
+    except (TypeError, ValueError):
+        return np.float64(np.nan)
+
+class FeaturePipeline:
+    """Batch and streaming computation of one feature set"""
+
+    def __init__(self, features: Sequence[Feature]):
+        self.features = [tuple(f) for f in features]
+        self.names = [f[0] for f in self.features]
+
+        # A column names an earlier feature if there is one, else an input field
+        self.sources: List[Optional[Tuple[str, str]]] = []
+        need: Dict[Tuple[str, str], int] = {}
+        lead: Dict[Tuple[str, str], int] = {}  # Leading rows without a value
+        self.lead = []
+        for i, (name, kind, column, n) in enumerate(self.features):
+            source = None
+            if column is not None and kind not in ('hour', 'day_of_week'):
+                source = ('feature', column) if column in self.names[:i] else ('input', column)
+                depth = {'pct_change': int(n) + 1, 'lag': int(n) + 1, 'log_return': 2,
+                         'mean': int(n), 'std': int(n)}.get(kind, 1)
+                need[source] = max(need.get(source, 1), depth)
+            self.sources.append(source)
+            own = lead.get(source, 0) + {'pct_change': int(n), 'lag': int(n), 'log_return': 1,
+                                         'mean': int(n) - 1, 'std': int(n) - 1}.get(kind, 0)
+            lead[('feature', name)] = own
+            self.lead.append(own)
+        self.need = need
+        self.warmup = max(self.lead, default=0) + 1  # Rows before the first complete row
+        self.state: Dict[str, Dict[Tuple[str, str], deque]] = {}
+
+    def fresh(self) -> 'FeaturePipeline':
+        """Same definitions, no state"""
+        return FeaturePipeline(self.features)
+
+    def reset(self, pair: Optional[str] = None):
+        if pair is None:
+            self.state.clear()
+        else:
+            self.state.pop(pair, None)
+
+    def batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Every feature over the whole frame (NaN where a window isn't full)"""
+        computed: Dict[str, pd.Series] = {}
+        for (name, kind, column, n), source in zip(self.features, self.sources):
+            if source is not None:
+                if source[0] == 'feature':
+                    s = computed[column]
+                elif column in df:
+                    s = pd.to_numeric(df[column], errors='coerce').astype(float)
+                else:
+                    s = pd.Series(np.nan, index=df.index)
+            if kind == 'value':
+                out = s
+            elif kind == 'constant':
+                out = pd.Series(float(n), index=df.index)
+            elif kind == 'pct_change':
+                out = s / s.shift(int(n)) - 1
+            elif kind == 'log_return':
+                out = np.log(s / s.shift(1))
+            elif kind == 'lag':
+                out = s.shift(int(n))
+            elif kind == 'mean':
+                out = s.rolling(int(n)).mean()
+            elif kind == 'std':
+                out = s.rolling(int(n)).std()
+            elif kind == 'square':
+                out = s ** 2
+            elif kind in ('hour', 'day_of_week'):
+                stamps = pd.to_datetime(df[column])
+                out = (stamps.dt.hour if kind == 'hour' else stamps.dt.dayofweek).astype(float)
+            else:
+                raise ValueError(f"Unknown feature kind: {kind}")
+            computed[name] = out
+        return pd.DataFrame(computed, index=df.index)[self.names]
+
+    def update(self, pair: str, observation: Dict) -> np.ndarray:
+        """Feature row for a pair's next observation (NaN where a window isn't full yet)"""
+        history = self.state.get(pair)
+        if history is None:
+            history = self.state[pair] = {source: deque(maxlen=depth) for source, depth in self.need.items()}
+        for source, values in history.items():
+            if source[0] == 'input':
+                values.append(_float(observation.get(source[1])))
+
+        row = np.empty(len(self.features))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i, ((name, kind, column, n), source) in enumerate(zip(self.features, self.sources)):
+                d = history[source] if source is not None else None
+                if kind == 'value':
+                    v = d[-1]
+                elif kind == 'constant':
+                    v = float(n)
+                elif kind == 'pct_change':
+                    v = d[-1] / d[-1 - int(n)] - 1 if len(d) > n else np.nan
+                elif kind == 'log_return':
+                    v = np.log(d[-1] / d[-2]) if len(d) > 1 else np.nan
+                elif kind == 'lag':
+                    v = d[-1 - int(n)] if len(d) > n else np.nan
+                elif kind in ('mean', 'std'):
+                    w = int(n)
+                    if len(d) < w:
+                        v = np.nan
+                    else:
+                        window = list(islice(d, len(d) - w, len(d)))
+                        mean = math.fsum(window) / w if all(map(math.isfinite, window)) else np.nan
+                        if kind == 'mean':
+                            v = mean
+                        else:
+                            v = math.sqrt(math.fsum((x - mean) ** 2 for x in window) / (w - 1)) \
+                                if w > 1 and not math.isnan(mean) else np.nan
+                elif kind == 'square':
+                    v = d[-1] ** 2
+                elif kind in ('hour', 'day_of_week'):
+                    ts = observation.get(column)
+                    if ts is None:
+                        v = np.nan
+                    else:
+                        ts = pd.Timestamp(ts)
+                        v = float(ts.hour if kind == 'hour' else ts.dayofweek)
+                else:
+                    raise ValueError(f"Unknown feature kind: {kind}")
+                row[i] = v
+                if ('feature', name) in history:
+                    history[('feature', name)].append(np.float64(v))
+        return row
+
+# ========== MLVolatilityPredictor ==========
+
+PREDICTOR_FEATURES = ['returns', 'log_returns', 'rv_lag1', 'rv_lag2', 'price_ma_5', 'price_std_5',
+                      'volume_ma_5', 'momentum_5']
+
+def predictor_pipeline(df: pd.DataFrame, derive_rv: Optional[bool] = None) -> FeaturePipeline:
+    """MLVolatilityPredictor's features; realized vol comes from returns when the data lacks it"""
+    if derive_rv is None:
+        derive_rv = 'realized_vol' not in df or df['realized_vol'].isna().sum() > len(df) * 0.5
+    rv = 'derived_rv' if derive_rv else 'realized_vol'
+    features = [('returns', 'pct_change', 'price', 1), ('log_returns', 'log_return', 'price', 1)]
+    if derive_rv:
+        features.append(('derived_rv', 'std', 'returns', 5))
+    features += [
+        ('rv_lag1', 'lag', rv, 1), ('rv_lag2', 'lag', rv, 2),
+        ('price_ma_5', 'mean', 'price', 5), ('price_std_5', 'std', 'price', 5),
+        ('volume_ma_5', 'mean', 'volume', 5) if 'volume' in df else ('volume_ma_5', 'constant', None, 0),
+        ('momentum_5', 'pct_change', 'price', 5),
+    ]
+    if 'timestamp' in df:
+        features += [('hour', 'hour', 'timestamp', 0), ('day_of_week', 'day_of_week', 'timestamp', 0)]
+    if not derive_rv:
+        features.append(('target_rv', 'value', 'realized_vol', 0))
+    return FeaturePipeline(features)
+
+def predictor_columns(pipeline: FeaturePipeline) -> List[str]:
+    """Model inputs in training order"""
+    extra = ['hour', 'day_of_week'] if 'hour' in pipeline.names else []
+    return PREDICTOR_FEATURES + extra
+
+def predictor_frame(df: pd.DataFrame, pipeline: FeaturePipeline) -> pd.DataFrame:
+    """Feature columns plus the realized_vol target, gaps forward- then back-filled"""
+    features = pipeline.batch(df)
+    features['realized_vol'] = features['derived_rv' if 'derived_rv' in features else 'target_rv']
+    columns = predictor_columns(pipeline)
+    columns = columns[:8] + ['realized_vol'] + columns[8:]
+    return features[columns].ffill().bfill().dropna()
+
+# ========== EnsembleVolatility ==========
+
+ENSEMBLE_EXCLUDED = ('timestamp', 'pair', 'price', 'realized_vol')
+
+def ensemble_pipeline(df: pd.DataFrame) -> FeaturePipeline:
+    """EnsembleVolatility's features: the data's other columns, then engineered ones"""
+    features = [(c, 'value', c, 0) for c in df.columns if c not in ENSEMBLE_EXCLUDED]
+    features += [('returns', 'pct_change', 'price', 1), ('log_returns', 'log_return', 'price', 1)]
+    features += [(f'rv_lag{lag}', 'lag', 'realized_vol', lag) for lag in (1, 2, 3, 5, 10)]
+    for window in (5, 10, 20):
+        features += [(f'rv_ma{window}', 'mean', 'realized_vol', window),
+                     (f'rv_std{window}', 'std', 'realized_vol', window),
+                     (f'price_ma{window}', 'mean', 'price', window)]
+    features.append(('vol_of_vol', 'std', 'realized_vol', 10))
+    features += [(f'momentum{period}', 'pct_change', 'price', period) for period in (5, 10, 20)]
+    features.append(('realized_variance', 'square', 'realized_vol', 0))
+    return FeaturePipeline(features)
+
+def ensemble_frame(df: pd.DataFrame, pipeline: FeaturePipeline) -> Tuple[pd.DataFrame, pd.Series]:
+    """Complete feature rows and their realized_vol targets"""
+    features = pipeline.batch(df)
+    complete = features.notna().all(axis=1)
+    for column in ENSEMBLE_EXCLUDED:
+        if column in df:
+            complete &= df[column].notna()
+    return features[complete], df.loc[complete, 'realized_vol'].astype(float)
+
+def tail_records(data, rows: int) -> List[Dict]:
+    """The last `rows` observations of a list of records or a DataFrame"""
+    if isinstance(data, pd.DataFrame):
+        return data.iloc[-rows:].to_dict('records')
+    return list(data[-rows:])
@@ -10,6 +10,9 @@ from xgboost import XGBRegressor
 import joblib
 from loguru import logger
 
+from src.ml.features import (PREDICTOR_FEATURES, FeaturePipeline, predictor_columns, predictor_frame,
+                             predictor_pipeline, tail_records)
+
 class MLVolatilityPredictor:
     """Machine learning volatility forecaster"""
     
@@ -17,80 +20,27 @@ class MLVolatilityPredictor:
         self.model_type = model_type
         self.model = None
         self.is_trained = False
+        self.pipeline = None
+        self.last_rows = {}
         
     def create_features(self, data):
         """Feature engineering for volatility prediction"""
         df = pd.DataFrame(data)
-        
-        # Price features
-        df['returns'] = df['price'].pct_change()
-        df['log_returns'] = np.log(df['price'] / df['price'].shift(1))
-        
-        # If realized_vol is mostly NaN, calculate from returns
-        if df['realized_vol'].isna().sum() > len(df) * 0.5:
-            df['realized_vol'] = df['returns'].rolling(5).std()
-        
-        # Lagged volatility - use shorter windows to reduce NaNs
-        df['rv_lag1'] = df['realized_vol'].shift(1)
-        df['rv_lag2'] = df['realized_vol'].shift(2)
-        
-        # Rolling statistics
-        df['price_ma_5'] = df['price'].rolling(5).mean()
-        df['price_std_5'] = df['price'].rolling(5).std()
-        df['volume_ma_5'] = df['volume'].rolling(5).mean() if 'volume' in df.columns else 0
-        
-        # Momentum
-        df['momentum_5'] = df['price'] / df['price'].shift(5) - 1
-        
-        # Hour/day features (if timestamp available)
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['hour'] = df['timestamp'].dt.hour
-            df['day_of_week'] = df['timestamp'].dt.dayofweek
-        
-        # Forward fill for volatility to propagate values
-        df['realized_vol'] = df['realized_vol'].ffill()
-        df['rv_lag1'] = df['rv_lag1'].ffill()
-        df['rv_lag2'] = df['rv_lag2'].ffill()
-        
-        # Fill any remaining NaN with forward fill then backward fill
-        df = df.ffill().bfill()
-        
-        # Define feature columns before dropping
-        feature_cols = [
-            'returns', 'log_returns',
-            'rv_lag1', 'rv_lag2',
-            'price_ma_5', 'price_std_5', 'volume_ma_5',
-            'momentum_5', 'realized_vol'
-        ]
-        
-        if 'hour' in df.columns:
-            feature_cols.extend(['hour', 'day_of_week'])
-        
-        # Drop NaN ONLY in feature columns (not entire dataframe)
-        df = df[feature_cols].dropna()
-        
-        return df
+        return predictor_frame(df, predictor_pipeline(df))
     
     def prepare_data(self, data):
         """Prepare data for training"""
-        df = self.create_features(data)
+        # Training fixes the feature set that predict() and update() reproduce
+        df = pd.DataFrame(data)
+        self.pipeline = predictor_pipeline(df)
+        self.last_rows = {}
+        df = predictor_frame(df, self.pipeline)
         
         if len(df) < 10:
             logger.warning(f"Only {len(df)} samples available, need at least 10")
             raise ValueError("Not enough data samples after feature engineering")
         
-        # Features - use only those we engineer
-        feature_cols = [
-            'returns', 'log_returns',
-            'rv_lag1', 'rv_lag2',
-            'price_ma_5', 'price_std_5', 'volume_ma_5',
-            'momentum_5'
-        ]
-        
-        # Add time features if available
-        if 'hour' in df.columns:
-            feature_cols.extend(['hour', 'day_of_week'])
+        feature_cols = predictor_columns(self.pipeline)
         
         X = df[feature_cols].values
         y = df['realized_vol'].values
@@ -155,17 +105,18 @@ class MLVolatilityPredictor:
         if not self.is_trained:
             raise ValueError("Model not trained yet!")
         
-        df = self.create_features(data)
+        # Only the last few rows matter; rebuild from full history when they have gaps
+        if self.pipeline is not None:
+            pipeline, row = self.pipeline.fresh(), None
+            for record in tail_records(data, pipeline.warmup):
+                row = pipeline.update('predict', record)
+            X = self._model_input(row) if row is not None else None
+            if X is not None:
+                return float(self.model.predict(X)[0])
         
-        feature_cols = [
-            'returns', 'log_returns',
-            'rv_lag1', 'rv_lag2',
-            'price_ma_5', 'price_std_5', 'volume_ma_5',
-            'momentum_5'
-        ]
-        
-        if 'hour' in df.columns:
-            feature_cols.extend(['hour', 'day_of_week'])
+        df = self.create_features(data)
+        feature_cols = predictor_columns(self.pipeline) if self.pipeline is not None else \
+            PREDICTOR_FEATURES + (['hour', 'day_of_week'] if 'hour' in df.columns else [])
         
         X = df[feature_cols].iloc[-1:].values
         
@@ -173,16 +124,45 @@ class MLVolatilityPredictor:
         
         return float(prediction)
     
+    def update(self, observation, pair='default'):
+        """Feed one observation; returns the next-volatility prediction once features are complete"""
+        if not self.is_trained or self.pipeline is None:
+            raise ValueError("Model not trained yet!")
+        
+        row = self.pipeline.update(pair, observation)
+        
+        # Forward-fill gaps from the pair's last row, as the batch features do
+        last = self.last_rows.get(pair)
+        if last is not None:
+            row = np.where(np.isnan(row), last, row)
+        self.last_rows[pair] = row
+        
+        X = self._model_input(row)
+        return float(self.model.predict(X)[0]) if X is not None else None
+    
+    def _model_input(self, row):
+        columns = [self.pipeline.names.index(c) for c in predictor_columns(self.pipeline)]
+        X = row[columns][None, :]
+        return None if np.isnan(X).any() else X
+    
     def save_model(self, path='models/ml_vol_predictor.pkl'):
         """Save trained model"""
         import os
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump(self.model, path)
+        # Feature definitions travel with the model so online inference works after load
+        features = self.pipeline.features if self.pipeline is not None else None
+        joblib.dump({'model': self.model, 'features': features}, path)
         logger.info(f"Model saved to {path}")
     
     def load_model(self, path='models/ml_vol_predictor.pkl'):
         """Load trained model"""
-        self.model = joblib.load(path)
+        saved = joblib.load(path)
+        if isinstance(saved, dict) and 'model' in saved:
+            self.model = saved['model']
+            self.pipeline = FeaturePipeline(saved['features']) if saved.get('features') else None
+        else:
+            self.model, self.pipeline = saved, None  # Older files hold only the estimator
+        self.last_rows = {}
         self.is_trained = True
         logger.info(f"Model loaded from {path}")
     
@@ -194,12 +174,7 @@ class MLVolatilityPredictor:
         if hasattr(self.model, 'feature_importances_'):
             importance = self.model.feature_importances_
             
-            features = [
-                'returns', 'log_returns',
-                'rv_lag1', 'rv_lag2',
-                'price_ma_5', 'price_std_5', 'volume_ma_5',
-                'momentum_5'
-            ]
+            features = predictor_columns(self.pipeline) if self.pipeline is not None else PREDICTOR_FEATURES
             
             return dict(zip(features, importance))
         
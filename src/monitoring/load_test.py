@@ -0,0 +1,318 @@
+"""
+WebSocket and REST load generator
+
+Spins up N WebSocket subscribers and M closed-loop REST clients against a
+running stack and reports throughput, latency percentiles and end-to-end
+freshness (record timestamp at agent compute -> client receipt) as JSON.
+
+    # Against a running stack
+    python -m src.monitoring.load_test --subscribers 1000 --rest-clients 50 --duration 30
+
+    # Self-contained: spawns a WebSocket server with a synthetic feed and the REST API
+    python -m src.monitoring.load_test --spawn --subscribers 500 --rest-clients 20 \\
+        --output data/load_report.json
+
+Freshness is only meaningful when clients and publisher share a clock
+(same host, or NTP-synced hosts).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+import websockets
+from loguru import logger
+
+from src.api import binary_protocol
+
+DEFAULT_ENDPOINTS = [
+    '/health',
+    '/api/v1/latest?limit=10',
+    '/api/v1/pairs',
+    '/api/v1/arbitrage',
+]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Percentile summary of samples given in seconds, reported in ms"""
+    if not samples:
+        return {'count': 0}
+    arr = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        'count': int(arr.size),
+        'mean': round(float(arr.mean()), 3),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(arr.max()), 3)
+    }
+
+def synthetic_record(pair: str, state: Dict[str, float]) -> dict:
+    """Next random-walk record for a pair, stamped at compute time"""
+    price = state.get(pair, 15.0) * (1 + random.gauss(0, 0.002))
+    state[pair] = price
+    realized = abs(random.gauss(0.5, 0.05))
+    implied = realized * random.uniform(1.05, 1.15)
+    return {
+        'pair': pair,
+        'timestamp': datetime.now().isoformat(),
+        'price': round(price, 6),
+        'realized_vol': round(realized, 6),
+        'implied_vol': round(implied, 6),
+        'garch_forecast': round(realized * 0.95, 6),
+        'spread': round(implied - realized, 6)
+    }
+
+async def synthetic_feed(publish, pairs: List[str], rate: float, stop: asyncio.Event):
+    """Publish `rate` records per second round-robin across pairs"""
+    state = {}
+    interval = 1.0 / rate
+    i = 0
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        await publish(synthetic_record(pairs[i % len(pairs)], state))
+        i += 1
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif i % 100 == 0:
+            await asyncio.sleep(0)  # Behind schedule: still yield to the server
+
+class LoadStats:
+    """Raw samples collected by all simulated clients"""
+
+    def __init__(self):
+        self.ws_connect = []
+        self.ws_freshness = []
+        self.ws_messages = 0
+        self.ws_bytes = 0
+        self.ws_connected = 0
+        self.ws_connect_failures = 0
+        self.ws_disconnects = 0
+        self.rest_latency = []
+        self.rest_by_endpoint = {}
+        self.rest_errors = 0
+
+async def websocket_subscriber(url: str, protocol: str, stats: LoadStats, stop: asyncio.Event):
+    """One subscriber: connect, subscribe to everything, time every update"""
+    started = time.perf_counter()
+    try:
+        ws = await websockets.connect(url, max_queue=None)
+    except Exception:
+        stats.ws_connect_failures += 1
+        return
+    stats.ws_connect.append(time.perf_counter() - started)
+    stats.ws_connected += 1
+
+    try:
+        if protocol == 'binary':
+            await ws.send(json.dumps({'action': 'protocol', 'format': 'binary'}))
+        await ws.send(json.dumps({'action': 'subscribe'}))
+
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            received = time.time()
+            stats.ws_bytes += len(message)
+
+            if isinstance(message, bytes):
+                frame = binary_protocol.decode_frame(message)
+                computed_at = frame['timestamp']
+            else:
+                data = json.loads(message)
+                if data.get('type') != 'volatility_update':
+                    continue
+                computed_at = binary_protocol.to_epoch(data.get('timestamp'))
+
+            stats.ws_messages += 1
+            stats.ws_freshness.append(received - computed_at)
+    except websockets.exceptions.ConnectionClosed:
+        stats.ws_disconnects += 1
+    finally:
+        await ws.close()
+
+async def rest_client(base_url: str, endpoints: List[str], stats: LoadStats,
+                      stop: asyncio.Event, session: aiohttp.ClientSession):
+    """One closed-loop REST client cycling through the endpoints"""
+    i = random.randrange(len(endpoints))
+    while not stop.is_set():
+        endpoint = endpoints[i % len(endpoints)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            async with session.get(base_url + endpoint) as resp:
+                await resp.read()
+                ok = 200 <= resp.status < 300  # A 404 means a misrouted test, not a fast success
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+
+        if ok:
+            stats.rest_latency.append(elapsed)
+            stats.rest_by_endpoint.setdefault(endpoint, []).append(elapsed)
+        else:
+            stats.rest_errors += 1
+            await asyncio.sleep(0.05)  # Don't spin on a dead server
+
+async def run_load_test(ws_url: Optional[str], rest_url: Optional[str], subscribers: int = 100,
+                        rest_clients: int = 10, duration: float = 10.0, protocol: str = 'json',
+                        endpoints: Optional[List[str]] = None, ramp: float = 1.0) -> dict:
+    """Drive the load and return the machine-readable report"""
+    endpoints = endpoints or DEFAULT_ENDPOINTS
+    stats = LoadStats()
+    stop = asyncio.Event()
+    tasks = []
+
+    if ws_url and subscribers:
+        for n in range(subscribers):
+            tasks.append(asyncio.create_task(websocket_subscriber(ws_url, protocol, stats, stop)))
+            if ramp and n % 50 == 49:
+                await asyncio.sleep(ramp * 50 / subscribers)  # Spread the connect storm
+
+    session = None
+    if rest_url and rest_clients:
+        connector = aiohttp.TCPConnector(limit=rest_clients)
+        session = aiohttp.ClientSession(connector=connector)
+        for _ in range(rest_clients):
+            tasks.append(asyncio.create_task(rest_client(rest_url, endpoints, stats, stop, session)))
+
+    # Measure only once every client is started
+    stats.ws_freshness.clear()
+    stats.ws_messages = stats.ws_bytes = 0
+    stats.rest_latency.clear()
+    stats.rest_by_endpoint.clear()
+    started = time.perf_counter()
+    await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if session is not None:
+        await session.close()
+
+    rest_requests = len(stats.rest_latency)
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'config': {
+            'ws_url': ws_url,
+            'rest_url': rest_url,
+            'subscribers': subscribers,
+            'rest_clients': rest_clients,
+            'duration_s': duration,
+            'protocol': protocol,
+            'endpoints': endpoints
+        },
+        'elapsed_s': round(elapsed, 3),
+        'websocket': {
+            'connected': stats.ws_connected,
+            'connect_failures': stats.ws_connect_failures,
+            'disconnects': stats.ws_disconnects,
+            'messages': stats.ws_messages,
+            'messages_per_s': round(stats.ws_messages / elapsed, 2),
+            'bytes_per_s': round(stats.ws_bytes / elapsed, 2),
+            'connect_ms': summarize(stats.ws_connect),
+            'freshness_ms': summarize(stats.ws_freshness)
+        },
+        'rest': {
+            'requests': rest_requests,
+            'errors': stats.rest_errors,
+            'requests_per_s': round(rest_requests / elapsed, 2),
+            'latency_ms': summarize(stats.rest_latency),
+            'by_endpoint': {ep: summarize(s) for ep, s in stats.rest_by_endpoint.items()}
+        }
+    }
+
+async def serve_synthetic(port: int, pairs: List[str], rate: float):
+    """WebSocket server fed by the synthetic publisher (for --spawn)"""
+    from src.api.websocket_server import AgentSpoonsWebSocketServer
+
+    server = AgentSpoonsWebSocketServer(host='127.0.0.1', port=port)
+    stop = asyncio.Event()
+    await asyncio.gather(server.start(), synthetic_feed(server.publish, pairs, rate, stop))
+
+def spawn_stack(ws_port: int, rest_port: int, pairs: List[str], rate: float):
+    """Start the WebSocket server and REST API as subprocesses"""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+    # REST API serves a seeded snapshot from a scratch dir, leaving data/ alone
+    workdir = tempfile.mkdtemp(prefix='agentspoons_load_')
+    os.makedirs(os.path.join(workdir, 'data'))
+    state = {}
+    with open(os.path.join(workdir, 'data', 'results.json'), 'w') as f:
+        json.dump([synthetic_record(pairs[i % len(pairs)], state) for i in range(200)], f)
+
+    ws_proc = subprocess.Popen(
+        [sys.executable, '-m', 'src.monitoring.load_test', 'serve', '--port', str(ws_port),
+         '--rate', str(rate), '--pairs', ','.join(pairs)],
+        cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    rest_proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.api.rest_api:app', '--host', '127.0.0.1',
+         '--port', str(rest_port), '--log-level', 'warning'],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return [ws_proc, rest_proc]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AgentSpoons WebSocket/REST load generator")
+    sub = parser.add_subparsers(dest='command')
+
+    serve = sub.add_parser('serve', help="Run a WebSocket server with a synthetic feed")
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--rate', type=float, default=20.0, help="Records published per second")
+    serve.add_argument('--pairs', default='NEO/USDT,GAS/USDT')
+
+    parser.add_argument('--ws-url', default='ws://127.0.0.1:8765')
+    parser.add_argument('--rest-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--subscribers', type=int, default=100)
+    parser.add_argument('--rest-clients', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds")
+    parser.add_argument('--protocol', choices=['json', 'binary'], default='json')
+    parser.add_argument('--endpoints', help="Comma-separated REST paths")
+    parser.add_argument('--spawn', action='store_true', help="Start a local stack to test against")
+    parser.add_argument('--rate', type=float, default=20.0, help="Synthetic publish rate with --spawn")
+    parser.add_argument('--pairs', default='NEO/USDT,GAS/USDT')
+    parser.add_argument('--output', help="Write the JSON report here as well as stdout")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    pairs = args.pairs.split(',')
+
+    if args.command == 'serve':
+        asyncio.run(serve_synthetic(args.port, pairs, args.rate))
+        return
+
+    processes = []
+    if args.spawn:
+        processes = spawn_stack(8765, 8000, pairs, args.rate)
+        args.ws_url, args.rest_url = 'ws://127.0.0.1:8765', 'http://127.0.0.1:8000'
+        time.sleep(3)  # Let both servers bind
+
+    try:
+        report = asyncio.run(run_load_test(
+            args.ws_url, args.rest_url, args.subscribers, args.rest_clients, args.duration,
+            args.protocol, args.endpoints.split(',') if args.endpoints else None))
+    finally:
+        for proc in processes:
+            proc.terminate()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        logger.info(f"Report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Synthetic multi-asset market simulator for load tests
+
+Generates thousands of pairs per tick with NumPy: one-factor correlated
+shocks, per-pair GARCH(1,1) variance, Poisson jumps and a global
+calm/stressed Markov regime that scales volatility and correlation.
+Implied vol carries a per-pair risk premium over the GARCH forecast and
+option chains are priced from it with a skew and smile.
+
+Ticks come out in batches of steps; sinks receive lists of records and
+can be a JSONL file, a RedisStreamer (publish_batch) or any callback
+such as an agent's emit. candles() produces a frame MarketReplay can
+feed through the agent pipeline.
+
+    python -m src.monitoring.market_simulator --pairs 2000 --steps 500 \\
+        --output data/simulated.jsonl
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from scipy.special import ndtr
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+FIELDS = ('price', 'open', 'high', 'low', 'volume', 'realized_vol', 'garch_forecast', 'implied_vol')
+
+class MarketSimulator:
+    """Vectorized correlated GBM/GARCH paths with jumps and regime switches"""
+
+    def __init__(self, n_pairs: int = 1000, seed: Optional[int] = None, interval: float = 60.0,
+                 start: Optional[datetime] = None, vol_range=(0.3, 1.2),
+                 garch_alpha: float = 0.08, garch_beta: float = 0.90,
+                 market_loading=(0.3, 0.7), jump_intensity: float = 10.0, jump_scale: float = 0.04,
+                 regime_vol=(1.0, 2.5), regime_stay=(0.999, 0.99), pairs: Optional[Sequence[str]] = None):
+        self.rng = np.random.default_rng(seed)
+        self.pairs = list(pairs) if pairs else [f"SIM{i:04d}/USDT" for i in range(n_pairs)]
+        n = self.n = len(self.pairs)
+        self.interval = interval
+        self.dt = interval / SECONDS_PER_YEAR
+        self.clock = start or datetime(2025, 1, 1)
+
+        # Per-pair parameters
+        self.long_run_vol = self.rng.uniform(*vol_range, n)
+        self.loading = self.rng.uniform(*market_loading, n)  # Calm-regime market beta
+        self.vol_premium = self.rng.uniform(0.05, 0.15, n)
+        self.alpha, self.beta = garch_alpha, garch_beta
+        self.omega = self.long_run_vol ** 2 * self.dt * (1 - garch_alpha - garch_beta)
+        self.jump_prob = jump_intensity * self.dt
+        self.jump_scale = jump_scale
+        self.regime_vol = np.asarray(regime_vol, dtype=float)
+        self.regime_stay = np.asarray(regime_stay, dtype=float)
+
+        # State
+        self.price = self.rng.uniform(1, 100, n)
+        self.variance = self.long_run_vol ** 2 * self.dt  # Per-tick GARCH variance
+        self.ewma = self.variance.copy()
+        self.regime = 0
+        self.steps = 0
+
+    def _step(self) -> Dict[str, np.ndarray]:
+        """Advance every pair one tick"""
+        rng, n = self.rng, self.n
+        if rng.random() > self.regime_stay[self.regime]:
+            self.regime = 1 - self.regime
+        scale = self.regime_vol[self.regime]
+        # Stress raises correlation: loadings move halfway toward 1
+        loading = self.loading if self.regime == 0 else (1 + self.loading) / 2
+
+        z = loading * rng.standard_normal() + np.sqrt(1 - loading ** 2) * rng.standard_normal(n)
+        innovation = np.sqrt(self.variance) * z
+        jumps = (rng.random(n) < self.jump_prob) * rng.normal(0, self.jump_scale, n)
+        log_return = scale * innovation - 0.5 * self.variance * scale ** 2 + jumps
+
+        open_ = self.price
+        close = open_ * np.exp(log_return)
+        # Intrabar range: half a tick's standard deviation beyond the open/close, on average
+        wick = np.abs(rng.standard_normal((2, n))) * np.sqrt(self.variance) * scale * 0.5
+        high = np.maximum(open_, close) * np.exp(wick[0])
+        low = np.minimum(open_, close) * np.exp(-wick[1])
+
+        # The regime scales output only; feeding it back would make GARCH explosive
+        self.variance = self.omega + self.alpha * innovation ** 2 + self.beta * self.variance
+        self.ewma = 0.94 * self.ewma + 0.06 * log_return ** 2
+        self.price = close
+        self.steps += 1
+
+        garch = np.sqrt(self.variance / self.dt) * scale
+        return {
+            'price': close, 'open': open_, 'high': high, 'low': low,
+            'volume': rng.lognormal(10, 1, n) * (1 + 10 * np.abs(log_return)),
+            'realized_vol': np.sqrt(self.ewma / self.dt),
+            'garch_forecast': garch,
+            'implied_vol': garch * (1 + self.vol_premium) * np.exp(rng.normal(0, 0.02, n)),
+        }
+
+    def generate(self, steps: int) -> Dict[str, np.ndarray]:
+        """`steps` ticks as (steps, n_pairs) arrays plus timestamps and regime"""
+        out = {field: np.empty((steps, self.n)) for field in FIELDS}
+        regimes = np.empty(steps, dtype=np.int8)
+        first = self.steps
+        for t in range(steps):
+            for field, values in self._step().items():
+                out[field][t] = values
+            regimes[t] = self.regime
+        out['timestamp'] = np.array([self.clock + timedelta(seconds=self.interval * (first + t + 1))
+                                     for t in range(steps)])
+        out['regime'] = regimes
+        return out
+
+    def batches(self, steps: int, batch_steps: int = 100) -> Iterator[Dict[str, np.ndarray]]:
+        """generate() in bounded-memory chunks"""
+        remaining = steps
+        while remaining > 0:
+            size = min(batch_steps, remaining)
+            remaining -= size
+            yield self.generate(size)
+
+    # Output formats
+
+    def records(self, batch: Dict[str, np.ndarray]) -> List[Dict]:
+        """One results.json-style record per pair per tick"""
+        out = []
+        for t, ts in enumerate(batch['timestamp']):
+            stamp = ts.isoformat()
+            rows = zip(batch['price'][t].tolist(), batch['realized_vol'][t].tolist(),
+                       batch['implied_vol'][t].tolist(), batch['garch_forecast'][t].tolist())
+            for pair, (price, rv, iv, garch) in zip(self.pairs, rows):
+                out.append({'pair': pair, 'timestamp': stamp, 'price': price, 'realized_vol': rv,
+                            'implied_vol': iv, 'garch_forecast': garch, 'spread': iv - rv})
+        return out
+
+    def candles(self, steps: int) -> pd.DataFrame:
+        """Long-format OHLCV frame for MarketReplay"""
+        batch = self.generate(steps)
+        frame = pd.DataFrame({
+            'pair': np.tile(self.pairs, steps),
+            'timestamp': np.repeat(batch['timestamp'], self.n),
+            **{f: batch[f].ravel() for f in ('open', 'high', 'low', 'volume')},
+            'close': batch['price'].ravel(),
+        })
+        return frame
+
+    def option_chain(self, moneyness: Sequence[float] = (0.8, 0.9, 0.95, 1.0, 1.05, 1.1, 1.2),
+                     expiries_days: Sequence[float] = (7, 30, 90), skew: float = -0.1,
+                     smile: float = 0.5, rate: float = 0.05) -> pd.DataFrame:
+        """Calls and puts for every pair at the current state, priced in one pass"""
+        spot = self.price[:, None, None]
+        atm = (np.sqrt(self.variance / self.dt) * self.regime_vol[self.regime]
+               * (1 + self.vol_premium))[:, None, None]
+        strike = spot * np.asarray(moneyness)[None, :, None]
+        expiry = (np.asarray(expiries_days) / 365)[None, None, :]
+
+        log_m = np.log(strike / spot)
+        iv = np.maximum(atm * (1 + skew * log_m + smile * log_m ** 2), 0.01)
+        sqrt_t = np.sqrt(expiry)
+        d1 = (np.log(spot / strike) + (rate + 0.5 * iv ** 2) * expiry) / (iv * sqrt_t)
+        d2 = d1 - iv * sqrt_t
+        discount = strike * np.exp(-rate * expiry)
+        call = spot * ndtr(d1) - discount * ndtr(d2)
+        put = discount * ndtr(-d2) - spot * ndtr(-d1)
+
+        shape = d1.shape
+        grid = {
+            'pair': np.repeat(self.pairs, shape[1] * shape[2]),
+            'spot': np.broadcast_to(spot, shape).ravel(),
+            'strike': strike.repeat(shape[2], axis=2).ravel(),
+            'expiry_days': np.broadcast_to(np.asarray(expiries_days, dtype=float), shape).ravel(),
+            'implied_vol': np.broadcast_to(iv, shape).ravel(),
+        }
+        calls = pd.DataFrame({**grid, 'type': 'call', 'price': call.ravel(), 'delta': ndtr(d1).ravel()})
+        puts = pd.DataFrame({**grid, 'type': 'put', 'price': put.ravel(), 'delta': (ndtr(d1) - 1).ravel()})
+        return pd.concat([calls, puts], ignore_index=True)
+
+    # Emission
+
+    async def emit(self, sink: Callable[[List[Dict]], object], steps: int, batch_steps: int = 10,
+                   rate: Optional[float] = None) -> Dict:
+        """Send `steps` ticks to `sink` in batches; `rate` caps ticks per second"""
+        started = time.perf_counter()
+        sent = 0
+        for i, batch in enumerate(self.batches(steps, batch_steps)):
+            result = sink(self.records(batch))
+            if inspect.isawaitable(result):
+                await result
+            sent += len(batch['timestamp']) * self.n
+            if rate:
+                delay = started + (i + 1) * batch_steps / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        elapsed = time.perf_counter() - started
+        return {'records': sent, 'seconds': elapsed,
+                'records_per_second': sent / elapsed if elapsed > 0 else None}
+
+def jsonl_sink(path: str) -> Callable[[List[Dict]], None]:
+    """Append each batch to a JSONL file in one write"""
+    def write(records: List[Dict]):
+        with open(path, 'a') as f:
+            f.write(''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records))
+    return write
+
+def redis_sink(streamer) -> Callable[[List[Dict]], object]:
+    """One pipelined publish_batch per tick; RedisStreamer or AsyncRedisStreamer"""
+    async def publish(records: List[Dict]) -> int:
+        published = 0
+        ticks: List[Dict[str, Dict]] = [{}]
+        for record in records:
+            if record['pair'] in ticks[-1]:
+                ticks.append({})
+            ticks[-1][record['pair']] = {k: v for k, v in record.items() if k not in ('pair', 'timestamp')}
+        for updates in ticks:
+            result = streamer.publish_batch(updates)
+            published += await result if inspect.isawaitable(result) else result
+        return published
+    return publish
+
+def listener_sink(callback) -> Callable[[List[Dict]], object]:
+    """Feed records one by one to an async listener (e.g. WebSocket publish)"""
+    async def feed(records: List[Dict]):
+        for record in records:
+            await callback(record)
+    return feed
+
+async def main():
+    parser = argparse.ArgumentParser(description="Synthetic multi-asset market simulator")
+    parser.add_argument('--pairs', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--batch-steps', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=None, help='ticks per second (default: max)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=None, help='JSONL file to append to')
+    parser.add_argument('--redis', action='store_true', help='publish to Redis at localhost:6379')
+    args = parser.parse_args()
+
+    simulator = MarketSimulator(n_pairs=args.pairs, seed=args.seed)
+    if args.redis:
+        from src.streaming.redis_stream import RedisStreamer
+        sink = redis_sink(RedisStreamer())
+    elif args.output:
+        sink = jsonl_sink(args.output)
+    else:
+        sink = lambda records: None  # Generation throughput only
+
+    report = await simulator.emit(sink, args.steps, args.batch_steps, args.rate)
+    logger.info(f"Emitted {report['records']:,} records in {report['seconds']:.2f}s "
+                f"({report['records_per_second']:,.0f}/s)")
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
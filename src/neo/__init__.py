@@ -3,12 +3,19 @@ Neo blockchain integration module for AgentSpoons
 """
 
 from .blockchain_client import NeoBlockchainClient, VolatilityOracle
+from .rpc_client import AsyncNeoRpcClient, RpcError
+from .dex_client import DexClient, DexEndpoint, RateLimiter
 from .dashboard_integration import DashboardNeoIntegration, BlockchainDataStreamToDb
 from .volatility_contract import display_contract, CONTRACT_MANIFEST, VOLATILITY_CONTRACT
 
 __all__ = [
     'NeoBlockchainClient',
     'VolatilityOracle',
+    'AsyncNeoRpcClient',
+    'RpcError',
+    'DexClient',
+    'DexEndpoint',
+    'RateLimiter',
     'DashboardNeoIntegration',
     'BlockchainDataStreamToDb',
     'display_contract',
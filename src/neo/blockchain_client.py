@@ -2,12 +2,19 @@
 Real Neo N3 Blockchain Integration
 Deploys and interacts with volatility oracle contract
 """
+import asyncio
+import base64
 import json
 import requests
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 from loguru import logger
 
+from src.contracts.oracle_layout import RECORD, pack_entry, pack_record, unpack_record
+
+# Neo N3 caps transactions at 100 KiB; leave room for script and witnesses
+MAX_BATCH_BYTES = 60 * 1024
+
 # Neo3-boa imports for contract interaction
 try:
     from neo3.wallet import Wallet
@@ -261,14 +268,54 @@ class NeoBlockchainClient:
             logger.error(f"Failed to update volatility: {e}")
             return None
     
-    def get_volatility(self, pair: str) -> Optional[float]:
+    def update_volatility_batch(self, packed: bytes) -> Optional[str]:
+        """Update many pairs in one transaction
+        
+        Args:
+            packed: Entries built with oracle_layout.pack_batch
+            
+        Returns:
+            Transaction hash if successful
+        """
+        if not self.contract_hash:
+            logger.warning("Contract not deployed")
+            return None
+        
+        try:
+            response = requests.post(self.rpc_url, json={
+                "jsonrpc": "2.0",
+                "method": "invokefunction",
+                "params": [
+                    self.contract_hash,
+                    "update_volatility_batch",
+                    [
+                        {"type": "ByteArray", "value": base64.b64encode(packed).decode('ascii')}
+                    ]
+                ],
+                "id": 1
+            }, timeout=10)
+            
+            data = response.json()
+            
+            if 'result' in data:
+                tx_hash = "0x" + "c" * 64
+                logger.info(f"Volatility batch updated: {len(packed)} bytes")
+                return tx_hash
+            
+            return None
+            
+        except Exception as e:
+            logger.error(f"Failed to update volatility batch: {e}")
+            return None
+    
+    def get_volatility(self, pair: str) -> Optional[Dict]:
         """Get volatility from smart contract
         
         Args:
             pair: Trading pair (e.g. 'NEO/USDT')
             
         Returns:
-            Volatility value or None
+            Stored oracle record (prices, vols, timestamp) or None
         """
         if not self.contract_hash:
             logger.warning("Contract not deployed")
@@ -291,15 +338,19 @@ class NeoBlockchainClient:
             
             data = response.json()
             
-            if 'result' in data and 'stack' in data['result']:
-                stack = data['result']['stack']
-                if stack:
-                    # Decode volatility from result
-                    vol_value = int(stack[0]['value'], 16) / 10000
-                    logger.info(f"Retrieved volatility: {pair}={vol_value:.4f}")
-                    return vol_value
+            stack = (data.get('result') or {}).get('stack') or []
+            if not stack or not stack[0].get('value'):
+                return None
             
-            return None
+            # ByteString results are base64; the contract stores a packed record
+            record = base64.b64decode(stack[0]['value'])
+            if len(record) != RECORD.size:
+                logger.warning(f"Unexpected record size for {pair}: {len(record)} bytes")
+                return None
+            
+            volatility = unpack_record(record)
+            logger.info(f"Retrieved volatility: {pair}={volatility['realized_vol']:.4f}")
+            return volatility
             
         except Exception as e:
             logger.error(f"Failed to get volatility: {e}")
@@ -394,6 +445,82 @@ class VolatilityOracle:
         return self.pair_cache.copy()
 
 
+class OracleBatcher:
+    """Collects one publish round of pair updates into as few transactions as fit
+    
+    The latest update per pair wins within a round. flush() sends one
+    update_volatility_batch transaction per MAX_BATCH_BYTES of packed entries,
+    which in practice is one transaction per round. With an AsyncNeoRpcClient,
+    aflush() sends the chunks concurrently on its connection pool.
+    """
+    
+    def __init__(self, client, max_bytes: int = MAX_BATCH_BYTES):
+        self.client = client
+        self.max_bytes = max_bytes
+        self.pending: Dict[str, bytes] = {}
+        self.transactions = 0
+        self.pairs_sent = 0
+    
+    def add(self, pair: str, spot_price: float, realized_vol: float, implied_vol: float,
+            garch_forecast: float, timestamp: int):
+        """Queue a pair's values for the next flush"""
+        self.pending[pair] = pack_entry(pair, pack_record(
+            spot_price, realized_vol, implied_vol, garch_forecast, timestamp))
+    
+    def add_feed(self, feed: Dict):
+        """Queue an OraclePublisherAgent feed"""
+        vol = feed.get('volatility', {})
+        self.add(feed['pair'], feed.get('spot_price'), vol.get('realized_vol_30d'),
+                 vol.get('implied_vol_1m'), vol.get('garch_forecast'), feed['timestamp'])
+    
+    def chunks(self) -> List[Tuple[List[str], bytes]]:
+        """Pending entries split into (pairs, payload) no larger than max_bytes"""
+        chunks, pairs, payload = [], [], b''
+        for pair, entry in self.pending.items():
+            if payload and len(payload) + len(entry) > self.max_bytes:
+                chunks.append((pairs, payload))
+                pairs, payload = [], b''
+            pairs.append(pair)
+            payload += entry
+        if payload:
+            chunks.append((pairs, payload))
+        return chunks
+    
+    def flush(self) -> List[str]:
+        """Send pending updates; chunks that fail stay queued for the next round"""
+        tx_hashes = []
+        for pairs, payload in self.chunks():
+            tx_hash = self.client.update_volatility_batch(payload)
+            if not tx_hash:
+                continue
+            tx_hashes.append(tx_hash)
+            for pair in pairs:
+                del self.pending[pair]
+            self.transactions += 1
+            self.pairs_sent += len(pairs)
+        return tx_hashes
+    
+    @property
+    def is_async(self) -> bool:
+        return asyncio.iscoroutinefunction(self.client.update_volatility_batch)
+    
+    async def aflush(self) -> List[str]:
+        """flush() for an async client: every chunk in flight at once"""
+        chunks = self.chunks()
+        results = await asyncio.gather(*(self.client.update_volatility_batch(payload)
+                                         for _, payload in chunks))
+        tx_hashes = []
+        for (pairs, _), tx_hash in zip(chunks, results):
+            if not tx_hash:
+                continue
+            tx_hashes.append(tx_hash)
+            for pair in pairs:
+                del self.pending[pair]
+            self.transactions += 1
+            self.pairs_sent += len(pairs)
+        return tx_hashes
+
+
 def demo_neo_integration():
     """Demo Neo integration"""
     
@@ -4,12 +4,15 @@ Bridges the Dash dashboard with Neo N3 smart contract
 """
 
 import json
+import os
 import asyncio
 from datetime import datetime
 from typing import Dict, Optional, List
 from loguru import logger
 
+from src.utils.segmented_log import SegmentedLog
 from .blockchain_client import NeoBlockchainClient, VolatilityOracle
+from .rpc_client import AsyncNeoRpcClient
 from .volatility_contract import display_contract
 
 
@@ -29,6 +32,7 @@ class DashboardNeoIntegration:
         # Initialize Neo components
         self.client = NeoBlockchainClient(network=network)
         self.oracle = VolatilityOracle(network=network)
+        self.rpc = AsyncNeoRpcClient(self.client.rpc_urls[network])
         
         # Tracking
         self.submission_history: List[Dict] = []
@@ -150,6 +154,38 @@ class DashboardNeoIntegration:
                 'error': str(e)
             }
     
+    async def fetch_blockchain_status(self, pairs: Optional[List[str]] = None) -> Dict:
+        """Non-blocking get_blockchain_status for async callers
+        
+        Network info and height go out as one batched request; contract reads
+        run concurrently and are served from cache until the next block.
+        """
+        self.rpc.contract_hash = self.client.contract_hash
+        address = self.client.account.address if self.client.account else None
+        try:
+            status, contract_state, *vols = await asyncio.gather(
+                self.rpc.status(address),
+                self.rpc.get_contract_state(),
+                *(self.rpc.get_volatility(pair) for pair in pairs or [])
+            )
+        except Exception as e:
+            logger.error(f"Failed to get blockchain status: {e}")
+            return {'network': self.network, 'status': 'ERROR', 'error': str(e)}
+        
+        return {
+            'network': self.network,
+            'connected': status['connected'],
+            'network_info': status['network_info'],
+            'block_height': status['block_height'],
+            'contract_deployed': self.client.contract_hash is not None,
+            'contract_state': contract_state,
+            'onchain_volatilities': dict(zip(pairs or [], vols)),
+            'cached_volatilities': self.oracle.get_all_volatilities(),
+            'total_submissions': self.submission_count,
+            'submission_history_length': len(self.submission_history),
+            'status': 'CONNECTED' if status['connected'] else 'DISCONNECTED'
+        }
+    
     def get_wallet_info(self) -> Dict:
         """Get wallet information
         
@@ -204,34 +240,44 @@ class DashboardNeoIntegration:
 
 
 class BlockchainDataStreamToDb:
-    """Stream blockchain data to database for archival"""
+    """Stream blockchain data to an append-only archive
+    
+    Submissions go to a SegmentedLog next to db_path (data/blockchain_archive/
+    for the default), so each archive_submission writes one line instead of
+    rewriting the whole file. A legacy JSON archive at db_path is imported once.
+    """
     
     def __init__(self, integration: DashboardNeoIntegration, db_path: str = "data/blockchain_archive.json"):
         """Initialize archive
         
         Args:
             integration: DashboardNeoIntegration instance
-            db_path: Path to archive JSON file
+            db_path: Legacy archive JSON path; segments live in the same path without .json
         """
         self.integration = integration
         self.db_path = db_path
-        self.archive: List[Dict] = self._load_archive()
+        self.archive = SegmentedLog(
+            os.path.splitext(db_path)[0],
+            key_func=lambda record: record.get('data', {}).get('pair', 'unknown')
+        )
+        self._migrate_legacy()
     
-    def _load_archive(self) -> List[Dict]:
-        """Load existing archive"""
+    def _migrate_legacy(self):
+        """Import records from the old rewrite-per-record JSON file"""
+        if not os.path.isfile(self.db_path) or len(self.archive):
+            return
         try:
             with open(self.db_path, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    
-    def _save_archive(self):
-        """Save archive to file"""
-        try:
-            with open(self.db_path, 'w') as f:
-                json.dump(self.archive, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save archive: {e}")
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read legacy archive {self.db_path}: {e}")
+            return
+        
+        for record in legacy:
+            self.archive.append(record)
+        self.archive.save_index()
+        os.replace(self.db_path, self.db_path + '.migrated')
+        logger.info(f"Migrated {len(legacy)} records from {self.db_path}")
     
     def archive_submission(self, data: Dict):
         """Archive a blockchain submission
@@ -246,36 +292,36 @@ class BlockchainDataStreamToDb:
         }
         
         self.archive.append(record)
-        self._save_archive()
         
         logger.info(f"Archived submission #{len(self.archive)}")
     
+    def get_records(self, pair: Optional[str] = None, start: Optional[str] = None,
+                    end: Optional[str] = None) -> List[Dict]:
+        """Archived records for a pair and/or ISO timestamp range"""
+        return list(self.archive.read(pair, start, end))
+    
     def get_archive_stats(self) -> Dict:
         """Get archive statistics
         
         Returns:
             Dict with archive stats
         """
-        if not self.archive:
+        stats = self.archive.stats()
+        if not stats['total_records']:
             return {'total_records': 0}
         
-        total = len(self.archive)
-        first_ts = self.archive[0].get('timestamp')
-        last_ts = self.archive[-1].get('timestamp')
-        
-        # Count by pair
-        pairs_count = {}
-        for record in self.archive:
-            pair = record.get('data', {}).get('pair', 'unknown')
-            pairs_count[pair] = pairs_count.get(pair, 0) + 1
-        
+        pairs = stats['keys']
         return {
-            'total_records': total,
-            'first_timestamp': first_ts,
-            'last_timestamp': last_ts,
-            'pairs_tracked': len(pairs_count),
-            'pairs_breakdown': pairs_count
+            'total_records': stats['total_records'],
+            'first_timestamp': min(p['first'] for p in pairs.values()),
+            'last_timestamp': max(p['last'] for p in pairs.values()),
+            'pairs_tracked': len(pairs),
+            'pairs_breakdown': {pair: p['count'] for pair, p in pairs.items()}
         }
+    
+    def close(self):
+        """Flush the archive index"""
+        self.archive.close()
 
 
 def demo_integration():
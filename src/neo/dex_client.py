@@ -0,0 +1,212 @@
+"""
+Async pooled DEX market-data client
+
+Every configured DEX endpoint gets its own keep-alive connection pool
+and token-bucket rate limiter. fetch() fans out across endpoints and
+pair chunks concurrently; pairs going to the same DEX are coalesced into
+one request of up to max_batch pairs (max_batch=1 for APIs that take a
+single pair), and identical requests already in flight are shared.
+A request still pending after hedge_after seconds is duplicated and the
+first answer wins, bounded by an overall timeout per request.
+
+Expected API: GET {url}{path}?pairs=NEO/USDT,GAS/USDT (or ?pair= when
+max_batch is 1) answering {pair: candle}, {"data": ...} or a list of
+candles carrying a "pair" key; a lone candle is accepted for one pair.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import aiohttp
+from loguru import logger
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second, bursts up to `burst`"""
+
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now"""
+        if not self.rate:
+            return True
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:  # Waiters queue in order instead of racing for tokens
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+def normalize_candle(raw: Dict) -> Dict:
+    """OHLCV floats; a bare price quote becomes a flat bar with no volume"""
+    price = raw.get('close', raw.get('price'))
+    candle = {key: float(raw.get(key, price)) for key in ('open', 'high', 'low', 'close')}
+    candle['volume'] = float(raw.get('volume') or 0.0)
+    return candle
+
+class DexEndpoint:
+    """One DEX API: where to ask, how many pairs per request, how fast"""
+
+    def __init__(self, url: str, path: str = '/candles', max_batch: int = 50,
+                 rate_limit: Optional[float] = 10.0, pool_size: int = 10, name: Optional[str] = None):
+        self.url = url.rstrip('/')
+        self.path = path
+        self.max_batch = max(1, int(max_batch))
+        self.rate_limit = rate_limit
+        self.pool_size = pool_size
+        self.name = name or self.url
+
+    @classmethod
+    def from_config(cls, entry: Union[str, Dict, 'DexEndpoint'], **defaults) -> 'DexEndpoint':
+        """Config.DEX_ENDPOINTS entries may be URLs or dicts of DexEndpoint arguments"""
+        if isinstance(entry, DexEndpoint):
+            return entry
+        if isinstance(entry, str):
+            return cls(entry, **defaults)
+        return cls(**{**defaults, **entry})
+
+    def chunks(self, pairs: Sequence[str]) -> List[Tuple[str, ...]]:
+        return [tuple(pairs[i:i + self.max_batch]) for i in range(0, len(pairs), self.max_batch)]
+
+    def params(self, pairs: Tuple[str, ...]) -> Dict[str, str]:
+        return {'pair': pairs[0]} if self.max_batch == 1 else {'pairs': ','.join(pairs)}
+
+    def parse(self, payload, pairs: Tuple[str, ...]) -> Dict[str, Dict]:
+        """{pair: candle} for the requested pairs found in the response"""
+        if isinstance(payload, dict) and 'data' in payload:
+            payload = payload['data']
+        if isinstance(payload, list):
+            payload = {item['pair']: item for item in payload if isinstance(item, dict) and 'pair' in item}
+        elif isinstance(payload, dict) and len(pairs) == 1 and pairs[0] not in payload:
+            payload = {pairs[0]: payload}
+        if not isinstance(payload, dict):
+            raise ValueError(f"Unexpected response from {self.name}: {type(payload).__name__}")
+        return {pair: normalize_candle(payload[pair]) for pair in pairs
+                if isinstance(payload.get(pair), dict)}
+
+class DexClient:
+    """Concurrent, rate-limited, hedged fetcher over every DEX endpoint"""
+
+    def __init__(self, endpoints: Sequence, timeout: float = 5.0, hedge_after: Optional[float] = 1.0,
+                 pool_size: int = 10, rate_limit: Optional[float] = 10.0, max_batch: int = 50):
+        defaults = {'pool_size': pool_size, 'rate_limit': rate_limit, 'max_batch': max_batch}
+        self.endpoints = [DexEndpoint.from_config(e, **defaults) for e in endpoints]
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.limiters = {e.url: RateLimiter(e.rate_limit) for e in self.endpoints}
+        self.inflight: Dict[Tuple[str, Tuple[str, ...]], asyncio.Task] = {}
+        self.stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'coalesced': 0,
+                      'failures': 0, 'timeouts': 0}
+
+    async def _session(self, endpoint: DexEndpoint) -> aiohttp.ClientSession:
+        session = self.sessions.get(endpoint.url)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=endpoint.pool_size, keepalive_timeout=30)
+            session = aiohttp.ClientSession(connector=connector,
+                                            timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self.sessions[endpoint.url] = session
+        return session
+
+    async def close(self):
+        for session in self.sessions.values():
+            await session.close()
+        self.sessions = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _get(self, endpoint: DexEndpoint, params: Dict, limited: bool = True):
+        if limited:
+            await self.limiters[endpoint.url].acquire()
+        session = await self._session(endpoint)
+        self.stats['requests'] += 1
+        async with session.get(endpoint.url + endpoint.path, params=params) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def _hedged(self, endpoint: DexEndpoint, params: Dict):
+        """First successful answer from the request or its hedge, within the timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        primary = asyncio.create_task(self._get(endpoint, params))
+        pending, hedged, error = {primary}, self.hedge_after is None, None
+        try:
+            while pending:
+                wait = deadline - loop.time()
+                if not hedged:
+                    wait = min(wait, self.hedge_after)
+                if wait <= 0:
+                    self.stats['timeouts'] += 1
+                    raise asyncio.TimeoutError(f"{endpoint.name} did not answer in {self.timeout}s")
+                done, pending = await asyncio.wait(pending, timeout=wait,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    error = task.exception()
+                # Slow or failed: send one duplicate if the rate limit has room for it
+                if not hedged and self.limiters[endpoint.url].try_acquire():
+                    hedged = True
+                    self.stats['hedged'] += 1
+                    pending.add(asyncio.create_task(self._get(endpoint, params, limited=False)))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_chunk(self, endpoint: DexEndpoint, pairs: Tuple[str, ...]) -> Dict[str, Dict]:
+        """Shares an identical request already in flight instead of sending another"""
+        key = (endpoint.url, pairs)
+        task = self.inflight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+        else:
+            async def request():
+                try:
+                    return endpoint.parse(await self._hedged(endpoint, endpoint.params(pairs)), pairs)
+                finally:
+                    self.inflight.pop(key, None)
+            task = self.inflight[key] = asyncio.create_task(request())
+        return await asyncio.shield(task)
+
+    async def fetch(self, pairs: Sequence[str]) -> Dict[str, List[Dict]]:
+        """{pair: [candle from each DEX that answered]}"""
+        pairs = list(dict.fromkeys(pairs))
+        jobs = [(endpoint, chunk) for endpoint in self.endpoints for chunk in endpoint.chunks(pairs)]
+        results = await asyncio.gather(*(self._fetch_chunk(e, c) for e, c in jobs), return_exceptions=True)
+
+        quotes: Dict[str, List[Dict]] = {pair: [] for pair in pairs}
+        for (endpoint, chunk), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                self.stats['failures'] += 1
+                logger.warning(f"DEX {endpoint.name} failed for {len(chunk)} pairs: {result!r}")
+                continue
+            for pair, candle in result.items():
+                quotes[pair].append(candle)
+        return quotes
@@ -0,0 +1,245 @@
+"""
+Async Neo N3 JSON-RPC client
+
+One keep-alive connection pool per client, JSON-RPC batch requests,
+retry with exponential backoff across the configured endpoints, and
+contract reads cached until the chain height moves. Oracle batch
+updates go through the same pool, so publishing never waits on a
+blocking HTTP call.
+"""
+import asyncio
+import base64
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+from loguru import logger
+
+from src.contracts.oracle_layout import RECORD, unpack_record
+
+RETRY_STATUS = {429, 502, 503, 504}
+
+class RpcError(Exception):
+    """JSON-RPC error object returned by the node"""
+
+    def __init__(self, error: Dict):
+        self.code = error.get('code')
+        self.message = error.get('message', '')
+        super().__init__(f"RPC error {self.code}: {self.message}")
+
+class AsyncNeoRpcClient:
+    """Pooled async client for a Neo N3 RPC endpoint (with failover)"""
+
+    def __init__(self, rpc_urls, contract_hash: Optional[str] = None, pool_size: int = 20,
+                 timeout: float = 10.0, retries: int = 3, backoff: float = 0.2,
+                 height_ttl: float = 1.0):
+        self.rpc_urls = [rpc_urls] if isinstance(rpc_urls, str) else list(rpc_urls)
+        self.contract_hash = contract_hash
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.height_ttl = height_ttl  # Neo blocks are ~15s apart; poll height at most this often
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.url_index = 0
+        self.next_id = 0
+        self.height = None
+        self.height_checked = 0.0
+        self._height_lock = asyncio.Lock()
+        self.cache: Dict[Tuple[str, str], Tuple[int, Any]] = {}  # key -> (height, result)
+        self.stats = {'requests': 0, 'calls': 0, 'retries': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+    @property
+    def rpc_url(self) -> str:
+        return self.rpc_urls[self.url_index]
+
+    async def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _request(self, method: str, params: Sequence) -> Dict:
+        self.next_id += 1
+        return {"jsonrpc": "2.0", "method": method, "params": list(params), "id": self.next_id}
+
+    async def _post(self, payload):
+        """POST with retry/backoff; rotates endpoints after each failure"""
+        session = await self._session()
+        for attempt in range(self.retries + 1):
+            self.stats['requests'] += 1
+            try:
+                async with session.post(self.rpc_url, json=payload) as resp:
+                    if resp.status not in RETRY_STATUS:
+                        resp.raise_for_status()
+                        return await resp.json(content_type=None)
+                    error = aiohttp.ClientResponseError(resp.request_info, resp.history,
+                                                        status=resp.status)
+            except aiohttp.ClientResponseError as e:
+                if e.status not in RETRY_STATUS:
+                    raise  # 4xx/500: the same request would fail again
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            if attempt == self.retries:
+                raise error
+            self.stats['retries'] += 1
+            logger.debug(f"RPC {self.rpc_url} failed ({error!r}), retry {attempt + 1}/{self.retries}")
+            self.url_index = (self.url_index + 1) % len(self.rpc_urls)
+            await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+    async def call(self, method: str, params: Sequence = ()) -> Any:
+        """Single JSON-RPC call"""
+        self.stats['calls'] += 1
+        response = await self._post(self._request(method, params))
+        if 'error' in response:
+            raise RpcError(response['error'])
+        return response.get('result')
+
+    async def batch(self, calls: Sequence[Tuple[str, Sequence]], return_exceptions: bool = False) -> List:
+        """Several calls in one HTTP request; results in call order
+
+        With return_exceptions=True a failed call yields its RpcError in place
+        instead of raising, like asyncio.gather.
+        """
+        if not calls:
+            return []
+        requests = [self._request(method, params) for method, params in calls]
+        self.stats['calls'] += len(requests)
+        responses = await self._post(requests)
+        if isinstance(responses, dict):  # Node rejected the whole batch
+            raise RpcError(responses.get('error', {}))
+
+        by_id = {r.get('id'): r for r in responses}
+        results = []
+        for request in requests:
+            response = by_id.get(request['id'], {'error': {'code': -32603, 'message': 'missing response'}})
+            if 'error' in response:
+                error = RpcError(response['error'])
+                if not return_exceptions:
+                    raise error
+                results.append(error)
+            else:
+                results.append(response.get('result'))
+        return results
+
+    async def block_height(self, refresh: bool = False) -> int:
+        """Current block count, polled at most every height_ttl seconds"""
+        async with self._height_lock:  # Concurrent readers share one poll
+            if refresh or self.height is None or time.monotonic() - self.height_checked >= self.height_ttl:
+                self._set_height(await self.call('getblockcount'))
+            return self.height
+
+    def _set_height(self, height: int):
+        if height != self.height:
+            self.cache.clear()  # New block: contract state may have changed
+        self.height = height
+        self.height_checked = time.monotonic()
+
+    async def invoke(self, operation: str, params: Sequence = (), contract_hash: Optional[str] = None):
+        """Read-only invokefunction against the oracle contract"""
+        return await self.call('invokefunction', [contract_hash or self.contract_hash, operation, list(params)])
+
+    async def cached_invoke(self, operation: str, params: Sequence = ()):
+        """invoke() cached until the next block"""
+        height = await self.block_height()
+        key = (operation, json.dumps(params, sort_keys=True))
+        hit = self.cache.get(key)
+        if hit is not None and hit[0] == height:
+            self.stats['cache_hits'] += 1
+            return hit[1]
+        self.stats['cache_misses'] += 1
+        result = await self.invoke(operation, params)
+        self.cache[key] = (height, result)
+        return result
+
+    async def update_volatility_batch(self, packed: bytes, signer=None) -> Optional[str]:
+        """Invoke update_volatility_batch; same contract as NeoBlockchainClient's
+
+        The chain height (validUntilBlock) and the invocation share one
+        batch request. signer(script, gas_consumed, height) -> base64 signed
+        transaction broadcasts it with sendrawtransaction; without a signer
+        only the invocation runs, as in the blocking client's mock mode.
+        """
+        if not self.contract_hash:
+            logger.warning("Contract not deployed")
+            return None
+
+        param = {"type": "ByteArray", "value": base64.b64encode(packed).decode('ascii')}
+        try:
+            height, result = await self.batch([
+                ('getblockcount', []),
+                ('invokefunction', [self.contract_hash, 'update_volatility_batch', [param]]),
+            ])
+            self._set_height(height)
+            if not result or result.get('state') == 'FAULT':
+                logger.error(f"Volatility batch invocation faulted: {(result or {}).get('exception')}")
+                return None
+            if signer is None:
+                tx_hash = "0x" + "c" * 64  # Dry run: nothing was broadcast
+            else:
+                raw = signer(result['script'], result.get('gasconsumed'), height)
+                tx_hash = (await self.call('sendrawtransaction', [raw]))['hash']
+            logger.info(f"Volatility batch updated: {len(packed)} bytes")
+            return tx_hash
+        except (RpcError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Failed to update volatility batch: {e!r}")
+            return None
+
+    async def get_volatility(self, pair: str) -> Optional[Dict]:
+        """Stored oracle record for a pair, or None"""
+        if not self.contract_hash:
+            return None
+        result = await self.cached_invoke('get_volatility', [{"type": "String", "value": pair}])
+        stack = (result or {}).get('stack') or []
+        if not stack or not stack[0].get('value'):
+            return None
+        record = base64.b64decode(stack[0]['value'])
+        return unpack_record(record) if len(record) == RECORD.size else None
+
+    async def get_contract_state(self) -> Dict:
+        if not self.contract_hash:
+            return {'status': 'not_deployed'}
+        result = await self.cached_invoke('get_owner')
+        return {
+            'status': 'deployed',
+            'contract_hash': self.contract_hash,
+            'invocation_state': (result or {}).get('state', 'unknown'),
+            'block_height': self.height
+        }
+
+    async def status(self, address: Optional[str] = None) -> Dict:
+        """Network info, height and optional balances in a single request"""
+        calls = [('getversion', []), ('getblockcount', [])]
+        if address:
+            calls.append(('getnep17balances', [address]))
+        results = await self.batch(calls, return_exceptions=True)
+
+        version, height = results[0], results[1]
+        if not isinstance(height, Exception):
+            self._set_height(height)
+        status = {
+            'rpc_url': self.rpc_url,
+            'connected': not isinstance(version, Exception),
+            'network_info': version if not isinstance(version, Exception) else {},
+            'block_height': self.height
+        }
+        if address:
+            balances = results[2]
+            status['balances'] = balances if not isinstance(balances, Exception) else {}
+        return status
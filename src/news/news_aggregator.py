@@ -1,12 +1,76 @@
 """
 Real-time news feed aggregator
 Like Bloomberg News Terminal
+
+Feeds are fetched concurrently with conditional requests (ETag and
+Last-Modified), so an unchanged feed costs a 304 and no parsing. Parsed
+entries are merged by id into a per-source store that stays fresh for
+`ttl` seconds, so headlines, Neo news and exports share one refresh.
 """
-import feedparser
-import requests
-from datetime import datetime, timedelta
+import asyncio
 import json
-from collections import defaultdict
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+from loguru import logger
+
+try:
+    import feedparser
+    FEEDPARSER_AVAILABLE = True
+except ImportError:
+    FEEDPARSER_AVAILABLE = False
+    logger.warning("feedparser not installed. Install with: pip install feedparser")
+
+class FeedFetcher:
+    """Concurrent conditional GETs; remembers each feed's validators"""
+    
+    def __init__(self, timeout=10.0, pool_size=10):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+        self.validators: Dict[str, Dict[str, str]] = {}  # url -> ETag / Last-Modified
+        self.stats = {'requests': 0, 'not_modified': 0, 'errors': 0}
+    
+    async def _get(self, session, url) -> Tuple[int, Optional[bytes]]:
+        headers = {}
+        validators = self.validators.get(url, {})
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last_modified' in validators:
+            headers['If-Modified-Since'] = validators['last_modified']
+        
+        self.stats['requests'] += 1
+        async with session.get(url, headers=headers) as resp:
+            if resp.status == 304:
+                self.stats['not_modified'] += 1
+                return 304, None
+            resp.raise_for_status()
+            body = await resp.read()
+            fresh = {}
+            if resp.headers.get('ETag'):
+                fresh['etag'] = resp.headers['ETag']
+            if resp.headers.get('Last-Modified'):
+                fresh['last_modified'] = resp.headers['Last-Modified']
+            self.validators[url] = fresh
+            return resp.status, body
+    
+    async def fetch_all(self, urls: Iterable[str]) -> Dict[str, Tuple[int, Optional[bytes]]]:
+        """{url: (status, body)}; body is None for 304, failures are left out"""
+        urls = list(urls)
+        connector = aiohttp.TCPConnector(limit=self.pool_size)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            results = await asyncio.gather(*(self._get(session, url) for url in urls),
+                                           return_exceptions=True)
+        out = {}
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                self.stats['errors'] += 1
+                logger.warning(f"Feed fetch failed for {url}: {result!r}")
+            else:
+                out[url] = result
+        return out
 
 class NewsAggregator:
     """
@@ -14,7 +78,7 @@ class NewsAggregator:
     Filter and rank by relevance
     """
     
-    def __init__(self):
+    def __init__(self, ttl=300, timeout=10.0, max_entries=200):
         self.feeds = {
             'CoinDesk': 'https://www.coindesk.com/arc/outboundfeeds/rss/',
             'CoinTelegraph': 'https://cointelegraph.com/rss',
@@ -23,54 +87,106 @@ class NewsAggregator:
         }
         
         self.keywords = ['neo', 'volatility', 'options', 'defi', 'oracle', 'derivatives']
+        self.boosted = {'neo', 'volatility', 'oracle'}  # Key topics score 3 instead of 1
+        self._matcher = None
+        self._matcher_keywords = None
         
-    def fetch_news(self, hours=24):
-        """Fetch news from all sources"""
+        self.ttl = ttl
+        self.max_entries = max_entries  # Newest entries kept per source
+        self.fetcher = FeedFetcher(timeout=timeout)
+        self.entries: Dict[str, Dict[str, Dict]] = {}  # source -> entry id -> article
+        self.refreshed_at: Dict[str, float] = {}
+    
+    @staticmethod
+    def _entry_id(entry) -> str:
+        return entry.get('id') or entry.get('link') or entry.get('title', '')
+    
+    def _entry_article(self, source, entry, known: Optional[Dict]) -> Dict:
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        if published:
+            pub_time = datetime(*published[:6])
+        else:
+            # Undated entries keep the time they were first seen
+            pub_time = datetime.fromisoformat(known['published']) if known else datetime.now()
+        summary = entry.get('summary', '')
+        title = entry.get('title', '')
+        return {
+            'source': source,
+            'title': title,
+            'link': entry.get('link', ''),
+            'published': pub_time.isoformat(),
+            'summary': summary[:200],
+            'relevance_score': self._calculate_relevance(title + ' ' + summary)
+        }
+    
+    def merge(self, source, parsed_entries):
+        """Upsert parsed feed entries by id and trim to the newest max_entries"""
+        store = self.entries.setdefault(source, {})
+        added = 0
+        for entry in parsed_entries:
+            entry_id = self._entry_id(entry)
+            added += entry_id not in store
+            store[entry_id] = self._entry_article(source, entry, store.get(entry_id))
+        if len(store) > self.max_entries:
+            newest = sorted(store.items(), key=lambda kv: kv[1]['published'], reverse=True)
+            self.entries[source] = dict(newest[:self.max_entries])
+        return added
+    
+    async def refresh(self, force=False) -> Dict[str, int]:
+        """Refetch sources older than ttl; returns new entries per refetched source"""
+        now = time.monotonic()
+        stale = {source: url for source, url in self.feeds.items()
+                 if force or now - self.refreshed_at.get(source, float('-inf')) >= self.ttl}
+        if not stale:
+            return {}
         
+        responses = await self.fetcher.fetch_all(stale.values())
+        added = {}
+        for source, url in stale.items():
+            if url not in responses:
+                continue  # Failed: keep serving the cached entries
+            status, body = responses[url]
+            self.refreshed_at[source] = now
+            if body is None:
+                added[source] = 0
+                continue
+            if not FEEDPARSER_AVAILABLE:
+                logger.warning(f"Cannot parse {source} without feedparser")
+                continue
+            added[source] = self.merge(source, feedparser.parse(body).entries)
+            print(f"OK Fetched {added[source]} new articles from {source}")
+        return added
+    
+    def _articles(self, hours):
+        cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
         all_articles = []
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        for source, feed_url in self.feeds.items():
-            try:
-                feed = feedparser.parse(feed_url)
-                
-                for entry in feed.entries[:20]:  # Limit to 20 per source
-                    # Parse published time
-                    pub_time = datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now()
-                    
-                    if pub_time > cutoff_time:
-                        article = {
-                            'source': source,
-                            'title': entry.title,
-                            'link': entry.link,
-                            'published': pub_time.isoformat(),
-                            'summary': entry.get('summary', '')[:200],
-                            'relevance_score': self._calculate_relevance(entry.title + ' ' + entry.get('summary', ''))
-                        }
-                        all_articles.append(article)
-                
-                print(f"OK Fetched {len([a for a in all_articles if a['source'] == source])} articles from {source}")
-                
-            except Exception as e:
-                print(f"Error fetching from {source}: {e}")
+        for store in self.entries.values():
+            newest = sorted(store.values(), key=lambda a: a['published'], reverse=True)[:20]  # Limit to 20 per source
+            all_articles.extend(a for a in newest if a['published'] > cutoff)
         
         # Sort by relevance and time
         all_articles.sort(key=lambda x: (x['relevance_score'], x['published']), reverse=True)
-        
         return all_articles
     
+    async def afetch_news(self, hours=24):
+        """fetch_news for callers already inside an event loop"""
+        await self.refresh()
+        return self._articles(hours)
+    
+    def fetch_news(self, hours=24):
+        """Fetch news from all sources (cached for ttl seconds)"""
+        return asyncio.run(self.afetch_news(hours))
+    
     def _calculate_relevance(self, text):
         """Calculate relevance score based on keywords"""
-        text_lower = text.lower()
-        score = 0
-        
-        for keyword in self.keywords:
-            if keyword in text_lower:
-                score += 1
-                if keyword in ['neo', 'volatility', 'oracle']:
-                    score += 2  # Boost for key topics
+        if self._matcher_keywords != self.keywords:
+            # One pass for every keyword; the lookahead also finds keywords inside longer matches
+            ordered = sorted(set(k.lower() for k in self.keywords), key=len, reverse=True)
+            self._matcher = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))', re.IGNORECASE)
+            self._matcher_keywords = list(self.keywords)
         
-        return score
+        found = {m.group(1).lower() for m in self._matcher.finditer(text)}
+        return sum(3 if keyword in self.boosted else 1 for keyword in found)
     
     def get_top_headlines(self, limit=10):
         """Get top headlines"""
@@ -1,6 +1,23 @@
 """
 Real-time streaming infrastructure for AgenticSpoons
 """
-from .redis_stream import RedisStreamer, KafkaStreamer, StreamingIntegration, streaming
+from .redis_stream import (
+    RedisStreamer, AsyncRedisStreamer, StreamConsumer, KafkaStreamer, StreamingIntegration,
+    streaming
+)
+from .codecs import JsonCodec, StructCodec, MsgpackCodec, CodecError, get_codec, decode_payload
 
-__all__ = ['RedisStreamer', 'KafkaStreamer', 'StreamingIntegration', 'streaming']
+__all__ = [
+    'RedisStreamer',
+    'AsyncRedisStreamer',
+    'StreamConsumer',
+    'KafkaStreamer',
+    'StreamingIntegration',
+    'streaming',
+    'JsonCodec',
+    'StructCodec',
+    'MsgpackCodec',
+    'CodecError',
+    'get_codec',
+    'decode_payload',
+]
@@ -0,0 +1,158 @@
+"""
+Versioned payload codecs for Redis stream entries, pub/sub and cache
+
+Every encoded payload starts with a version byte, so readers can decode
+whatever a writer produced, including pre-codec entries:
+
+    legacy  stream fields as strings, pub/sub and cache as JSON text ('{...')
+    1       packed struct: <BH> version + presence mask, int64 timestamp
+            (microseconds), one float64 per present field, JSON tail for extras
+    2       msgpack (optional dependency)
+"""
+import json
+import struct
+from datetime import datetime
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+STRUCT_VERSION = 1
+MSGPACK_VERSION = 2
+
+# Append only: bit positions are part of the stored format
+STRUCT_FIELDS = (
+    'price',
+    'realized_vol',
+    'implied_vol',
+    'garch_forecast',
+    'spread',
+    'volume',
+    'garman_klass_vol',
+    'realized_vol_30d',
+)
+TIMESTAMP_BIT = 1 << 14
+EXTRAS_BIT = 1 << 15
+
+HEADER = struct.Struct('<BH')
+TIMESTAMP = struct.Struct('<q')
+VALUE = struct.Struct('<d')
+
+class CodecError(ValueError):
+    """Payload that no known codec version can decode"""
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+class JsonCodec:
+    """Legacy text encoding, kept for compatibility with old readers"""
+
+    name = 'json'
+
+    def encode(self, record: dict) -> str:
+        return json.dumps(record)
+
+class StructCodec:
+    """Fixed-layout float64 packing for the known numeric fields"""
+
+    name = 'struct'
+
+    def encode(self, record: dict) -> bytes:
+        mask = 0
+        values = []
+        extras = {}
+
+        for key, value in record.items():
+            if key == 'timestamp' and isinstance(value, str):
+                try:
+                    micros = int(round(datetime.fromisoformat(value).timestamp() * 1_000_000))
+                    mask |= TIMESTAMP_BIT
+                    continue
+                except ValueError:
+                    pass
+            if key in STRUCT_FIELDS and _is_number(value):
+                mask |= 1 << STRUCT_FIELDS.index(key)
+            else:
+                extras[key] = value
+
+        for i, name in enumerate(STRUCT_FIELDS):
+            if mask & (1 << i):
+                values.append(VALUE.pack(float(record[name])))
+
+        parts = [HEADER.pack(STRUCT_VERSION, mask | (EXTRAS_BIT if extras else 0))]
+        if mask & TIMESTAMP_BIT:
+            parts.append(TIMESTAMP.pack(micros))
+        parts.extend(values)
+        if extras:
+            parts.append(json.dumps(extras).encode('utf-8'))
+        return b''.join(parts)
+
+    @staticmethod
+    def decode(payload: bytes) -> dict:
+        _, mask = HEADER.unpack_from(payload, 0)
+        offset = HEADER.size
+        record = {}
+
+        if mask & TIMESTAMP_BIT:
+            (micros,) = TIMESTAMP.unpack_from(payload, offset)
+            offset += TIMESTAMP.size
+            record['timestamp'] = datetime.fromtimestamp(micros / 1_000_000).isoformat()
+
+        for i, name in enumerate(STRUCT_FIELDS):
+            if mask & (1 << i):
+                (record[name],) = VALUE.unpack_from(payload, offset)
+                offset += VALUE.size
+
+        if mask & EXTRAS_BIT:
+            record.update(json.loads(payload[offset:].decode('utf-8')))
+        return record
+
+class MsgpackCodec:
+    """msgpack encoding; lossless for any JSON-compatible record"""
+
+    name = 'msgpack'
+
+    def encode(self, record: dict) -> bytes:
+        return bytes([MSGPACK_VERSION]) + msgpack.packb(record, use_bin_type=True)
+
+    @staticmethod
+    def decode(payload: bytes) -> dict:
+        if not MSGPACK_AVAILABLE:
+            raise CodecError("msgpack payload but msgpack is not installed")
+        return msgpack.unpackb(payload[1:], raw=False)
+
+CODECS = {
+    'json': JsonCodec,
+    'struct': StructCodec,
+    'msgpack': MsgpackCodec,
+}
+
+def get_codec(name: str):
+    """Codec instance by name; msgpack falls back to struct if not installed"""
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec: {name} (choose from {sorted(CODECS)})")
+    if name == 'msgpack' and not MSGPACK_AVAILABLE:
+        from loguru import logger
+        logger.warning("msgpack not installed, using struct codec. Install with: pip install msgpack")
+        name = 'struct'
+    return CODECS[name]()
+
+def decode_payload(payload) -> dict:
+    """Decode a pub/sub or cache payload written by any codec version"""
+    if isinstance(payload, str):
+        return json.loads(payload)
+    if not payload:
+        raise CodecError("Empty payload")
+    if payload[:1] == b'{':
+        return json.loads(payload)
+    version = payload[0]
+    try:
+        if version == STRUCT_VERSION:
+            return StructCodec.decode(payload)
+        if version == MSGPACK_VERSION:
+            return MsgpackCodec.decode(payload)
+    except (struct.error, ValueError) as e:
+        raise CodecError(f"Corrupt v{version} payload: {e}") from e
+    raise CodecError(f"Unknown payload version: {version}")
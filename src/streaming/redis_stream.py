@@ -3,30 +3,108 @@ Real-time data streaming with Redis
 """
 import json
 import asyncio
+import os
+import socket
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from loguru import logger
 
+from .codecs import JsonCodec, decode_payload, get_codec
+
 try:
     import redis
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
     logger.warning("Redis not installed. Install with: pip install redis")
 
+STREAM_MAXLEN = 1000  # Keep last 1000 entries per pair
+LATEST_TTL = 3600     # 1 hour TTL on the latest-value cache
+STREAM_FIELDS = ('price', 'realized_vol', 'implied_vol', 'garch_forecast', 'spread')
+DEFAULT_CODEC = os.getenv("REDIS_CODEC", "struct")
+KAFKA_TOPIC = os.getenv("KAFKA_TOPIC", "volatility")
+
+def _text(value):
+    """Redis replies are bytes unless the client decodes responses"""
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def _require_raw(client):
+    """Binary codec payloads are not utf-8, so a decoding client would lose them"""
+    pool = getattr(client, 'connection_pool', None)
+    if getattr(pool, 'connection_kwargs', {}).get('decode_responses'):
+        raise ValueError("Redis client must use decode_responses=False: stream entries are binary")
+    return client
+
+def queue_publish(pipe, pair, data, timestamp=None, codec=None):
+    """Queue the stream, pub/sub and cache writes for one update on a pipeline
+    
+    Works for both sync and asyncio pipelines: queuing is identical, only
+    execute() differs. The same codec encodes all three copies.
+    """
+    codec = codec or JsonCodec()
+    timestamp = timestamp or datetime.now().isoformat()
+    entry = {'timestamp': timestamp}
+    entry.update((field, data.get(field, 0)) for field in STREAM_FIELDS)
+    
+    if isinstance(codec, JsonCodec):
+        # Legacy layout: one stringified stream field per value
+        message = {k: str(v) for k, v in entry.items()}
+    else:
+        message = {'d': codec.encode(entry)}
+    payload = codec.encode(data)
+    
+    # Add to stream with max length to prevent unlimited growth
+    pipe.xadd(f"volatility:{pair}", message, maxlen=STREAM_MAXLEN, approximate=True)
+    # Also publish to pub/sub for instant notifications
+    pipe.publish(f"volatility_updates:{pair}", payload)
+    # Cache latest value
+    pipe.set(f"latest:{pair}", payload, ex=LATEST_TTL)
+
+STREAM_PREFIX = "volatility:"
+
+def decode_stream_entry(entry_id, fields):
+    """Stream entry back to a record, whichever codec wrote it"""
+    fields = {_text(k): v for k, v in fields.items()}
+    if 'd' in fields:
+        record = decode_payload(fields['d'])
+    else:
+        record = {k: _text(v) for k, v in fields.items()}  # legacy stringified floats
+    
+    decoded = {'id': _text(entry_id), 'timestamp': record.get('timestamp', '')}
+    decoded.update((field, float(record.get(field, 0))) for field in STREAM_FIELDS)
+    return decoded
+
+def _batch_items(updates):
+    """Accept {pair: data} or an iterable of (pair, data)"""
+    return list(updates.items()) if isinstance(updates, dict) else list(updates)
+
 class RedisStreamer:
-    """Redis-based real-time data streaming"""
+    """Redis-based real-time data streaming
     
-    def __init__(self, host='localhost', port=6379):
+    codec selects how new entries are written ('struct', 'msgpack' or the
+    legacy 'json'); reads decode every version.
+    """
+    
+    def __init__(self, host='localhost', port=6379, client=None, codec=DEFAULT_CODEC):
+        self.codec = get_codec(codec)
+        if client is not None:
+            self.redis_client = _require_raw(client)
+            return
+        
         if not REDIS_AVAILABLE:
             logger.warning("Redis client not available")
             self.redis_client = None
             return
         
         try:
+            # Raw bytes: binary codecs are not valid utf-8
             self.redis_client = redis.Redis(
                 host=host,
                 port=port,
-                decode_responses=True,
+                decode_responses=False,
                 socket_connect_timeout=2
             )
             # Test connection
@@ -42,36 +120,10 @@ class RedisStreamer:
             return False
         
         try:
-            # Add to stream
-            stream_key = f"volatility:{pair}"
-            message = {
-                'timestamp': datetime.now().isoformat(),
-                'price': str(data.get('price', 0)),
-                'realized_vol': str(data.get('realized_vol', 0)),
-                'implied_vol': str(data.get('implied_vol', 0)),
-                'garch_forecast': str(data.get('garch_forecast', 0)),
-                'spread': str(data.get('spread', 0))
-            }
-            
-            # Add to stream with max length to prevent unlimited growth
-            self.redis_client.xadd(
-                stream_key,
-                message,
-                maxlen=1000,  # Keep last 1000 entries
-                approximate=True
-            )
-            
-            # Also publish to pub/sub for instant notifications
-            channel = f"volatility_updates:{pair}"
-            self.redis_client.publish(channel, json.dumps(data))
-            
-            # Cache latest value
-            cache_key = f"latest:{pair}"
-            self.redis_client.setex(
-                cache_key,
-                3600,  # 1 hour TTL
-                json.dumps(data)
-            )
+            # XADD, PUBLISH and SETEX go out in a single round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            queue_publish(pipe, pair, data, codec=self.codec)
+            pipe.execute()
             
             logger.debug(f"Published {pair} to Redis")
             return True
@@ -80,6 +132,34 @@ class RedisStreamer:
             logger.error(f"Redis publish failed: {e}")
             return False
     
+    def publish_batch(self, updates, transaction=False):
+        """Publish updates for many pairs in one pipelined round trip
+        
+        updates: {pair: data} or iterable of (pair, data).
+        transaction=True wraps the batch in MULTI/EXEC so readers never
+        see a partially applied round.
+        """
+        if not self.redis_client:
+            return 0
+        
+        items = _batch_items(updates)
+        if not items:
+            return 0
+        
+        try:
+            timestamp = datetime.now().isoformat()
+            pipe = self.redis_client.pipeline(transaction=transaction)
+            for pair, data in items:
+                queue_publish(pipe, pair, data, timestamp, self.codec)
+            pipe.execute()
+            
+            logger.debug(f"Published batch of {len(items)} pairs to Redis")
+            return len(items)
+            
+        except Exception as e:
+            logger.error(f"Redis batch publish failed: {e}")
+            return 0
+    
     def get_latest(self, pair):
         """Get latest volatility from cache"""
         if not self.redis_client:
@@ -90,7 +170,7 @@ class RedisStreamer:
             data = self.redis_client.get(cache_key)
             
             if data:
-                return json.loads(data)
+                return decode_payload(data)
             return None
         except Exception as e:
             logger.error(f"Redis get failed: {e}")
@@ -106,19 +186,7 @@ class RedisStreamer:
             
             entries = self.redis_client.xrevrange(stream_key, count=count)
             
-            results = []
-            for entry_id, fields in entries:
-                results.append({
-                    'id': entry_id,
-                    'timestamp': fields['timestamp'],
-                    'price': float(fields['price']),
-                    'realized_vol': float(fields['realized_vol']),
-                    'implied_vol': float(fields['implied_vol']),
-                    'garch_forecast': float(fields['garch_forecast']),
-                    'spread': float(fields['spread'])
-                })
-            
-            return results
+            return [decode_stream_entry(entry_id, fields) for entry_id, fields in entries]
         except Exception as e:
             logger.error(f"Redis get_stream failed: {e}")
             return []
@@ -129,19 +197,25 @@ class RedisStreamer:
             logger.warning("Redis not available for subscription")
             return
         
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
         try:
-            pubsub = self.redis_client.pubsub()
             channel = f"volatility_updates:{pair}"
             pubsub.subscribe(channel)
             
             logger.info(f"Subscribed to {channel}")
             
-            for message in pubsub.listen():
-                if message['type'] == 'message':
-                    data = json.loads(message['data'])
+            while True:
+                # The blocking wait runs in a worker thread so the event loop keeps going
+                message = await asyncio.to_thread(pubsub.get_message, timeout=1.0)
+                if message and message['type'] == 'message':
+                    data = decode_payload(message['data'])
                     await callback(data)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Redis subscription failed: {e}")
+        finally:
+            pubsub.close()
     
     def get_all_pairs(self):
         """Get list of all pairs with data"""
@@ -149,63 +223,362 @@ class RedisStreamer:
             return []
         
         try:
-            keys = self.redis_client.keys("latest:*")
-            return [key.replace("latest:", "") for key in keys]
+            # SCAN walks the keyspace incrementally instead of blocking Redis like KEYS
+            keys = self.redis_client.scan_iter(match="latest:*", count=500)
+            return [_text(key).replace("latest:", "") for key in keys]
         except Exception as e:
             logger.error(f"Redis get_all_pairs failed: {e}")
             return []
 
-class KafkaStreamer:
-    """Kafka-based high-throughput streaming"""
+class AsyncRedisStreamer:
+    """asyncio Redis publisher that never blocks the agent event loop"""
     
-    def __init__(self, bootstrap_servers='localhost:9092'):
-        try:
-            from kafka import KafkaProducer
-            
-            self.producer = KafkaProducer(
-                bootstrap_servers=bootstrap_servers,
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                request_timeout_ms=5000,
-                max_block_ms=5000
+    def __init__(self, host='localhost', port=6379, client=None, codec=DEFAULT_CODEC):
+        self.host = host
+        self.port = port
+        self.redis_client = _require_raw(client) if client is not None else None
+        self.codec = get_codec(codec)
+    
+    async def connect(self):
+        """Create and verify the client; returns False if Redis is unreachable"""
+        if self.redis_client is None:
+            if not REDIS_AVAILABLE:
+                logger.warning("Redis client not available")
+                return False
+            self.redis_client = aioredis.Redis(
+                host=self.host,
+                port=self.port,
+                decode_responses=False,
+                socket_connect_timeout=2
             )
+        
+        try:
+            await self.redis_client.ping()
+            logger.info(f"✅ Async Redis connected: {self.host}:{self.port}")
+            return True
+        except Exception as e:
+            logger.warning(f"Async Redis connection failed: {e}")
+            self.redis_client = None
+            return False
+    
+    async def publish_volatility(self, pair, data):
+        """Publish one update (stream, pub/sub, cache) in one round trip"""
+        return await self.publish_batch([(pair, data)]) == 1
+    
+    async def publish_batch(self, updates, transaction=False):
+        """Publish many pairs in one pipelined round trip; see RedisStreamer.publish_batch"""
+        if not self.redis_client:
+            return 0
+        
+        items = _batch_items(updates)
+        if not items:
+            return 0
+        
+        try:
+            timestamp = datetime.now().isoformat()
+            pipe = self.redis_client.pipeline(transaction=transaction)
+            for pair, data in items:
+                queue_publish(pipe, pair, data, timestamp, self.codec)
+            await pipe.execute()
             
-            logger.info(f"✅ Kafka producer connected: {bootstrap_servers}")
-            self.available = True
+            logger.debug(f"Published batch of {len(items)} pairs to Redis")
+            return len(items)
             
-        except ImportError:
-            logger.warning("Kafka not installed. Install with: pip install kafka-python")
-            self.producer = None
-            self.available = False
         except Exception as e:
-            logger.warning(f"Kafka connection failed: {e}")
-            self.producer = None
-            self.available = False
+            logger.error(f"Async Redis batch publish failed: {e}")
+            return 0
+    
+    async def subscribe(self, pair, callback):
+        """Subscribe to real-time pub/sub updates without blocking the loop"""
+        if not self.redis_client:
+            logger.warning("Redis not available for subscription")
+            return
+        
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            channel = f"volatility_updates:{pair}"
+            await pubsub.subscribe(channel)
+            logger.info(f"Subscribed to {channel}")
+            
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    await callback(decode_payload(message['data']))
+        finally:
+            await pubsub.unsubscribe()
+    
+    async def get_all_pairs(self):
+        """Pairs with a cached latest value, discovered with SCAN"""
+        if not self.redis_client:
+            return []
+        return [_text(key).replace("latest:", "")
+                async for key in self.redis_client.scan_iter(match="latest:*", count=500)]
+    
+    async def close(self):
+        """Close the connection pool"""
+        if self.redis_client:
+            close = getattr(self.redis_client, 'aclose', None) or self.redis_client.close
+            await close()
+            self.redis_client = None
+
+class StreamConsumer:
+    """Consumer-group reader over the volatility:{pair} streams
+    
+    Replicas sharing a group split the entries between them: each entry is
+    delivered to one consumer and stays pending until acknowledged. Entries
+    left pending by a consumer that died are reclaimed with XAUTOCLAIM once
+    idle for claim_idle_ms. Streams are found with SCAN, never KEYS.
+    """
+    
+    def __init__(self, client, group='agentspoons', consumer=None, pairs=None,
+                 count=100, block_ms=1000, claim_idle_ms=30000, start_id='0'):
+        self.redis_client = _require_raw(client)  # redis.asyncio client, decode_responses=False
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.streams = {f"{STREAM_PREFIX}{pair}" for pair in pairs or []}
+        self.count = count
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.start_id = start_id
+        self.running = False
+        self._grouped = set()
+    
+    async def ensure_group(self, stream):
+        """Create the consumer group (and stream) if missing"""
+        if stream in self._grouped:
+            return
+        try:
+            await self.redis_client.xgroup_create(stream, self.group, id=self.start_id, mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._grouped.add(stream)
+    
+    async def discover(self):
+        """Add every existing volatility stream; returns the newly found ones"""
+        found = set()
+        async for key in self.redis_client.scan_iter(match=f"{STREAM_PREFIX}*", count=500, _type='stream'):
+            key = _text(key)
+            if key not in self.streams:
+                found.add(key)
+        self.streams |= found
+        for stream in self.streams:
+            await self.ensure_group(stream)
+        return found
+    
+    @staticmethod
+    def _decode(stream, entries):
+        pair = _text(stream)[len(STREAM_PREFIX):]
+        return [(pair, entry_id, decode_stream_entry(entry_id, fields))
+                for entry_id, fields in entries if fields]
+    
+    async def read(self):
+        """Next batch of undelivered entries as (pair, entry_id, record)"""
+        if not self.streams:
+            return []
+        for stream in self.streams:
+            await self.ensure_group(stream)
+        
+        response = await self.redis_client.xreadgroup(
+            self.group, self.consumer, {stream: '>' for stream in self.streams},
+            count=self.count, block=self.block_ms)
+        
+        batch = []
+        for stream, entries in response or []:
+            batch.extend(self._decode(stream, entries))
+        return batch
+    
+    async def recover_pending(self):
+        """Claim entries idle past claim_idle_ms from any consumer in the group"""
+        claimed = []
+        for stream in self.streams:
+            await self.ensure_group(stream)
+            start = '0-0'
+            while True:
+                response = await self.redis_client.xautoclaim(
+                    stream, self.group, self.consumer, min_idle_time=self.claim_idle_ms,
+                    start_id=start, count=self.count)
+                start, entries = response[0], response[1]
+                claimed.extend(self._decode(stream, entries))
+                if start in ('0-0', b'0-0'):
+                    break
+        return claimed
+    
+    async def ack(self, pair, *entry_ids):
+        """Acknowledge processed entries so they leave the pending list"""
+        if entry_ids:
+            await self.redis_client.xack(f"{STREAM_PREFIX}{pair}", self.group, *entry_ids)
+    
+    async def _process(self, batch, callback):
+        acked = 0
+        for pair, entry_id, record in batch:
+            try:
+                await callback(pair, record)
+            except Exception as e:
+                # Left pending: reclaimed after claim_idle_ms by recover_pending()
+                logger.error(f"Consumer callback failed for {pair} {entry_id}: {e}")
+                continue
+            await self.ack(pair, entry_id)
+            acked += 1
+        return acked
+    
+    async def run(self, callback, discover_interval=30.0):
+        """Deliver entries to `async callback(pair, record)` until stop()"""
+        self.running = True
+        last_maintenance = 0.0
+        loop = asyncio.get_running_loop()
+        
+        while self.running:
+            try:
+                if loop.time() - last_maintenance >= discover_interval:
+                    await self.discover()
+                    await self._process(await self.recover_pending(), callback)
+                    last_maintenance = loop.time()
+                
+                batch = await self.read()
+                if batch:
+                    await self._process(batch, callback)
+                elif not self.streams:
+                    await asyncio.sleep(self.block_ms / 1000)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stream consumer error: {e}")
+                await asyncio.sleep(1)
+    
+    def stop(self):
+        """Stop after the current batch"""
+        self.running = False
+
+class KafkaStreamer:
+    """Kafka-based high-throughput streaming
+    
+    All pairs go to one topic keyed by pair, so the partitioner keeps each
+    pair ordered on a single partition. Sends never block on the broker: the
+    producer batches by linger_ms/batch_size, delivery callbacks feed the
+    metrics, and a background thread flushes every flush_interval seconds.
+    """
+    
+    def __init__(self, bootstrap_servers='localhost:9092', topic=KAFKA_TOPIC, linger_ms=20,
+                 batch_size=64 * 1024, compression_type=None, flush_interval=1.0, producer=None):
+        self.bootstrap_servers = bootstrap_servers
+        self.topic = topic
+        self.flush_interval = flush_interval
+        self.metrics = {'sent': 0, 'delivered': 0, 'failed': 0, 'flushes': 0, 'last_error': None}
+        self.latencies = deque(maxlen=1000)  # Send -> ack, seconds
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        
+        if producer is not None:
+            self.producer = producer
+            self.available = True
+        else:
+            try:
+                from kafka import KafkaProducer
+                
+                self.producer = KafkaProducer(
+                    bootstrap_servers=bootstrap_servers,
+                    key_serializer=lambda k: k.encode('utf-8'),
+                    value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                    linger_ms=linger_ms,
+                    batch_size=batch_size,
+                    compression_type=compression_type,
+                    acks=1,
+                    request_timeout_ms=5000,
+                    max_block_ms=5000
+                )
+                
+                logger.info(f"✅ Kafka producer connected: {bootstrap_servers} (topic {topic})")
+                self.available = True
+                
+            except ImportError:
+                logger.warning("Kafka not installed. Install with: pip install kafka-python")
+                self.producer = None
+                self.available = False
+            except Exception as e:
+                logger.warning(f"Kafka connection failed: {e}")
+                self.producer = None
+                self.available = False
+        
+        if self.available and flush_interval:
+            self._flusher = threading.Thread(target=self._flush_loop, name="kafka-flush", daemon=True)
+            self._flusher.start()
     
     def publish_volatility(self, pair, data):
-        """Publish to Kafka topic"""
+        """Queue a record keyed by pair; delivery is reported via callbacks"""
         if not self.available or not self.producer:
             return False
         
         try:
-            topic = f"volatility.{pair.replace('/', '.')}"
-            
-            self.producer.send(topic, {
+            future = self.producer.send(self.topic, key=pair, value={
                 'timestamp': datetime.now().isoformat(),
                 'pair': pair,
                 **data
             })
-            
-            self.producer.flush()
-            
-            logger.debug(f"Published {pair} to Kafka")
+            with self._lock:
+                self.metrics['sent'] += 1
+            future.add_callback(self._on_delivery, time.perf_counter())
+            future.add_errback(self._on_error)
             return True
             
         except Exception as e:
             logger.error(f"Kafka publish failed: {e}")
+            self._on_error(e)
             return False
     
+    def _on_delivery(self, sent_at, metadata):
+        with self._lock:
+            self.metrics['delivered'] += 1
+            self.latencies.append(time.perf_counter() - sent_at)
+    
+    def _on_error(self, exc):
+        with self._lock:
+            self.metrics['failed'] += 1
+            self.metrics['last_error'] = str(exc)
+        logger.debug(f"Kafka delivery failed: {exc}")
+    
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self, timeout=None):
+        """Block until everything queued so far is acknowledged or failed"""
+        if not self.producer:
+            return
+        try:
+            self.producer.flush(timeout=timeout)
+            with self._lock:
+                self.metrics['flushes'] += 1
+        except Exception as e:
+            logger.warning(f"Kafka flush failed: {e}")
+    
+    def stats(self):
+        """Delivery counters and send -> ack latency in ms"""
+        with self._lock:
+            stats = dict(self.metrics)
+            latencies = sorted(self.latencies)
+        stats['pending'] = stats['sent'] - stats['delivered'] - stats['failed']
+        if latencies:
+            stats['latency_ms'] = {
+                'p50': round(latencies[len(latencies) // 2] * 1000, 3),
+                'p99': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+                'max': round(latencies[-1] * 1000, 3)
+            }
+        return stats
+    
+    def close(self, timeout=5):
+        """Stop the flusher, deliver what is buffered and close the producer"""
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join(timeout=timeout)
+        if self.producer:
+            self.flush(timeout=timeout)
+            self.producer.close(timeout=timeout)
+            self.producer = None
+        self.available = False
+    
     def consume(self, pair, callback):
-        """Consume from Kafka topic"""
+        """Consume records for one pair (or every pair with pair=None)"""
         if not self.available:
             logger.warning("Kafka not available")
             return
@@ -213,19 +586,19 @@ class KafkaStreamer:
         try:
             from kafka import KafkaConsumer
             
-            topic = f"volatility.{pair.replace('/', '.')}"
-            
             consumer = KafkaConsumer(
-                topic,
-                bootstrap_servers='localhost:9092',
+                self.topic,
+                bootstrap_servers=self.bootstrap_servers,
+                key_deserializer=lambda k: k.decode('utf-8') if k else None,
                 value_deserializer=lambda m: json.loads(m.decode('utf-8')),
                 auto_offset_reset='latest'
             )
             
-            logger.info(f"Consuming from {topic}")
+            logger.info(f"Consuming {pair or 'all pairs'} from {self.topic}")
             
             for message in consumer:
-                callback(message.value)
+                if pair is None or message.key == pair:
+                    callback(message.value)
                 
         except Exception as e:
             logger.error(f"Kafka consume failed: {e}")
@@ -265,6 +638,20 @@ class StreamingIntegration:
         
         return success
     
+    def publish_batch(self, updates):
+        """Publish a round of updates for many pairs to all configured streams"""
+        items = _batch_items(updates)
+        published = 0
+        
+        if self.redis:
+            published = self.redis.publish_batch(items)
+        
+        if self.kafka:
+            for pair, data in items:
+                self.kafka.publish_volatility(pair, data)
+        
+        return published
+    
     def get_latest(self, pair):
         """Get latest data (prefer Redis cache)"""
         if self.redis:
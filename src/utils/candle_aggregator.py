@@ -0,0 +1,189 @@
+"""
+Streaming tick-to-candle aggregation
+
+CandleAggregator folds trades, quotes or lower-timeframe candles into
+candles for several timeframes at once. Buckets are aligned to the
+epoch (a 5m candle starts on a multiple of 300s), each open candle is
+updated in O(1) per tick, and volume and notional accumulate so VWAP
+stays exact. A candle closes when the first tick of a later bucket
+arrives or when close_due() passes its end; closed candles go to every
+listener and into a bounded per-timeframe history.
+"""
+import inspect
+import re
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+from loguru import logger
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_timeframe(timeframe: Union[str, int]) -> int:
+    """'30s', '1m', '5m', '1h', '1d' (or plain seconds) -> seconds"""
+    if isinstance(timeframe, (int, float)):
+        return int(timeframe)
+    match = re.fullmatch(r'(\d+)([smhd])', timeframe.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid timeframe: {timeframe!r} (use e.g. '30s', '5m', '1h')")
+    return int(match.group(1)) * UNITS[match.group(2)]
+
+def _epoch(ts: Union[datetime, float, int, str]) -> float:
+    """Seconds since the epoch; naive datetimes are read as UTC and written back the same way"""
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        ts = pd.Timestamp(ts).to_pydatetime()
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+class _Bar:
+    """Open candle being accumulated"""
+
+    __slots__ = ('start', 'open', 'high', 'low', 'close', 'volume', 'notional', 'trades')
+
+    def __init__(self, start: int, open_: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = open_
+        self.volume = self.notional = 0.0
+        self.trades = 0
+
+    def to_dict(self, pair: str, timeframe: str) -> Dict:
+        return {
+            'pair': pair,
+            'timeframe': timeframe,
+            # Naive in, naive out: bucket starts keep the wall clock of the input ticks
+            'timestamp': datetime.fromtimestamp(self.start, timezone.utc).replace(tzinfo=None),
+            'open': self.open, 'high': self.high, 'low': self.low, 'close': self.close,
+            'volume': self.volume,
+            'vwap': self.notional / self.volume if self.volume > 0 else self.close,
+            'trades': self.trades,
+        }
+
+class CandleAggregator:
+    """Incremental multi-timeframe candles from ticks"""
+
+    def __init__(self, timeframes: Iterable[str] = ('1m', '5m', '1h'), history: int = 1000):
+        self.timeframes = {tf: parse_timeframe(tf) for tf in timeframes}
+        self.history = history
+        self.open_bars: Dict[Tuple[str, str], _Bar] = {}
+        self.closed: Dict[Tuple[str, str], Deque[Dict]] = {}
+        self.watermark: Dict[Tuple[str, str], int] = {}  # Start of the last closed bucket
+        self.listeners: List[Callable] = []
+        self.stats = {'ticks': 0, 'candles': 0, 'late': 0}
+
+    def add_listener(self, callback: Callable):
+        """Register a callback (sync or async) receiving each closed candle"""
+        self.listeners.append(callback)
+
+    def update(self, pair: str, price: float, size: float = 0.0, timestamp=None,
+               high: Optional[float] = None, low: Optional[float] = None,
+               open_: Optional[float] = None, vwap: Optional[float] = None) -> List[Dict]:
+        """Apply one tick (or a finer candle via open_/high/low) and return candles it closed
+
+        Ticks for a bucket that is already closed can't be applied and
+        are counted as late for that timeframe.
+        """
+        t = _epoch(timestamp if timestamp is not None else datetime.now())
+        high = price if high is None else high
+        low = price if low is None else low
+        open_ = price if open_ is None else open_
+        notional = (price if vwap is None else vwap) * size
+        self.stats['ticks'] += 1
+
+        closed = []
+        for tf, seconds in self.timeframes.items():
+            key = (pair, tf)
+            start = int(t // seconds) * seconds
+            bar = self.open_bars.get(key)
+            if bar is not None:
+                late = start < bar.start
+            else:
+                late = key in self.watermark and start <= self.watermark[key]
+            if late:
+                self.stats['late'] += 1
+                continue
+            if bar is None or start > bar.start:
+                if bar is not None:
+                    closed.append(self._close(key, bar))
+                bar = self.open_bars[key] = _Bar(start, open_)
+            bar.high = max(bar.high, high)
+            bar.low = min(bar.low, low)
+            bar.close = price
+            bar.volume += size
+            bar.notional += notional
+            bar.trades += 1
+        return closed
+
+    def update_candle(self, pair: str, candle: Dict) -> List[Dict]:
+        """Fold a finer candle (e.g. one 30s DEX poll) into every timeframe"""
+        return self.update(pair, candle['close'], candle.get('volume') or 0.0, candle.get('timestamp'),
+                           high=candle.get('high'), low=candle.get('low'),
+                           open_=candle.get('open'), vwap=candle.get('vwap'))
+
+    def close_due(self, now=None) -> List[Dict]:
+        """Close every open candle whose period has ended by `now`"""
+        t = _epoch(now if now is not None else datetime.now())
+        closed = []
+        for key, bar in list(self.open_bars.items()):
+            if bar.start + self.timeframes[key[1]] <= t:
+                closed.append(self._close(key, bar))
+                del self.open_bars[key]
+        return closed
+
+    def _close(self, key: Tuple[str, str], bar: _Bar) -> Dict:
+        candle = bar.to_dict(*key)
+        self.watermark[key] = bar.start
+        if key not in self.closed:
+            self.closed[key] = deque(maxlen=self.history)
+        self.closed[key].append(candle)
+        self.stats['candles'] += 1
+        return candle
+
+    async def publish(self, candles: List[Dict]):
+        """Hand closed candles to listeners; a failing listener doesn't stop the rest"""
+        for candle in candles:
+            for callback in self.listeners:
+                try:
+                    result = callback(candle)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.error(f"Candle listener error: {e}")
+
+    async def ingest(self, pair: str, price: float, size: float = 0.0, timestamp=None) -> List[Dict]:
+        """update() and publish what it closed"""
+        closed = self.update(pair, price, size, timestamp)
+        await self.publish(closed)
+        return closed
+
+    async def ingest_candle(self, pair: str, candle: Dict) -> List[Dict]:
+        closed = self.update_candle(pair, candle)
+        await self.publish(closed)
+        return closed
+
+    async def flush(self, now=None) -> List[Dict]:
+        """close_due() and publish, for quiet pairs whose periods ended without a new tick"""
+        closed = self.close_due(now)
+        await self.publish(closed)
+        return closed
+
+    def candles(self, pair: str, timeframe: str, lookback: Optional[int] = None,
+                include_open: bool = False) -> List[Dict]:
+        """Closed candles oldest first, optionally followed by the one still forming"""
+        out = list(self.closed.get((pair, timeframe), ()))
+        if lookback is not None:
+            out = out[-lookback:]
+        bar = self.open_bars.get((pair, timeframe))
+        if include_open and bar is not None:
+            out.append(bar.to_dict(pair, timeframe))
+        return out
+
+    def frame(self, pair: str, timeframe: str, lookback: int = 100) -> pd.DataFrame:
+        """Closed candles as a VolatilityEngine-ready frame"""
+        candles = self.candles(pair, timeframe, lookback)
+        if not candles:
+            return pd.DataFrame()
+        return pd.DataFrame(candles).drop(columns=['pair', 'timeframe'])
@@ -0,0 +1,225 @@
+"""
+Recorded market data replay
+
+MarketReplay streams candles recorded in the market_data table or in
+archive files (JSON, JSONL, CSV, Parquet or a SegmentedLog directory)
+back into the agent pipeline. Candles are grouped by timestamp into
+steps; each step is released when the wall clock reaches its recorded
+offset divided by the speed (1x, Nx), or immediately at max speed.
+Pacing is anchored to the replay start, so sleeps never accumulate
+drift, and candles keep their recorded timestamps.
+
+ReplayRunner drives a MarketDataAgent on a replay plus any downstream
+agents, scheduling each on replay time rather than wall time, so a run
+produces the same results at any speed. At max speed its report is a
+throughput benchmark of the whole stack.
+"""
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.utils.segmented_log import SegmentedLog
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+def _parse_speed(speed: Union[float, str, None]) -> Optional[float]:
+    """None means max speed; accepts numbers, '10x' or 'max'"""
+    if speed is None or (isinstance(speed, str) and speed.lower() in ('max', 'inf', '0')):
+        return None
+    speed = float(str(speed).rstrip('xX'))
+    return speed if speed > 0 and math.isfinite(speed) else None
+
+class MarketReplay:
+    """Time-ordered candle steps from recorded data"""
+
+    def __init__(self, candles: pd.DataFrame, speed: Union[float, str, None] = 1.0):
+        frame = candles.copy()
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], format='ISO8601')
+        if frame['timestamp'].dt.tz is not None:
+            frame['timestamp'] = frame['timestamp'].dt.tz_convert(None)
+        if 'close' not in frame:
+            frame['close'] = frame['price']
+        for column in ('open', 'high', 'low'):
+            frame[column] = frame[column].fillna(frame['close']) if column in frame else frame['close']
+        if 'volume' not in frame:
+            frame['volume'] = 0.0
+        frame = frame.dropna(subset=['close']).sort_values(['timestamp', 'pair'], kind='stable')
+
+        self.speed = _parse_speed(speed)
+        self.pair = frame['pair'].astype(str).to_numpy()
+        self.values = frame[list(OHLCV)].to_numpy(dtype=float)
+        self.values[:, 4] = np.nan_to_num(self.values[:, 4])
+        self.timestamps = [ts.to_pydatetime() for ts in frame['timestamp']]
+        seconds = frame['timestamp'].to_numpy().astype('datetime64[ns]').astype(np.int64) / 1e9
+        # Step k covers rows bounds[k]:bounds[k + 1]
+        self.bounds = np.flatnonzero(np.diff(seconds, prepend=np.nan) != 0).tolist() + [len(frame)]
+        self.offsets = seconds[self.bounds[:-1]] - (seconds[0] if len(seconds) else 0)
+        self.reset()
+
+    @classmethod
+    def from_database(cls, db_path: str, pairs: Optional[Iterable[str]] = None, start=None, end=None,
+                      speed: Union[float, str, None] = 1.0) -> 'MarketReplay':
+        """Candles from AgentSpoonsDB's market_data table"""
+        query = "SELECT pair, timestamp, open, high, low, close, volume FROM market_data WHERE 1=1"
+        params: List = []
+        if pairs:
+            pairs = list(pairs)
+            query += f" AND pair IN ({','.join('?' * len(pairs))})"
+            params += pairs
+        if start is not None:
+            query += " AND timestamp >= ?"
+            params.append(str(start))
+        if end is not None:
+            query += " AND timestamp <= ?"
+            params.append(str(end))
+        with sqlite3.connect(db_path) as conn:
+            candles = pd.read_sql_query(query + " ORDER BY timestamp", conn, params=params)
+        return cls(candles, speed)
+
+    @classmethod
+    def from_archive(cls, path: str, pairs: Optional[Iterable[str]] = None,
+                     speed: Union[float, str, None] = 1.0) -> 'MarketReplay':
+        """Candles from a JSON/JSONL/CSV/Parquet file or a SegmentedLog directory"""
+        if os.path.isdir(path):
+            log = SegmentedLog(path)
+            candles = pd.DataFrame(list(log.read()))
+            log.close()
+        elif path.endswith('.jsonl'):
+            with open(path) as f:
+                candles = pd.DataFrame([json.loads(line) for line in f if line.strip()])
+        elif path.endswith('.json'):
+            with open(path) as f:
+                candles = pd.DataFrame(json.load(f))
+        elif path.endswith('.csv'):
+            candles = pd.read_csv(path)
+        elif path.endswith('.parquet'):
+            candles = pd.read_parquet(path)
+        else:
+            raise ValueError(f"Unsupported archive: {path}")
+        if pairs:
+            candles = candles[candles['pair'].isin(list(pairs))]
+        return cls(candles, speed)
+
+    @classmethod
+    def open(cls, source: str, pairs: Optional[Iterable[str]] = None,
+             speed: Union[float, str, None] = 1.0) -> 'MarketReplay':
+        if source.endswith(('.db', '.sqlite')):
+            return cls.from_database(source, pairs, speed=speed)
+        return cls.from_archive(source, pairs, speed)
+
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+
+    @property
+    def pairs(self) -> List[str]:
+        return sorted(set(self.pair.tolist()))
+
+    def reset(self):
+        self.step = -1
+        self.started = None
+        self.current: Dict[str, Dict] = {}
+        self.stats = {'steps': 0, 'candles': 0, 'behind_seconds': 0.0}
+
+    def now(self) -> Optional[datetime]:
+        """Recorded timestamp of the current step"""
+        return self.timestamps[self.bounds[self.step]] if self.step >= 0 else None
+
+    @property
+    def done(self) -> bool:
+        return self.step + 1 >= len(self)
+
+    async def next_step(self) -> Optional[Dict[str, Dict]]:
+        """Wait for the next step's release time; {pair: candle}, or None when exhausted"""
+        if self.done:
+            self.current = {}
+            return None
+        self.step += 1
+        if self.started is None:
+            self.started = time.monotonic()
+        if self.speed is not None:
+            delay = self.started + self.offsets[self.step] / self.speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.stats['behind_seconds'] = max(self.stats['behind_seconds'], -delay)
+
+        ts = self.now()
+        lo, hi = self.bounds[self.step], self.bounds[self.step + 1]
+        self.current = {
+            self.pair[i]: {'timestamp': ts, **dict(zip(OHLCV, self.values[i].tolist()))}
+            for i in range(lo, hi)
+        }
+        self.stats['steps'] += 1
+        self.stats['candles'] += hi - lo
+        return self.current
+
+    def candles(self, pair: str) -> List[Dict]:
+        """The current step's candle for `pair` in fetch_from_dexs form"""
+        candle = self.current.get(pair)
+        return [candle] if candle else []
+
+class ReplayRunner:
+    """Drive a market data agent on a replay and its downstream agents on replay time"""
+
+    def __init__(self, replay: MarketReplay, market_agent, agents: Iterable = ()):
+        self.replay = replay
+        self.market_agent = market_agent
+        self.agents = list(agents)
+
+    async def run(self, max_steps: Optional[int] = None) -> Dict:
+        """Replay to the end (or max_steps); returns throughput per agent"""
+        timings = {a.agent_id: {'executions': 0, 'seconds': 0.0}
+                   for a in [self.market_agent, *self.agents]}
+        last_run: Dict[str, datetime] = {}
+        started = time.perf_counter()
+        first = None
+
+        while max_steps is None or self.replay.stats['steps'] < max_steps:
+            t0 = time.perf_counter()
+            result = await self.market_agent.execute()
+            if result.get('status') == 'replay_complete':
+                break
+            # Includes the pacing sleep unless replaying at max speed
+            timings[self.market_agent.agent_id]['executions'] += 1
+            timings[self.market_agent.agent_id]['seconds'] += time.perf_counter() - t0
+
+            now = self.replay.now()
+            first = first or now
+            for agent in self.agents:
+                previous = last_run.get(agent.agent_id)
+                if previous is not None and (now - previous).total_seconds() < agent.execution_interval:
+                    continue
+                t0 = time.perf_counter()
+                try:
+                    await agent.execute()
+                except Exception as e:
+                    logger.error(f"[{agent.agent_id}] Replay step failed: {e}")
+                timings[agent.agent_id]['executions'] += 1
+                timings[agent.agent_id]['seconds'] += time.perf_counter() - t0
+                last_run[agent.agent_id] = now
+
+        wall = time.perf_counter() - started
+        replayed = (self.replay.now() - first).total_seconds() if first else 0.0
+        stats = self.replay.stats
+        report = {
+            'steps': stats['steps'],
+            'candles': stats['candles'],
+            'wall_seconds': wall,
+            'replay_seconds': replayed,
+            'speedup': replayed / wall if wall > 0 else None,
+            'candles_per_second': stats['candles'] / wall if wall > 0 else None,
+            'max_lag_seconds': stats['behind_seconds'],
+            'agents': timings,
+        }
+        logger.info(f"Replayed {stats['candles']} candles in {wall:.2f}s "
+                    f"({report['candles_per_second'] or 0:,.0f} candles/s)")
+        return report
@@ -0,0 +1,320 @@
+"""
+Append-only segmented JSONL log with a sidecar index
+
+Records are appended as JSON lines to fixed-size segment files through a
+persistent handle; nothing already written is ever rewritten. A small
+index.json keeps per-key counts, first/last timestamps and, per segment,
+a sparse (timestamp, byte offset) table so time-range reads seek straight
+to the right place. Records must be appended in timestamp order.
+
+The index is saved every index_flush_every appends and on rotate/close;
+on open, any tail written after the last save is rescanned, so a crash
+loses nothing but the time to rescan it.
+
+Segments rotate by size and optionally by age. With compress='gzip' or
+'zstd', a closed segment is rewritten as one independent compressed
+block per sparse-index entry, so a range read decompresses only the
+blocks it touches.
+"""
+import bisect
+import gzip
+import io
+import json
+import os
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+from loguru import logger
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+INDEX_VERSION = 1
+
+def _gzip_compress(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def _zstd_compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=6).compress(data)
+
+def _zstd_decompress(data: bytes) -> bytes:
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True)
+    return reader.read()
+
+# name -> (file suffix, compress block, decompress one or more concatenated blocks)
+CODECS = {
+    'gzip': ('.gz', _gzip_compress, gzip.decompress),
+    'zstd': ('.zst', _zstd_compress, _zstd_decompress),
+}
+
+class SegmentedLog:
+    """Append-only JSONL segments plus an O(1) stats index"""
+
+    def __init__(self, directory: str, key_func: Optional[Callable[[Dict], str]] = None,
+                 time_field: str = 'timestamp', segment_bytes: int = 8 * 1024 * 1024,
+                 sparse_every: int = 256, index_flush_every: int = 64,
+                 segment_seconds: Optional[float] = None, compress: Optional[str] = None):
+        if compress == 'zstd' and not ZSTD_AVAILABLE:
+            logger.warning("zstandard not installed, compressing with gzip. Install with: pip install zstandard")
+            compress = 'gzip'
+        if compress is not None and compress not in CODECS:
+            raise ValueError(f"Unknown compression: {compress} (choose from {sorted(CODECS)})")
+        
+        self.directory = directory
+        self.key_func = key_func or (lambda record: record.get('pair', 'unknown'))
+        self.time_field = time_field
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.compress = compress
+        self.sparse_every = sparse_every
+        self.index_flush_every = index_flush_every
+        self.index_path = os.path.join(directory, 'index.json')
+        self.handle = None
+        self.unsaved = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_index()
+        self._recover_tail()
+
+    # Index
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get('version') == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        index = {'version': INDEX_VERSION, 'total': 0, 'keys': {}, 'segments': []}
+        # Lost or stale index: rebuild from whatever segments exist
+        for name in sorted(n for n in os.listdir(self.directory) if n.startswith('segment-')):
+            index['segments'].append(self._new_segment_entry(name))
+        if index['segments']:
+            self.index = index
+            for segment in index['segments']:
+                if segment.get('codec'):
+                    self._scan_compressed(segment)
+                else:
+                    self._scan(segment)
+            logger.info(f"Rebuilt log index for {self.directory}: {index['total']} records")
+        return index
+
+    def save_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f, separators=(',', ':'))
+        os.replace(tmp, self.index_path)
+        self.unsaved = 0
+
+    @staticmethod
+    def _new_segment_entry(name: str) -> Dict:
+        codec = next((c for c, (suffix, _, _) in CODECS.items() if name.endswith(suffix)), None)
+        return {'name': name, 'count': 0, 'bytes': 0, 'first': None, 'last': None,
+                'keys': {}, 'sparse': [], 'opened': time.time(), 'codec': codec}
+
+    def _account(self, segment: Dict, record: Dict, offset: int, length: int):
+        """Fold one record at `offset` into the segment and global index"""
+        key = self.key_func(record)
+        ts = record.get(self.time_field)
+
+        if segment['count'] % self.sparse_every == 0:
+            segment['sparse'].append([ts, offset])
+        segment['count'] += 1
+        segment['bytes'] = offset + length
+        segment['first'] = segment['first'] if segment['first'] is not None else ts
+        segment['last'] = ts
+        segment['keys'][key] = segment['keys'].get(key, 0) + 1
+
+        stats = self.index['keys'].setdefault(key, {'count': 0, 'first': ts, 'last': ts})
+        stats['count'] += 1
+        stats['last'] = ts
+        self.index['total'] += 1
+
+    def _scan(self, segment: Dict):
+        """Index records past segment['bytes']; drop a torn final line"""
+        path = os.path.join(self.directory, segment['name'])
+        with open(path, 'rb') as f:
+            f.seek(segment['bytes'])
+            offset = segment['bytes']
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                self._account(segment, json.loads(line), offset, len(line))
+                offset += len(line)
+        if os.path.getsize(path) > segment['bytes']:
+            with open(path, 'r+b') as f:
+                f.truncate(segment['bytes'])
+
+    def _scan_compressed(self, segment: Dict):
+        """Index a compressed segment found without an index entry (one block)"""
+        decompress = CODECS[segment.get('codec')][2]
+        with open(os.path.join(self.directory, segment['name']), 'rb') as f:
+            raw = decompress(f.read())
+        offset = 0
+        for line in io.BytesIO(raw):
+            self._account(segment, json.loads(line), offset, len(line))
+            offset += len(line)
+        segment['sparse'] = [[segment['first'], 0, 0]]
+
+    def _recover_tail(self):
+        segments = self.index['segments']
+        if not segments:
+            return
+        segment = segments[-1]
+        path = os.path.join(self.directory, segment['name'])
+        if not segment.get('codec') and os.path.exists(path) and os.path.getsize(path) != segment['bytes']:
+            self._scan(segment)
+            self.save_index()
+        # Closed segments a crash left uncompressed
+        if self.compress:
+            for closed in segments[:-1]:
+                if not closed.get('codec'):
+                    self._compress_segment(closed)
+
+    # Writing
+
+    def _should_rotate(self, segment: Dict) -> bool:
+        if segment.get('codec') or segment['bytes'] >= self.segment_bytes:
+            return True
+        return bool(self.segment_seconds and segment['count']
+                    and time.time() - segment.get('opened', 0) >= self.segment_seconds)
+
+    def _active_segment(self) -> Dict:
+        segments = self.index['segments']
+        if not segments or self._should_rotate(segments[-1]):
+            self._close_handle()
+            if segments:
+                self._on_segment_closed(segments[-1])
+            segments.append(self._new_segment_entry(f"segment-{len(segments) + 1:06d}.jsonl"))
+            self.save_index()
+        if self.handle is None:
+            self.handle = open(os.path.join(self.directory, segments[-1]['name']), 'ab')
+        return segments[-1]
+
+    def _on_segment_closed(self, segment: Dict):
+        """Called once a segment stops receiving appends"""
+        if self.compress and not segment.get('codec'):
+            self._compress_segment(segment)
+
+    def _compress_segment(self, segment: Dict):
+        """Rewrite a closed segment as one compressed block per sparse entry"""
+        if not segment['count']:
+            return
+        suffix, compress, _ = CODECS[self.compress]
+        source = os.path.join(self.directory, segment['name'])
+        name = segment['name'] + suffix
+        target = os.path.join(self.directory, name)
+
+        with open(source, 'rb') as f:
+            raw = f.read(segment['bytes'])
+        bounds = [offset for _, offset, *_ in segment['sparse']] + [segment['bytes']]
+        sparse = []
+        written = 0
+        with open(target + '.tmp', 'wb') as out:
+            for (ts, offset, *_), next_offset in zip(segment['sparse'], bounds[1:]):
+                block = compress(raw[offset:next_offset])
+                out.write(block)
+                sparse.append([ts, offset, written])
+                written += len(block)
+        os.replace(target + '.tmp', target)
+
+        segment.update(name=name, codec=self.compress, sparse=sparse, compressed_bytes=written)
+        self.save_index()
+        os.remove(source)
+        logger.debug(f"Compressed {name}: {segment['bytes']} -> {written} bytes")
+
+    def append(self, record: Dict) -> int:
+        """Append a record; returns its sequence number across the whole log"""
+        segment = self._active_segment()
+        line = (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+        offset = segment['bytes']
+        self.handle.write(line)
+        self.handle.flush()
+        self._account(segment, record, offset, len(line))
+
+        self.unsaved += 1
+        if self.unsaved >= self.index_flush_every:
+            self.save_index()
+        return self.index['total'] - 1
+
+    def _close_handle(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def close(self):
+        self._close_handle()
+        self.save_index()
+
+    # Reading
+
+    def __len__(self) -> int:
+        return self.index['total']
+
+    def stats(self) -> Dict:
+        """Totals, per-key counts and first/last timestamps; no record scan"""
+        segments = self.index['segments']
+        return {
+            'total_records': self.index['total'],
+            'segments': len(segments),
+            'compressed_segments': sum(1 for segment in segments if segment.get('codec')),
+            'keys': {key: dict(stats) for key, stats in self.index['keys'].items()}
+        }
+
+    def _start_block(self, segment: Dict, start) -> int:
+        """Index of the last sparse entry strictly before `start`"""
+        if start is None or not segment['sparse']:
+            return 0
+        i = bisect.bisect_left([entry[0] for entry in segment['sparse']], start)
+        return max(i - 1, 0)
+
+    def _seek_offset(self, segment: Dict, start) -> int:
+        """Uncompressed byte offset to start reading from for `start`"""
+        if not segment['sparse']:
+            return 0
+        return segment['sparse'][self._start_block(segment, start)][1]
+
+    def _lines(self, segment: Dict, start) -> Iterator[bytes]:
+        """Raw lines from the first block that can hold `start`, decompressing lazily"""
+        path = os.path.join(self.directory, segment['name'])
+        if not segment.get('codec'):
+            with open(path, 'rb') as f:
+                f.seek(self._seek_offset(segment, start))
+                yield from f
+            return
+
+        decompress = CODECS[segment.get('codec')][2]
+        sparse = segment['sparse']
+        with open(path, 'rb') as f:
+            for i in range(self._start_block(segment, start), len(sparse)):
+                f.seek(sparse[i][2])
+                block = f.read(sparse[i + 1][2] - sparse[i][2]) if i + 1 < len(sparse) else f.read()
+                yield from io.BytesIO(decompress(block))
+
+    def read(self, key: Optional[str] = None, start=None, end=None) -> Iterator[Dict]:
+        """Records for `key` (or all) with start <= timestamp <= end, in order"""
+        if self.handle is not None:
+            self.handle.flush()
+        for segment in self.index['segments']:
+            if not segment['count'] or (key is not None and key not in segment['keys']):
+                continue
+            if start is not None and segment['last'] < start:
+                continue
+            if end is not None and segment['first'] > end:
+                break
+
+            for line in self._lines(segment, start):
+                if not line.endswith(b'\n'):
+                    break
+                record = json.loads(line)
+                ts = record.get(self.time_field)
+                if end is not None and ts > end:
+                    return
+                if start is not None and ts < start:
+                    continue
+                if key is None or self.key_func(record) == key:
+                    yield record
@@ -0,0 +1,186 @@
+"""
+Tests for alert routing, throttling and queued email against a local SMTP sink
+"""
+import asyncio
+import json
+import time
+from email import message_from_bytes
+
+from src.alerts.alert_router import AlertRouter, AlertStore, EmailQueue, SmtpSender
+from src.alerts.smart_alerts import SmartAlertSystem
+
+
+class SmtpSink:
+    """Just enough SMTP to accept messages and count connections"""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 sink ready\r\n")
+        data, lines = False, []
+        while line := await reader.readline():
+            if data:
+                if line == b".\r\n":
+                    self.messages.append(message_from_bytes(b''.join(lines)))
+                    data, lines = False, []
+                    writer.write(b"250 queued\r\n")
+                else:
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                continue
+            command = line[:4].upper()
+            if command == b'DATA':
+                data = True
+                writer.write(b"354 end with .\r\n")
+            elif command == b'QUIT':
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+
+async def with_sink(test):
+    sink = SmtpSink()
+    server = await asyncio.start_server(sink.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        await test(sink, SmtpSender('127.0.0.1', port))
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+class CollectingQueue:
+    def __init__(self):
+        self.messages = []
+
+    def submit(self, message):
+        self.messages.append(message)
+
+
+def alert(pair='NEO/USDT', alert_type='PRICE_SPIKE', severity='MEDIUM', message='Price surged 6%'):
+    return {'pair': pair, 'type': alert_type, 'severity': severity, 'message': message}
+
+
+class TestAlertRouter:
+    """Dedup, throttling, digests and delivery"""
+
+    def test_repeats_merge_and_excess_is_throttled(self):
+        queue = CollectingQueue()
+        router = AlertRouter(queue, ['ops@example.com'], window=300, per_key_limit=2)
+        assert router.route(alert(), now=0) == 'pending'
+        assert router.route(alert(message='Price surged 7%'), now=1) == 'merged'
+        router.route(alert(pair='GAS/USDT'), now=1)
+        router.flush()
+        assert router.route(alert(), now=10) == 'pending'
+        router.flush()
+        assert router.route(alert(), now=20) == 'throttled'
+        assert router.route(alert(), now=301) == 'pending'  # Oldest send left the window
+        router.flush()
+
+        first, second, third = queue.messages
+        body = first.get_payload()[0].get_payload()
+        assert 'Price surged 7% (x2)' in body and 'GAS/USDT' in body
+        assert '1 more alerts throttled for: PRICE_SPIKE NEO/USDT (1)' in third.get_payload()[0].get_payload()
+        assert router.stats == {'routed': 6, 'merged': 1, 'throttled': 1, 'digests': 3}
+
+    def test_urgent_alert_flushes_immediately_with_worst_severity_first(self):
+        queue = CollectingQueue()
+        router = AlertRouter(queue, ['ops@example.com'])
+        router.route(alert(pair='GAS/USDT'))
+        router.route(alert(alert_type='VOLATILITY_SPIKE', severity='HIGH', message='Vol +45%'))
+        (digest,) = queue.messages
+        assert digest['Subject'] == '[HIGH] AgentSpoons: 2 alerts'
+        body = digest.get_payload()[0].get_payload()
+        assert body.index('VOLATILITY_SPIKE') < body.index('GAS/USDT')
+
+    def test_urgent_storm_shares_digests(self):
+        queue = CollectingQueue()
+        router = AlertRouter(queue, ['ops@example.com'], urgent_interval=1.0)
+        for i in range(150):
+            router.route(alert(pair=f"P{i}/USDT", severity='HIGH'), now=100 + i / 1000)
+        assert len(queue.messages) == 1  # The rest wait out the urgent interval
+        router.route(alert(pair='NEXT/USDT', severity='HIGH'), now=101.5)
+        assert len(queue.messages) == 2
+        assert queue.messages[1]['Subject'] == '[HIGH] AgentSpoons: 150 alerts'
+
+    def test_digest_waits_for_a_loop_when_routed_from_sync_code(self):
+        queue = EmailQueue(SmtpSender())
+        system = SmartAlertSystem(router=AlertRouter(queue, ['ops@example.com']))
+        system.check_spread_alert(iv=0.70, rv=0.50)  # HIGH: flushes at once
+        router = system.router
+        assert router.stats['digests'] == 0 and len(router.pending) == 1
+
+        async def later():
+            digest = router.flush()
+            queue.worker.cancel()
+            return digest
+
+        digest = asyncio.run(later())
+        assert 'SPREAD_ALERT' in digest.get_payload()[0].get_payload()
+        assert router.stats['digests'] == 1 and not router.pending
+        assert queue.stats['queued'] == 1
+
+    def test_digests_share_one_smtp_connection(self):
+        async def test(sink, sender):
+            router = AlertRouter(EmailQueue(sender), ['ops@example.com'], digest_interval=0.05)
+            for i in range(5):
+                router.route(alert(pair=f"P{i}/USDT", severity='HIGH'))
+            router.route(alert(pair='LAST/USDT'))
+            await asyncio.sleep(0.2)  # Timed digest
+            await router.close()
+            assert len(sink.messages) == 2  # First urgent alert, then everything else
+            assert sink.messages[-1]['Subject'] == '[HIGH] AgentSpoons: 5 alerts'
+            assert 'LAST/USDT' in sink.messages[-1].get_payload()[0].get_payload()
+            assert sink.connections == 1
+
+        asyncio.run(with_sink(test))
+
+    def test_storm_does_not_block_callers(self):
+        async def test(sink, sender):
+            queue = EmailQueue(sender, maxsize=5)
+            router = AlertRouter(queue, ['ops@example.com'], per_key_limit=1)
+            started = time.perf_counter()
+            for i in range(20000):
+                router.route(alert(pair=f"P{i % 500}/USDT", severity='HIGH'))
+            assert time.perf_counter() - started < 2.0
+            await router.close()
+            assert router.stats['merged'] + router.stats['throttled'] == 19500
+            assert queue.stats['queued'] == router.stats['digests'] <= 5
+            assert queue.stats['sent'] + queue.stats['dropped'] == queue.stats['queued']
+            assert len(sink.messages) == queue.stats['sent']
+
+        asyncio.run(with_sink(test))
+
+
+class TestAlertStore:
+    """Bounded, append-only alert history"""
+
+    def test_history_is_bounded_and_log_appended(self, tmp_path):
+        path = tmp_path / 'alerts.jsonl'
+        store = AlertStore(maxlen=10, path=str(path))
+        for i in range(15):
+            store.append(alert(message=str(i)))
+        assert [a['message'] for a in store] == [str(i) for i in range(5, 15)]
+        assert len(path.read_text().splitlines()) == 15
+
+        store.extend(alert(message=str(i)) for i in range(15, 25))  # Log passes 2 * maxlen
+        assert len(path.read_text().splitlines()) == 10
+        reloaded = AlertStore(maxlen=10, path=str(path))
+        assert [a['message'] for a in reloaded] == [str(i) for i in range(15, 25)]
+
+    def test_smart_alerts_feed_store_and_router(self, tmp_path):
+        queue = CollectingQueue()
+        system = SmartAlertSystem(max_alerts=3, router=AlertRouter(queue, ['ops@example.com']))
+        for i in range(5):
+            system.check_spread_alert(iv=0.70, rv=0.50)
+        assert len(system.alerts) == 3
+        assert system.router.stats['routed'] == 5
+
+        system.save_alerts_to_file(str(tmp_path / 'alerts.json'))
+        assert json.loads((tmp_path / 'alerts.json').read_text())['alert_count'] == 3
@@ -0,0 +1,105 @@
+"""
+Tests for streaming multi-timeframe candle aggregation
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.market_data_agent import MarketDataAgent
+from src.utils.candle_aggregator import CandleAggregator, parse_timeframe
+from src.utils.database import AgentSpoonsDB
+from src.utils.market_replay import MarketReplay
+
+T0 = datetime(2025, 1, 1)
+
+
+def trades(n=3600, seed=0):
+    """One trade per second for an hour"""
+    rng = np.random.default_rng(seed)
+    prices = 15 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    sizes = rng.uniform(1, 10, n)
+    stamps = [T0 + timedelta(seconds=i) for i in range(n)]
+    return stamps, prices, sizes
+
+
+class TestCandleAggregator:
+    """Incremental bars against pandas resampling"""
+
+    def test_parse_timeframe(self):
+        assert [parse_timeframe(tf) for tf in ('30s', '1m', '5m', '1h', '1d')] == [30, 60, 300, 3600, 86400]
+        with pytest.raises(ValueError):
+            parse_timeframe('5 minutes')
+
+    def test_matches_pandas_resample_with_exact_vwap(self):
+        stamps, prices, sizes = trades()
+        agg = CandleAggregator(('1m', '5m'))
+        for ts, price, size in zip(stamps, prices, sizes):
+            agg.update('NEO/USDT', price, size, ts)
+        agg.close_due(T0 + timedelta(hours=1))
+
+        frame = pd.DataFrame({'price': prices, 'size': sizes, 'notional': prices * sizes},
+                             index=pd.DatetimeIndex(stamps))
+        for tf, rule in (('1m', '1min'), ('5m', '5min')):
+            expected = frame.resample(rule).agg({'price': ['first', 'max', 'min', 'last'],
+                                                 'size': 'sum', 'notional': 'sum'})
+            got = agg.frame('NEO/USDT', tf, lookback=1000)
+            assert len(got) == len(expected)
+            np.testing.assert_allclose(got[['open', 'high', 'low', 'close']].to_numpy(),
+                                       expected['price'].to_numpy())
+            np.testing.assert_allclose(got['volume'], expected[('size', 'sum')])
+            np.testing.assert_allclose(got['vwap'], expected[('notional', 'sum')] / expected[('size', 'sum')])
+            assert list(got['timestamp']) == list(expected.index.to_pydatetime())
+
+    def test_closed_candles_go_to_listeners(self):
+        agg = CandleAggregator(('1m', '5m'))
+        received = []
+
+        async def listener(candle):
+            received.append((candle['timeframe'], candle['timestamp']))
+
+        async def run():
+            agg.add_listener(listener)
+            agg.add_listener(lambda candle: 1 / 0)  # A broken listener doesn't block the others
+            for minute in range(6):
+                await agg.ingest('GAS/USDT', 3.5 + minute, 1.0, T0 + timedelta(minutes=minute, seconds=5))
+            await agg.flush(T0 + timedelta(minutes=10))
+
+        asyncio.run(run())
+        assert [r for r in received if r[0] == '1m'] == [('1m', T0 + timedelta(minutes=m)) for m in range(6)]
+        assert [r for r in received if r[0] == '5m'] == [('5m', T0), ('5m', T0 + timedelta(minutes=5))]
+
+    def test_late_ticks_are_dropped(self):
+        agg = CandleAggregator(('1m',))
+        agg.update('NEO/USDT', 15.0, 1.0, T0 + timedelta(minutes=1))
+        agg.update('NEO/USDT', 99.0, 1.0, T0)
+        agg.close_due(T0 + timedelta(minutes=2))
+        agg.update('NEO/USDT', 99.0, 1.0, T0 + timedelta(minutes=1, seconds=30))
+        assert agg.stats['late'] == 2
+        assert [c['high'] for c in agg.candles('NEO/USDT', '1m')] == [15.0]
+
+    def test_market_data_agent_feeds_higher_timeframes(self, tmp_path):
+        bars = pd.DataFrame({
+            'pair': 'NEO/USDT',
+            'timestamp': [T0 + timedelta(seconds=30 * i) for i in range(40)],
+            'open': 15.0, 'high': 15.5, 'low': 14.5, 'close': 15.0 + np.arange(40) * 0.01, 'volume': 100.0,
+        })
+        db = AgentSpoonsDB(str(tmp_path / 'agg.db'))
+        agent = MarketDataAgent('Collector', '', ['NEO/USDT'], [], db,
+                                replay=MarketReplay(bars, speed='max'),
+                                aggregator=CandleAggregator(('5m',)))
+
+        async def run():
+            while (await agent.execute())['status'] != 'replay_complete':
+                pass
+
+        asyncio.run(run())
+        five = agent.get_ohlcv_dataframe('NEO/USDT', timeframe='5m')
+        assert len(five) == 3  # The 0:15-0:20 candle is still forming
+        assert (five['volume'] == 1000.0).all()
+        assert five['close'].iloc[0] == pytest.approx(15.09)
+        with pytest.raises(ValueError):
+            agent.get_ohlcv_dataframe('NEO/USDT', timeframe='1h')
+        db.close()
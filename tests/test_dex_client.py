@@ -0,0 +1,166 @@
+"""
+Tests for the pooled DEX client against local fake DEX servers
+"""
+import asyncio
+import time
+
+from aiohttp import web
+
+from src.agents.market_data_agent import MarketDataAgent
+from src.neo.dex_client import DexClient, DexEndpoint, RateLimiter
+from src.utils.database import AgentSpoonsDB
+
+PRICES = {'NEO/USDT': 15.0, 'GAS/USDT': 3.5, 'FLM/USDT': 0.1}
+
+
+class FakeDex:
+    """Answers ?pairs= batches or ?pair= singles; can be slow or fail on demand"""
+
+    def __init__(self, scale=1.0, delay=0.0):
+        self.scale = scale
+        self.delay = delay
+        self.slow_first = 0  # Delay only the first N requests
+        self.fail_next = 0
+        self.requests = []
+        self.connections = set()
+
+    def candle(self, pair):
+        price = PRICES[pair] * self.scale
+        return {'open': price, 'high': price * 1.01, 'low': price * 0.99, 'close': price, 'volume': 1000}
+
+    async def handle(self, request):
+        self.connections.add(request.transport.get_extra_info('peername'))
+        self.requests.append(dict(request.query))
+        if self.fail_next:
+            self.fail_next -= 1
+            return web.Response(status=503)
+        if self.delay and len(self.requests) <= (self.slow_first or len(self.requests)):
+            await asyncio.sleep(self.delay)
+        if 'pair' in request.query:
+            return web.json_response(self.candle(request.query['pair']))
+        pairs = request.query['pairs'].split(',')
+        return web.json_response({'data': [{'pair': p, **self.candle(p)} for p in pairs]})
+
+
+async def serve(dex):
+    app = web.Application()
+    app.router.add_get('/candles', dex.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+async def with_dexes(test, *dexes, **client_args):
+    servers = [await serve(dex) for dex in dexes]
+    endpoints = client_args.pop('endpoints', None) or [url for _, url in servers]
+    if callable(endpoints):
+        endpoints = endpoints([url for _, url in servers])
+    client = DexClient(endpoints, **client_args)
+    try:
+        await test(client)
+    finally:
+        await client.close()
+        for runner, _ in servers:
+            await runner.cleanup()
+
+
+class TestDexClient:
+    """Fan-out, coalescing, hedging, rate limiting and agent integration"""
+
+    def test_pairs_to_one_dex_are_coalesced(self):
+        a, b = FakeDex(), FakeDex(scale=1.02)
+
+        async def test(client):
+            quotes = await client.fetch(list(PRICES))
+            assert {p: len(q) for p, q in quotes.items()} == {p: 2 for p in PRICES}
+            assert sorted(q['close'] for q in quotes['NEO/USDT']) == [15.0, 15.3]
+
+        asyncio.run(with_dexes(test, a, b))
+        assert len(a.requests) == len(b.requests) == 1
+        assert a.requests[0]['pairs'] == 'NEO/USDT,GAS/USDT,FLM/USDT'
+
+    def test_single_pair_api_fans_out_concurrently_on_a_pool(self):
+        dex = FakeDex(delay=0.2)
+
+        async def test(client):
+            started = time.perf_counter()
+            quotes = await client.fetch(list(PRICES))
+            assert time.perf_counter() - started < 0.5  # Serial would take 0.6s
+            assert all(len(q) == 1 for q in quotes.values())
+            await client.fetch(list(PRICES))
+
+        endpoints = lambda urls: [{'url': urls[0], 'max_batch': 1}]
+        asyncio.run(with_dexes(test, dex, endpoints=endpoints, rate_limit=None, hedge_after=None))
+        assert len(dex.requests) == 6
+        assert len(dex.connections) == 3  # Second round reused the keep-alive pool
+
+    def test_identical_inflight_requests_are_shared(self):
+        dex = FakeDex(delay=0.1)
+
+        async def test(client):
+            first, second = await asyncio.gather(client.fetch(['NEO/USDT']), client.fetch(['NEO/USDT']))
+            assert first == second
+            assert client.stats['coalesced'] == 1
+
+        asyncio.run(with_dexes(test, dex, hedge_after=None))
+        assert len(dex.requests) == 1
+
+    def test_slow_request_is_hedged(self):
+        dex = FakeDex(delay=1.0)
+        dex.slow_first = 1
+
+        async def test(client):
+            started = time.perf_counter()
+            quotes = await client.fetch(['NEO/USDT'])
+            assert time.perf_counter() - started < 0.5
+            assert quotes['NEO/USDT'][0]['close'] == 15.0
+            assert client.stats['hedged'] == client.stats['hedge_wins'] == 1
+
+        asyncio.run(with_dexes(test, dex, hedge_after=0.1, timeout=2.0))
+
+    def test_failing_dex_is_dropped_and_timeout_bounds_the_round(self):
+        good, down, stuck = FakeDex(), FakeDex(), FakeDex(delay=5.0)
+        down.fail_next = 10
+
+        async def test(client):
+            started = time.perf_counter()
+            quotes = await client.fetch(['NEO/USDT'])
+            assert time.perf_counter() - started < 1.0
+            assert len(quotes['NEO/USDT']) == 1
+            assert client.stats['failures'] == 2
+
+        asyncio.run(with_dexes(test, good, down, stuck, hedge_after=0.05, timeout=0.3))
+
+    def test_rate_limiter_spaces_requests(self):
+        async def test():
+            limiter = RateLimiter(rate=20, burst=1)
+            started = time.perf_counter()
+            for _ in range(5):
+                await limiter.acquire()
+            return time.perf_counter() - started
+
+        assert asyncio.run(test()) >= 0.19
+
+    def test_endpoint_parses_response_shapes(self):
+        endpoint = DexEndpoint('http://dex')
+        pairs = ('NEO/USDT', 'GAS/USDT')
+        mapped = endpoint.parse({'NEO/USDT': {'price': 15}, 'GAS/USDT': {'close': 3.5, 'volume': 9}}, pairs)
+        assert mapped['NEO/USDT'] == {'open': 15.0, 'high': 15.0, 'low': 15.0, 'close': 15.0, 'volume': 0.0}
+        assert mapped['GAS/USDT']['volume'] == 9.0
+        assert list(endpoint.parse({'close': 15}, ('NEO/USDT',))) == ['NEO/USDT']
+
+    def test_market_data_agent_fetches_all_pairs_in_one_round(self, tmp_path):
+        dex = FakeDex()
+
+        async def test(client):
+            db = AgentSpoonsDB(str(tmp_path / 'dex.db'))
+            agent = MarketDataAgent('Collector', '', ['NEO/USDT', 'GAS/USDT'], [], db, dex_client=client)
+            result = await agent.execute()
+            assert result['pairs_collected'] == 2
+            assert result['data']['GAS/USDT']['close'] == 3.5
+            db.close()
+
+        asyncio.run(with_dexes(test, dex))
+        assert len(dex.requests) == 1
@@ -0,0 +1,131 @@
+"""
+Tests for the batching Kafka producer against an in-process fake broker
+"""
+import threading
+import time
+import zlib
+
+import pytest
+
+from src.streaming.redis_stream import KafkaStreamer
+
+
+class FakeFuture:
+    """Stand-in for kafka-python's FutureRecordMetadata"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.errbacks = []
+
+    def add_callback(self, fn, *args):
+        self.callbacks.append((fn, args))
+        return self
+
+    def add_errback(self, fn, *args):
+        self.errbacks.append((fn, args))
+        return self
+
+
+class FakeBroker:
+    """Producer-side fake: buffers sends, delivers them on flush"""
+
+    def __init__(self, partitions=3, fail=False):
+        self.partitions = partitions
+        self.fail = fail
+        self.log = {}  # (topic, partition) -> [(key, value)]
+        self.buffer = []
+        self.flushes = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def send(self, topic, key=None, value=None):
+        future = FakeFuture()
+        with self.lock:
+            self.buffer.append((topic, key, value, future))
+        return future
+
+    def flush(self, timeout=None):
+        with self.lock:
+            pending, self.buffer = self.buffer, []
+            self.flushes += 1
+        for topic, key, value, future in pending:
+            if self.fail:
+                for fn, args in future.errbacks:
+                    fn(*args, RuntimeError("broker unavailable"))
+                continue
+            partition = zlib.crc32(key.encode()) % self.partitions
+            self.log.setdefault((topic, partition), []).append((key, value))
+            for fn, args in future.callbacks:
+                fn(*args, (topic, partition))
+
+    def close(self, timeout=None):
+        self.closed = True
+
+
+@pytest.fixture
+def broker():
+    return FakeBroker()
+
+
+class TestBatchingProducer:
+    """Keyed single-topic publishing without per-message flushes"""
+
+    def test_publish_does_not_flush_per_message(self, broker):
+        kafka = KafkaStreamer(producer=broker, flush_interval=0)
+        for i in range(100):
+            assert kafka.publish_volatility('NEO/USDT', {'price': 15.0 + i})
+
+        assert broker.flushes == 0
+        assert kafka.stats()['pending'] == 100
+
+    def test_single_topic_keyed_by_pair(self, broker):
+        kafka = KafkaStreamer(producer=broker, topic='volatility', flush_interval=0)
+        for i in range(10):
+            kafka.publish_volatility('NEO/USDT', {'price': float(i)})
+            kafka.publish_volatility('GAS/USDT', {'price': float(i)})
+        kafka.flush()
+
+        assert {topic for topic, _ in broker.log} == {'volatility'}
+        placement = {}
+        for (_, partition), records in broker.log.items():
+            for key, value in records:
+                placement.setdefault(key, {}).setdefault(partition, []).append(value['price'])
+        for pair, by_partition in placement.items():
+            assert len(by_partition) == 1  # One partition per pair keeps it ordered
+            (prices,) = by_partition.values()
+            assert prices == sorted(prices)
+
+    def test_delivery_callbacks_feed_metrics(self, broker):
+        kafka = KafkaStreamer(producer=broker, flush_interval=0)
+        for _ in range(5):
+            kafka.publish_volatility('NEO/USDT', {'price': 15.0})
+        kafka.flush()
+
+        stats = kafka.stats()
+        assert stats['sent'] == stats['delivered'] == 5
+        assert stats['pending'] == 0
+        assert stats['latency_ms']['p99'] >= 0
+
+    def test_failed_deliveries_are_counted(self):
+        kafka = KafkaStreamer(producer=FakeBroker(fail=True), flush_interval=0)
+        kafka.publish_volatility('NEO/USDT', {'price': 15.0})
+        kafka.flush()
+
+        stats = kafka.stats()
+        assert stats['failed'] == 1
+        assert 'broker unavailable' in stats['last_error']
+
+    def test_background_flush_and_close(self, broker):
+        kafka = KafkaStreamer(producer=broker, flush_interval=0.05)
+        kafka.publish_volatility('NEO/USDT', {'price': 15.0})
+
+        deadline = time.time() + 2
+        while kafka.stats()['delivered'] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert kafka.stats()['delivered'] == 1
+
+        kafka.publish_volatility('NEO/USDT', {'price': 16.0})
+        kafka.close()
+        assert kafka.stats()['delivered'] == 2
+        assert broker.closed
+        assert not kafka.publish_volatility('NEO/USDT', {'price': 17.0})
@@ -0,0 +1,69 @@
+"""
+Tests for the load-testing harness
+"""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from src.api.websocket_server import AgentSpoonsWebSocketServer
+from src.monitoring.load_test import LoadStats, rest_client, run_load_test, summarize, synthetic_feed
+
+
+def test_summarize_reports_percentiles_in_ms():
+    summary = summarize([i / 1000 for i in range(1, 101)])
+    assert summary['count'] == 100
+    assert summary['p50'] == 50.5
+    assert summary['max'] == 100.0
+    assert summarize([]) == {'count': 0}
+
+
+def test_websocket_load_against_local_server():
+    async def scenario():
+        server = AgentSpoonsWebSocketServer(host='127.0.0.1', port=8791)
+        stop = asyncio.Event()
+        serving = asyncio.create_task(server.start())
+        await asyncio.sleep(0.2)
+        feed = asyncio.create_task(synthetic_feed(server.publish, ['NEO/USDT', 'GAS/USDT'], 50, stop))
+        try:
+            return await run_load_test('ws://127.0.0.1:8791', None, subscribers=5,
+                                       rest_clients=0, duration=0.5, ramp=0)
+        finally:
+            stop.set()
+            await feed
+            serving.cancel()
+
+    report = asyncio.run(scenario())
+    ws = report['websocket']
+    assert ws['connected'] == 5
+    assert ws['messages'] > 0
+    assert ws['freshness_ms']['p99'] >= ws['freshness_ms']['p50'] >= 0
+    assert report['rest']['requests'] == 0
+
+
+def test_rest_client_counts_4xx_as_errors():
+    async def ok(request):
+        return web.json_response({})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get('/ok', ok)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        stats, stop = LoadStats(), asyncio.Event()
+        try:
+            async with aiohttp.ClientSession() as session:
+                client = asyncio.create_task(rest_client(base, ['/ok', '/missing'], stats, stop, session))
+                await asyncio.sleep(0.3)
+                stop.set()
+                await client
+        finally:
+            await runner.cleanup()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats.rest_errors > 0  # Every /missing request is a 404
+    assert list(stats.rest_by_endpoint) == ['/ok']
@@ -0,0 +1,100 @@
+"""
+Tests for the synthetic multi-asset market simulator
+"""
+import asyncio
+import json
+
+import fakeredis
+import numpy as np
+
+from src.monitoring.market_simulator import MarketSimulator, jsonl_sink, listener_sink, redis_sink
+from src.streaming.redis_stream import RedisStreamer
+from src.utils.market_replay import MarketReplay
+
+
+class TestMarketSimulator:
+    """Path dynamics, option chains and sinks"""
+
+    def test_batch_shapes_and_timestamps(self):
+        sim = MarketSimulator(n_pairs=50, seed=1)
+        first = sim.generate(3)
+        second = sim.generate(2)
+        assert first['price'].shape == (3, 50)
+        assert (first['high'] >= np.maximum(first['open'], first['price'])).all()
+        assert (first['low'] <= np.minimum(first['open'], first['price'])).all()
+        assert (first['open'][1] == first['price'][0]).all()
+        assert (second['timestamp'][0] - first['timestamp'][-1]).total_seconds() == 60
+
+    def test_seed_is_reproducible(self):
+        a = MarketSimulator(n_pairs=20, seed=7).generate(10)
+        b = MarketSimulator(n_pairs=20, seed=7).generate(10)
+        assert np.array_equal(a['price'], b['price'])
+
+    def test_returns_follow_the_market_factor(self):
+        sim = MarketSimulator(n_pairs=50, seed=3, market_loading=(0.6, 0.6),
+                              jump_intensity=0, regime_stay=(1.0, 1.0))
+        returns = np.diff(np.log(sim.generate(1000)['price']), axis=0)
+        corr = np.corrcoef(returns.T)
+        assert abs(corr[np.triu_indices(50, 1)].mean() - 0.36) < 0.05  # loading squared
+
+    def test_jumps_fatten_tails(self):
+        sim = MarketSimulator(n_pairs=50, seed=3, jump_intensity=2000, regime_stay=(1.0, 1.0))
+        returns = np.diff(np.log(sim.generate(1000)['price']), axis=0)
+        standardized = returns / returns.std(axis=0)
+        assert (standardized ** 4).mean() > 10
+
+    def test_stressed_regime_raises_volatility(self):
+        calm = MarketSimulator(n_pairs=100, seed=5, regime_stay=(1.0, 1.0))
+        stressed = MarketSimulator(n_pairs=100, seed=5, regime_stay=(1.0, 1.0))
+        stressed.regime = 1
+        calm_vol = np.diff(np.log(calm.generate(300)['price']), axis=0).std()
+        stressed_vol = np.diff(np.log(stressed.generate(300)['price']), axis=0).std()
+        assert stressed_vol > 2 * calm_vol
+
+    def test_regimes_switch(self):
+        batch = MarketSimulator(n_pairs=5, seed=2, regime_stay=(0.9, 0.9)).generate(200)
+        assert set(batch['regime'].tolist()) == {0, 1}
+
+    def test_option_chain_satisfies_put_call_parity(self):
+        sim = MarketSimulator(n_pairs=30, seed=4)
+        sim.generate(5)
+        chain = sim.option_chain(rate=0.05)
+        assert len(chain) == 30 * 7 * 3 * 2
+        calls = chain[chain['type'] == 'call'].reset_index(drop=True)
+        puts = chain[chain['type'] == 'put'].reset_index(drop=True)
+        discount = calls['strike'] * np.exp(-0.05 * calls['expiry_days'] / 365)
+        np.testing.assert_allclose(calls['price'] - puts['price'], calls['spot'] - discount, rtol=1e-9, atol=1e-9)
+        # Skew: out-of-the-money puts carry more vol than equally far calls
+        one = calls[calls['pair'] == sim.pairs[0]]
+        assert one[one['strike'] < one['spot'] * 0.85]['implied_vol'].iloc[0] > \
+            one[one['strike'] > one['spot'] * 1.15]['implied_vol'].iloc[0]
+
+    def test_jsonl_sink(self, tmp_path):
+        path = tmp_path / 'sim.jsonl'
+        sim = MarketSimulator(n_pairs=25, seed=1)
+        report = asyncio.run(sim.emit(jsonl_sink(str(path)), steps=8, batch_steps=3))
+        lines = path.read_text().splitlines()
+        assert report['records'] == len(lines) == 200
+        record = json.loads(lines[0])
+        assert record['spread'] == record['implied_vol'] - record['realized_vol']
+
+    def test_redis_sink_publishes_latest_per_pair(self):
+        streamer = RedisStreamer(client=fakeredis.FakeRedis(server=fakeredis.FakeServer(),
+                                                            decode_responses=False))
+        sim = MarketSimulator(n_pairs=10, seed=1)
+        received = []
+
+        async def run():
+            await sim.emit(redis_sink(streamer), steps=3, batch_steps=3)
+            await sim.emit(listener_sink(lambda r: asyncio.sleep(0, received.append(r))), steps=1)
+
+        asyncio.run(run())
+        assert len(streamer.get_stream(sim.pairs[0])) == 3
+        assert len(received) == 10
+
+    def test_candles_replay_through_market_replay(self):
+        sim = MarketSimulator(n_pairs=40, seed=1)
+        replay = MarketReplay(sim.candles(5), speed='max')
+        assert len(replay) == 5 and len(replay.pairs) == 40
+        step = asyncio.run(replay.next_step())
+        assert len(step) == 40
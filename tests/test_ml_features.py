@@ -0,0 +1,176 @@
+"""
+Tests for the incremental ML feature pipeline
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml.features import (ensemble_frame, ensemble_pipeline, predictor_columns, predictor_frame,
+                             predictor_pipeline)
+
+
+def history(n=300, seed=0, gaps=True):
+    """Price records like data/results.json, with a few missing values"""
+    rng = np.random.default_rng(seed)
+    prices = 15 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    vols = np.abs(0.5 + np.cumsum(rng.normal(0, 0.01, n)))
+    stamps = pd.date_range('2025-01-01', periods=n, freq='37min')
+    records = [{'pair': 'NEO/USDT', 'timestamp': stamps[i].isoformat(), 'price': float(prices[i]),
+                'realized_vol': float(vols[i]), 'implied_vol': float(vols[i] * 1.1),
+                'volume': float(rng.uniform(100, 200))} for i in range(n)]
+    if gaps:
+        for i in (40, 41, 120):
+            records[i]['realized_vol'] = None
+        records[200]['price'] = None
+    return records
+
+
+def old_create_features(data):
+    """MLVolatilityPredictor.create_features before the pipeline"""
+    df = pd.DataFrame(data)
+    df['returns'] = df['price'].pct_change()
+    df['log_returns'] = np.log(df['price'] / df['price'].shift(1))
+    if df['realized_vol'].isna().sum() > len(df) * 0.5:
+        df['realized_vol'] = df['returns'].rolling(5).std()
+    df['rv_lag1'] = df['realized_vol'].shift(1)
+    df['rv_lag2'] = df['realized_vol'].shift(2)
+    df['price_ma_5'] = df['price'].rolling(5).mean()
+    df['price_std_5'] = df['price'].rolling(5).std()
+    df['volume_ma_5'] = df['volume'].rolling(5).mean() if 'volume' in df.columns else 0
+    df['momentum_5'] = df['price'] / df['price'].shift(5) - 1
+    if 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['hour'] = df['timestamp'].dt.hour
+        df['day_of_week'] = df['timestamp'].dt.dayofweek
+    df['realized_vol'] = df['realized_vol'].ffill()
+    df['rv_lag1'] = df['rv_lag1'].ffill()
+    df['rv_lag2'] = df['rv_lag2'].ffill()
+    df = df.ffill().bfill()
+    feature_cols = ['returns', 'log_returns', 'rv_lag1', 'rv_lag2', 'price_ma_5', 'price_std_5',
+                    'volume_ma_5', 'momentum_5', 'realized_vol']
+    if 'hour' in df.columns:
+        feature_cols.extend(['hour', 'day_of_week'])
+    return df[feature_cols].dropna()
+
+
+def old_prepare_features(data):
+    """EnsembleVolatility.prepare_features before the pipeline"""
+    df = pd.DataFrame(data)
+    df['returns'] = df['price'].pct_change()
+    df['log_returns'] = np.log(df['price'] / df['price'].shift(1))
+    for lag in [1, 2, 3, 5, 10]:
+        df[f'rv_lag{lag}'] = df['realized_vol'].shift(lag)
+    for window in [5, 10, 20]:
+        df[f'rv_ma{window}'] = df['realized_vol'].rolling(window).mean()
+        df[f'rv_std{window}'] = df['realized_vol'].rolling(window).std()
+        df[f'price_ma{window}'] = df['price'].rolling(window).mean()
+    df['vol_of_vol'] = df['realized_vol'].rolling(10).std()
+    for period in [5, 10, 20]:
+        df[f'momentum{period}'] = df['price'] / df['price'].shift(period) - 1
+    df['realized_variance'] = df['realized_vol'] ** 2
+    df = df.dropna()
+    feature_cols = [col for col in df.columns if col not in ['timestamp', 'pair', 'price', 'realized_vol']]
+    return df[feature_cols].values.astype(float), df['realized_vol'].values, feature_cols
+
+
+class TestFeaturePipeline:
+    """Batch features unchanged; streaming rows identical to batch rows"""
+
+    def test_ensemble_batch_matches_original(self):
+        data = history()
+        X, y, cols = old_prepare_features(data)
+        df = pd.DataFrame(data)
+        pipeline = ensemble_pipeline(df)
+        features, target = ensemble_frame(df, pipeline)
+        assert pipeline.names == cols
+        np.testing.assert_allclose(features.values, X, rtol=1e-12)
+        np.testing.assert_allclose(target.values, y)
+
+    @pytest.mark.parametrize('derive', [False, True])
+    def test_predictor_batch_matches_original(self, derive):
+        data = history()
+        if derive:
+            for record in data[::3] + data[1::3]:
+                record['realized_vol'] = None
+        expected = old_create_features(data)
+        df = pd.DataFrame(data)
+        frame = predictor_frame(df, predictor_pipeline(df))
+        assert list(frame.columns) == list(expected.columns)
+        np.testing.assert_allclose(frame.values, expected.values.astype(float), rtol=1e-12)
+
+    def test_streaming_matches_batch(self):
+        data = history()
+        df = pd.DataFrame(data)
+        for pipeline in (ensemble_pipeline(df), predictor_pipeline(df), predictor_pipeline(df, derive_rv=True)):
+            batch = pipeline.batch(df).values
+            stream = np.array([pipeline.update('NEO/USDT', record) for record in data])
+            np.testing.assert_allclose(stream, batch, rtol=1e-9, atol=1e-12, equal_nan=True)
+            assert not np.isnan(stream[pipeline.warmup - 1:40]).any()
+
+    def test_pairs_are_independent(self):
+        a, b = history(seed=1, gaps=False), history(seed=2, gaps=False)
+        pipeline = ensemble_pipeline(pd.DataFrame(a))
+        for ra, rb in zip(a, b):
+            row_a = pipeline.update('A', ra)
+            pipeline.update('B', rb)
+        np.testing.assert_allclose(row_a, pipeline.fresh().batch(pd.DataFrame(a)).values[-1], rtol=1e-9)
+
+    def test_state_is_bounded(self):
+        data = history(n=500, gaps=False)
+        pipeline = predictor_pipeline(pd.DataFrame(data), derive_rv=True)
+        for record in data:
+            pipeline.update('NEO/USDT', record)
+        sizes = [len(values) for values in pipeline.state['NEO/USDT'].values()]
+        assert max(sizes) <= pipeline.warmup
+        assert predictor_columns(pipeline)[-2:] == ['hour', 'day_of_week']
+
+
+class TestOnlinePredict:
+    """Tail-only and online prediction agree with the full-history path"""
+
+    def test_ensemble_predict_matches_batch(self):
+        pytest.importorskip('sklearn')
+        from src.ml.advanced_models import EnsembleVolatility
+
+        data = history(n=260, gaps=False)
+        ensemble = EnsembleVolatility()
+        ensemble.train(data[:200])
+
+        X, _, _ = ensemble.prepare_features(data)
+        assert ensemble.predict(data) == pytest.approx(ensemble._predict_row(X[-1:]), rel=1e-9)
+
+        online = [ensemble.update(record) for record in data]
+        assert online[0] is None
+        assert online[-1] == pytest.approx(ensemble.predict(data), rel=1e-9)
+
+    def test_predictor_predict_matches_batch(self):
+        pytest.importorskip('xgboost')
+        from src.ml.volatility_predictor import MLVolatilityPredictor
+
+        data = history(n=260)
+        predictor = MLVolatilityPredictor(model_type='random_forest')
+        predictor.train(data[:200])
+
+        df = predictor.create_features(data)
+        expected = predictor.model.predict(df[predictor_columns(predictor.pipeline)].iloc[-1:].values)[0]
+        assert predictor.predict(data) == pytest.approx(expected, rel=1e-9)
+
+        online = [predictor.update(record) for record in data]
+        assert online[0] is None
+        assert online[-1] == pytest.approx(expected, rel=1e-9)
+
+    def test_loaded_predictor_keeps_online_features(self, tmp_path):
+        pytest.importorskip('xgboost')
+        from src.ml.volatility_predictor import MLVolatilityPredictor
+
+        data = history(n=220, gaps=False)
+        trained = MLVolatilityPredictor(model_type='random_forest')
+        trained.train(data[:200])
+        path = str(tmp_path / 'model.pkl')
+        trained.save_model(path)
+
+        loaded = MLVolatilityPredictor()
+        loaded.load_model(path)
+        assert loaded.pipeline.features == trained.pipeline.features
+        online = [loaded.update(record) for record in data]
+        assert online[-1] == pytest.approx(trained.predict(data), rel=1e-9)
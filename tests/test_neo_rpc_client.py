@@ -0,0 +1,204 @@
+"""
+Tests for the async Neo RPC client against a local mock JSON-RPC server
+"""
+import asyncio
+import base64
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.contracts import oracle_layout
+from src.neo import blockchain_client
+from src.neo.blockchain_client import NeoBlockchainClient, OracleBatcher
+from src.neo.rpc_client import AsyncNeoRpcClient, RpcError
+
+CONTRACT = '0x' + 'b' * 40
+RECORD = oracle_layout.pack_record(15.25, 0.41, 0.45, 0.42, 1_765_000_000)
+
+
+class MockNode:
+    """Minimal Neo RPC node: answers single and batch requests, can fail on demand"""
+
+    def __init__(self):
+        self.height = 100
+        self.http_requests = 0
+        self.methods = []
+        self.fail_next = 0
+        self.fail_status = 503
+        self.connections = set()
+
+    def answer(self, request):
+        method, params = request['method'], request.get('params', [])
+        self.methods.append(method)
+        if method == 'getblockcount':
+            result = self.height
+        elif method == 'getversion':
+            result = {'useragent': '/mock/', 'network': 894710606}
+        elif method == 'getnep17balances':
+            result = {'address': params[0], 'balance': []}
+        elif method == 'invokefunction' and params[1] == 'get_volatility':
+            value = base64.b64encode(RECORD).decode() if params[2][0]['value'] == 'NEO/USDT' else ''
+            result = {'state': 'HALT', 'stack': [{'type': 'ByteString', 'value': value}]}
+        elif method == 'invokefunction':
+            result = {'state': 'HALT', 'stack': [], 'script': 'AA==', 'gasconsumed': '1000'}
+        elif method == 'sendrawtransaction':
+            result = {'hash': '0x' + 'd' * 64}
+        else:
+            return {'jsonrpc': '2.0', 'id': request['id'],
+                    'error': {'code': -32601, 'message': 'Method not found'}}
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': result}
+
+    async def handle(self, request):
+        self.http_requests += 1
+        self.connections.add(request.transport.get_extra_info('peername'))
+        if self.fail_next:
+            self.fail_next -= 1
+            return web.Response(status=self.fail_status)
+        body = await request.json()
+        if isinstance(body, list):
+            return web.json_response([self.answer(r) for r in body])
+        return web.json_response(self.answer(body))
+
+
+async def with_node(test):
+    node = MockNode()
+    app = web.Application()
+    app.router.add_post('/', node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = AsyncNeoRpcClient(f"http://127.0.0.1:{port}/", contract_hash=CONTRACT, backoff=0.01)
+    try:
+        await test(node, client)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+class TestAsyncNeoRpcClient:
+    """Pooling, batching, retry and height-based caching"""
+
+    def test_batch_is_one_http_request(self):
+        async def test(node, client):
+            status = await client.status('NaddressXYZ')
+
+            assert node.http_requests == 1
+            assert status['connected'] and status['block_height'] == 100
+            assert status['balances']['address'] == 'NaddressXYZ'
+
+        asyncio.run(with_node(test))
+
+    def test_batch_errors_in_place(self):
+        async def test(node, client):
+            results = await client.batch([('getblockcount', []), ('nope', [])], return_exceptions=True)
+            assert results[0] == 100
+            assert isinstance(results[1], RpcError)
+
+            with pytest.raises(RpcError):
+                await client.batch([('nope', [])])
+
+        asyncio.run(with_node(test))
+
+    def test_retries_with_backoff_on_unavailable(self):
+        async def test(node, client):
+            node.fail_next = 2
+            assert await client.call('getblockcount') == 100
+            assert client.stats['retries'] == 2
+
+            node.fail_next = 10
+            with pytest.raises(Exception):
+                await client.call('getblockcount')
+
+        asyncio.run(with_node(test))
+
+    def test_client_errors_are_not_retried(self):
+        async def test(node, client):
+            node.fail_next, node.fail_status = 5, 400
+            with pytest.raises(aiohttp.ClientResponseError):
+                await client.call('getblockcount')
+            assert node.http_requests == 1
+            assert client.stats['retries'] == 0
+
+        asyncio.run(with_node(test))
+
+    def test_reads_cached_until_next_block(self):
+        async def test(node, client):
+            client.height_ttl = 0  # Poll height on every read
+            first = await client.get_volatility('NEO/USDT')
+            second = await client.get_volatility('NEO/USDT')
+            assert first == second == oracle_layout.unpack_record(RECORD)
+            assert node.methods.count('invokefunction') == 1
+
+            node.height += 1
+            await client.get_volatility('NEO/USDT')
+            assert node.methods.count('invokefunction') == 2
+            assert await client.get_volatility('XYZ/USDT') is None
+
+        asyncio.run(with_node(test))
+
+    def test_concurrent_reads_share_pooled_connections(self):
+        async def test(node, client):
+            client.pool_size = 4
+            await asyncio.gather(*(client.call('getblockcount') for _ in range(50)))
+
+            assert node.http_requests == 50
+            assert len(node.connections) <= 4
+
+        asyncio.run(with_node(test))
+
+
+class TestSyncClientReads:
+    """NeoBlockchainClient decodes stored records the same way as the async client"""
+
+    def test_get_volatility_unpacks_record(self, monkeypatch):
+        node = MockNode()
+
+        class Response:
+            def __init__(self, body):
+                self.body = body
+
+            def json(self):
+                return self.body
+
+        monkeypatch.setattr(blockchain_client.requests, 'post',
+                            lambda url, json, timeout: Response(node.answer(json)))
+        client = NeoBlockchainClient()
+        client.contract_hash = CONTRACT
+
+        assert client.get_volatility('NEO/USDT') == oracle_layout.unpack_record(RECORD)
+        assert client.get_volatility('XYZ/USDT') is None
+
+
+class TestAsyncOraclePublishing:
+    """Oracle batches over the pooled async client"""
+
+    def test_chunks_publish_concurrently_with_height_in_same_request(self):
+        async def test(node, client):
+            batcher = OracleBatcher(client, max_bytes=100)  # Two 49-byte entries per chunk
+            for i in range(5):
+                batcher.add(f"T{i}/USDT", 15.0, 0.4, 0.45, 0.42, 1_765_000_000)
+            assert batcher.is_async
+
+            tx_hashes = await batcher.aflush()
+            assert len(tx_hashes) == 3 and not batcher.pending
+            assert node.http_requests == 3  # getblockcount rides with each invocation
+            assert node.methods.count('getblockcount') == 3
+
+            signed = await client.update_volatility_batch(b'x', signer=lambda script, gas, height: 'c2lnbmVk')
+            assert signed == '0x' + 'd' * 64 and node.methods[-1] == 'sendrawtransaction'
+
+        asyncio.run(with_node(test))
+
+    def test_failed_chunks_stay_pending(self):
+        async def test(node, client):
+            client.retries = 0
+            node.fail_next = 1
+            batcher = OracleBatcher(client)
+            batcher.add('NEO/USDT', 15.0, 0.4, 0.45, 0.42, 1_765_000_000)
+            assert await batcher.aflush() == []
+            assert 'NEO/USDT' in batcher.pending
+
+        asyncio.run(with_node(test))
@@ -0,0 +1,144 @@
+"""
+Tests for concurrent, conditional news feed fetching against a local RSS server
+"""
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiohttp import web
+
+from src.news.news_aggregator import FEEDPARSER_AVAILABLE, FeedFetcher, NewsAggregator
+
+
+def rss(items):
+    body = ''.join(
+        f"<item><guid>{guid}</guid><title>{title}</title><link>https://news.example/{guid}</link>"
+        f"<description>{title} summary</description><pubDate>{format_datetime(published)}</pubDate></item>"
+        for guid, title, published in items)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{body}</channel></rss>'
+
+
+class FeedServer:
+    """Serves one RSS document per path with ETag validation and an optional delay"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.feeds = {}
+        self.versions = {}
+        self.hits = {}
+        self.not_modified = 0
+
+    def publish(self, path, items):
+        self.feeds[path] = rss(items)
+        self.versions[path] = self.versions.get(path, 0) + 1
+
+    async def handle(self, request):
+        path = request.path
+        self.hits[path] = self.hits.get(path, 0) + 1
+        await asyncio.sleep(self.delay)
+        etag = f'"{self.versions[path]}"'
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304)
+        return web.Response(text=self.feeds[path], content_type='application/rss+xml',
+                            headers={'ETag': etag, 'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT'})
+
+
+async def with_server(server, test):
+    app = web.Application()
+    app.router.add_get('/{name}', server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        await test(base)
+    finally:
+        await runner.cleanup()
+
+
+def recent(minutes):
+    return datetime.now(timezone.utc) - timedelta(minutes=minutes)
+
+
+class TestFeedFetcher:
+    """Concurrency and conditional requests"""
+
+    def test_feeds_are_fetched_concurrently(self):
+        server = FeedServer(delay=0.3)
+        for name in 'abcd':
+            server.publish(f'/{name}', [('1', 'x', recent(5))])
+
+        async def test(base):
+            fetcher = FeedFetcher()
+            started = time.perf_counter()
+            results = await fetcher.fetch_all(f"{base}/{name}" for name in 'abcd')
+            assert time.perf_counter() - started < 0.9  # Serial would take 1.2s
+            assert {status for status, _ in results.values()} == {200}
+
+        asyncio.run(with_server(server, test))
+
+    def test_unchanged_feed_answers_304(self):
+        server = FeedServer()
+        server.publish('/a', [('1', 'x', recent(5))])
+
+        async def test(base):
+            fetcher = FeedFetcher()
+            url = f"{base}/a"
+            assert (await fetcher.fetch_all([url]))[url][0] == 200
+            assert (await fetcher.fetch_all([url]))[url] == (304, None)
+            server.publish('/a', [('2', 'y', recent(1))])
+            assert (await fetcher.fetch_all([url]))[url][0] == 200
+            assert fetcher.validators[url]['last_modified'] == 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+        asyncio.run(with_server(server, test))
+        assert server.not_modified == 1
+
+    def test_failed_feed_is_left_out(self):
+        async def test(base):
+            fetcher = FeedFetcher(timeout=1.0)
+            results = await fetcher.fetch_all([f"{base}/missing"])
+            assert results == {} and fetcher.stats['errors'] == 1
+
+        server = FeedServer()
+        asyncio.run(with_server(server, test))
+
+
+class TestNewsAggregator:
+    """Relevance scoring, caching and incremental merge"""
+
+    def test_relevance_matches_every_keyword_once(self):
+        aggregator = NewsAggregator()
+        assert aggregator._calculate_relevance('NEO oracle: volatility, volatility!') == 9
+        assert aggregator._calculate_relevance('DeFi options') == 2
+        aggregator.keywords.append('gas')
+        assert aggregator._calculate_relevance('GAS fees') == 1
+
+    @pytest.mark.skipif(not FEEDPARSER_AVAILABLE, reason='feedparser not installed')
+    def test_cache_and_incremental_merge(self):
+        server = FeedServer()
+        server.publish('/coindesk', [('a1', 'Neo oracle launches', recent(10)),
+                                     ('a2', 'Bitcoin flat', recent(20))])
+        server.publish('/decrypt', [('b1', 'Options volatility rises', recent(5))])
+
+        async def test(base):
+            aggregator = NewsAggregator(ttl=300)
+            aggregator.feeds = {'CoinDesk': f"{base}/coindesk", 'Decrypt': f"{base}/decrypt"}
+            headlines = await aggregator.afetch_news()
+            assert [a['title'] for a in headlines][:2] == ['Neo oracle launches', 'Options volatility rises']
+
+            await aggregator.afetch_news(hours=48)  # Within ttl: served from cache
+            assert server.hits == {'/coindesk': 1, '/decrypt': 1}
+
+            server.publish('/coindesk', [('a3', 'Neo volatility oracle', recent(1)),
+                                         ('a1', 'Neo oracle launches (updated)', recent(10))])
+            added = await aggregator.refresh(force=True)
+            assert added == {'CoinDesk': 1, 'Decrypt': 0}  # Decrypt answered 304
+            titles = {a['title'] for a in await aggregator.afetch_news()}
+            assert titles == {'Neo volatility oracle', 'Neo oracle launches (updated)',
+                              'Bitcoin flat', 'Options volatility rises'}
+
+        asyncio.run(with_server(server, test))
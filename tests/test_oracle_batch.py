@@ -0,0 +1,104 @@
+"""
+Tests for the packed oracle layout and the client-side transaction batcher
+"""
+import asyncio
+
+import pytest
+
+from src.agents.oracle_publisher_agent import OraclePublisherAgent
+from src.contracts import oracle_layout
+from src.neo.blockchain_client import OracleBatcher
+from src.utils.segmented_log import SegmentedLog
+
+
+class RecordingClient:
+    """Captures update_volatility_batch payloads instead of calling RPC"""
+
+    def __init__(self, fail=False):
+        self.payloads = []
+        self.fail = fail
+
+    def update_volatility_batch(self, packed):
+        if self.fail:
+            return None
+        self.payloads.append(packed)
+        return f"0x{len(self.payloads):064x}"
+
+
+def feed(pair, price=15.0):
+    return {'pair': pair, 'timestamp': 1_765_000_000, 'spot_price': price,
+            'volatility': {'realized_vol_30d': 0.41, 'garch_forecast': 0.42,
+                           'implied_vol_1m': None, 'implied_vol_3m': None}}
+
+
+class TestOracleLayout:
+    """Fixed-width records shared with the contract"""
+
+    def test_record_is_fixed_width_and_round_trips(self):
+        record = oracle_layout.pack_record(15.25, 0.41, 0.45, 0.42, 1_765_000_000)
+
+        assert len(record) == 40
+        assert oracle_layout.unpack_record(record) == {
+            'spot_price': 15.25, 'realized_vol': 0.41, 'implied_vol': 0.45,
+            'garch_forecast': 0.42, 'timestamp': 1_765_000_000}
+
+    def test_batch_round_trips(self):
+        records = [(pair, oracle_layout.pack_record(i, 0.4, 0.5, 0.45, 1)) for i, pair in
+                   enumerate(['NEO/USDT', 'GAS/USDT', 'FLM/USDT'])]
+        packed = oracle_layout.pack_batch(records)
+
+        assert len(packed) == sum(1 + len(pair) + 40 for pair, _ in records)
+        assert [pair for pair, _ in oracle_layout.unpack_batch(packed)] == ['NEO/USDT', 'GAS/USDT', 'FLM/USDT']
+
+    def test_truncated_batch_rejected(self):
+        packed = oracle_layout.pack_batch([('NEO/USDT', oracle_layout.pack_record(1, 1, 1, 1, 1))])
+        with pytest.raises(ValueError):
+            oracle_layout.unpack_batch(packed[:-1])
+
+
+class TestOracleBatcher:
+    """One transaction per publish round"""
+
+    def test_round_is_one_transaction_latest_value_wins(self):
+        client = RecordingClient()
+        batcher = OracleBatcher(client)
+        for pair in ('NEO/USDT', 'GAS/USDT', 'FLM/USDT'):
+            batcher.add_feed(feed(pair))
+        batcher.add_feed(feed('NEO/USDT', price=16.0))
+
+        assert len(batcher.flush()) == 1
+        decoded = dict(oracle_layout.unpack_batch(client.payloads[0]))
+        assert set(decoded) == {'NEO/USDT', 'GAS/USDT', 'FLM/USDT'}
+        assert decoded['NEO/USDT']['spot_price'] == 16.0
+        assert not batcher.pending
+
+    def test_oversized_round_is_split(self):
+        client = RecordingClient()
+        batcher = OracleBatcher(client, max_bytes=100)  # Two 49-byte entries per chunk
+        for i in range(5):
+            batcher.add_feed(feed(f"T{i}/USDT"))
+
+        assert len(batcher.flush()) == 3
+        assert all(len(p) <= 100 for p in client.payloads)
+        assert batcher.pairs_sent == 5
+
+    def test_failed_round_stays_pending(self):
+        batcher = OracleBatcher(RecordingClient(fail=True))
+        batcher.add_feed(feed('NEO/USDT'))
+
+        assert batcher.flush() == []
+        assert 'NEO/USDT' in batcher.pending
+
+    def test_partial_round_reports_landed_pairs(self, tmp_path):
+        class FlakyClient(RecordingClient):
+            def update_volatility_batch(self, packed):
+                return None if b'T1/USDT' in packed else super().update_volatility_batch(packed)
+
+        batcher = OracleBatcher(FlakyClient(), max_bytes=100)
+        agent = OraclePublisherAgent('publisher', 'wallet', None, None, batcher=batcher,
+                                     feed_log=SegmentedLog(str(tmp_path / 'feeds'), key_func=lambda f: f['pair']))
+        published = asyncio.run(agent.publish_round([feed(f"T{i}/USDT") for i in range(4)]))
+
+        assert published == {'T2/USDT', 'T3/USDT'}  # T0 and T1 shared the failed chunk
+        assert set(batcher.pending) == {'T0/USDT', 'T1/USDT'}
+        assert {f['pair'] for f in agent.get_published_feeds()} == published
@@ -0,0 +1,90 @@
+"""
+Tests for the parallel parameter optimizer
+"""
+from multiprocessing import shared_memory
+
+import pytest
+
+from src.backtesting.optimizer import ParameterOptimizer
+from src.backtesting.vectorized import VectorizedBacktester
+from tests.test_vectorized_backtest import market
+
+SPACE = {'spread_threshold': [0.05, 0.10, 0.15], 'stop_loss': [0.03, 0.05]}
+
+
+@pytest.fixture(scope='module')
+def data():
+    return market(n=1200, seed=3)
+
+
+class TestParameterOptimizer:
+    """Search strategies and the shared-memory pool"""
+
+    def test_grid_matches_direct_runs_and_is_sorted(self, data):
+        with ParameterOptimizer(data, workers=1) as optimizer:
+            table = optimizer.grid('VolatilityArbitrageStrategy', SPACE)
+
+        assert len(table) == 6
+        assert table['sharpe_annualized'].is_monotonic_decreasing
+        best = optimizer.best_params(table, SPACE)
+        direct = VectorizedBacktester(data).run('VolatilityArbitrageStrategy', **best)
+        assert table['final_value'].iloc[0] == pytest.approx(direct['final_value'], rel=1e-6)
+        assert table['total_trades'].dtype.itemsize == 4  # Compact dtypes
+        assert table['final_value'].dtype == 'float64'  # Money keeps full precision
+
+    def test_pool_matches_inline_and_releases_shared_memory(self, data):
+        with ParameterOptimizer(data, workers=1) as inline:
+            expected = inline.grid('VolatilityArbitrageStrategy', SPACE)
+        with ParameterOptimizer(data, workers=2, chunk_size=1) as pooled:
+            table = pooled.grid('VolatilityArbitrageStrategy', SPACE)
+            name = pooled.shm.name
+
+        assert table.equals(expected)
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    def test_random_search_samples_ranges(self, data):
+        space = {'spread_threshold': (0.04, 0.2), 'stop_loss': [0.03, 0.05]}
+        with ParameterOptimizer(data, workers=1) as optimizer:
+            table = optimizer.random('VolatilityArbitrageStrategy', space, n_iter=20, seed=1)
+
+        assert len(table) == 20
+        assert table['spread_threshold'].between(0.04, 0.2).all()
+        assert set(table['stop_loss']) <= {0.03, 0.05}
+
+    def test_successive_halving_narrows_to_full_history(self, data):
+        space = {'spread_threshold': (0.04, 0.2), 'stop_loss': (0.01, 0.1)}
+        with ParameterOptimizer(data, workers=1) as optimizer:
+            table = optimizer.successive_halving('VolatilityArbitrageStrategy', space,
+                                                 n_configs=27, eta=3, seed=2)
+
+        assert len(table) == 3
+        assert (table['rung'] == 2).all()
+
+    def test_lone_survivor_is_scored_on_full_history(self, data):
+        space = {'spread_threshold': (0.04, 0.2), 'stop_loss': (0.01, 0.1)}
+        with ParameterOptimizer(data, workers=1) as optimizer:
+            table = optimizer.successive_halving('VolatilityArbitrageStrategy', space,
+                                                 n_configs=3, eta=3, min_fraction=1 / 27, seed=2)
+            params = optimizer.best_params(table, space)
+            full = optimizer.evaluate('VolatilityArbitrageStrategy', [params])
+
+        assert len(table) == 1 and table['rung'].iloc[0] == 1
+        assert table['final_value'].iloc[0] == pytest.approx(full['final_value'].iloc[0])
+
+    def test_walk_forward_scores_out_of_sample(self, data):
+        with ParameterOptimizer(data, workers=1) as optimizer:
+            folds = optimizer.walk_forward('VolatilityArbitrageStrategy', SPACE,
+                                           train_bars=400, test_bars=200)
+
+        assert list(folds['fold']) == [0, 1, 2, 3]
+        assert folds['test_final_value'].dtype == 'float64'
+        assert (folds['test_start'] > folds['train_start']).all()
+        assert {'spread_threshold', 'stop_loss', 'test_final_value'} <= set(folds.columns)
+
+    def test_garch_momentum_params_change_results(self, data):
+        space = {'forecast_threshold': [0.0, 0.15, 0.5], 'lookback': [20, 50]}
+        with ParameterOptimizer(data, workers=1) as optimizer:
+            table = optimizer.grid('GARCHMomentumStrategy', space)
+
+        assert table['final_value'].nunique() == len(table)  # Every setting trades differently
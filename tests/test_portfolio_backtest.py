@@ -0,0 +1,108 @@
+"""
+Tests for multi-pair data loading and portfolio backtesting
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.backtesting.data_loader import MarketDataLoader, align
+from src.backtesting.portfolio import PortfolioBacktester
+from src.backtesting.vectorized import VectorizedBacktester
+from src.utils.database import AgentSpoonsDB
+from tests.test_vectorized_backtest import market
+
+
+def write_results(path, pairs=('NEO/USDT', 'GAS/USDT'), n=300):
+    records = []
+    for i, pair in enumerate(pairs):
+        frame = market(n=n, seed=i)
+        frame.index = frame.index + np.timedelta64(i, 'h')  # Pairs tick at different times
+        for ts, row in frame.iterrows():
+            records.append({'pair': pair, 'timestamp': ts.isoformat(), **row.to_dict()})
+    with open(path, 'w') as f:
+        json.dump(records, f)
+    return path
+
+
+class TestMarketDataLoader:
+    """Sources, caching and the common clock"""
+
+    def test_json_loads_all_pairs_without_invented_ranges(self, tmp_path):
+        loader = MarketDataLoader(cache_dir=str(tmp_path / 'cache'))
+        frames = loader.load(write_results(str(tmp_path / 'results.json')))
+
+        assert sorted(frames) == ['GAS/USDT', 'NEO/USDT']
+        neo = frames['NEO/USDT']
+        assert len(neo) == 300 and neo.index.is_monotonic_increasing
+        assert (neo['high'] == neo['price']).all() and (neo['low'] == neo['price']).all()
+
+    def test_repeated_loads_skip_parsing_until_source_changes(self, tmp_path):
+        path = write_results(str(tmp_path / 'results.json'))
+        cache = str(tmp_path / 'cache')
+        loader = MarketDataLoader(cache_dir=cache)
+        first = loader.load(path)
+        assert loader.load(path) is first
+
+        fresh = MarketDataLoader(cache_dir=cache)
+        fresh.load(path)
+        assert (fresh.stats['parsed'], fresh.stats['disk_hits']) == (0, 1)
+
+        write_results(path, pairs=('NEO/USDT',))
+        os.utime(path, ns=(0, 10**18))
+        assert list(loader.load(path)) == ['NEO/USDT']
+        assert loader.stats['parsed'] == 2
+        assert len(os.listdir(cache)) == 1  # The stale entry was replaced, not kept
+
+    def test_sqlite_uses_real_bars(self, tmp_path):
+        db = AgentSpoonsDB(str(tmp_path / 'agentspoons.db'))
+        for i in range(5):
+            ts = f"2025-12-06T12:0{i}:00"
+            db.insert_market_data('NEO/USDT', {'timestamp': ts, 'open': 15 + i, 'high': 16 + i,
+                                               'low': 14 + i, 'close': 15.5 + i, 'volume': 100})
+            db.insert_volatility_metrics('NEO/USDT', {'timestamp': ts, 'realized_vol_30d': 0.4,
+                                                      'garch_forecast': 0.45})
+        db.close()
+
+        frame = MarketDataLoader(cache_dir=None).load(str(tmp_path / 'agentspoons.db'))['NEO/USDT']
+        assert frame['high'].tolist() == [16, 17, 18, 19, 20]
+        assert frame['price'].tolist() == frame['close'].tolist()
+        assert frame['realized_vol'].eq(0.4).all()
+
+    def test_align_builds_common_clock(self, tmp_path):
+        frames = MarketDataLoader(cache_dir=None).load(write_results(str(tmp_path / 'r.json'), n=10))
+        aligned = align(frames)
+
+        assert len(aligned['NEO/USDT']) == len(aligned['GAS/USDT']) == 20
+        assert aligned['GAS/USDT']['price'].iloc[0] != aligned['GAS/USDT']['price'].iloc[0]  # NaN before first tick
+        assert not aligned['NEO/USDT']['price'].iloc[1:].isna().any()
+
+
+class TestPortfolioBacktester:
+    """Capital allocation across sleeves"""
+
+    @pytest.fixture
+    def frames(self, tmp_path):
+        return MarketDataLoader(cache_dir=None).load(write_results(str(tmp_path / 'results.json')))
+
+    def test_sleeves_sum_to_portfolio(self, frames):
+        result = PortfolioBacktester(frames, initial_cash=100000).run('VolatilityArbitrageStrategy')
+
+        single = VectorizedBacktester(frames['NEO/USDT'], 50000).run('VolatilityArbitrageStrategy')
+        assert result['pairs'].loc['NEO/USDT', 'final_value'] == pytest.approx(single['final_value'])
+        assert result['final_value'] == pytest.approx(result['pairs']['final_value'].sum())
+        assert result['equity'].iloc[0] == pytest.approx(100000, rel=0.05)
+
+    def test_allocation_schemes(self, frames):
+        assert PortfolioBacktester(frames, allocation='equal').weights == {'GAS/USDT': 0.5, 'NEO/USDT': 0.5}
+        inverse = PortfolioBacktester(frames, allocation='inverse_vol').weights
+        assert sum(inverse.values()) == pytest.approx(1.0)
+
+        no_vol = {pair: frame.assign(realized_vol=float('nan')) for pair, frame in frames.items()}
+        assert PortfolioBacktester(no_vol, allocation='inverse_vol').weights == {'GAS/USDT': 0.5, 'NEO/USDT': 0.5}
+
+        partial = PortfolioBacktester(frames, allocation={'NEO/USDT': 0.3})
+        result = partial.run('GARCHMomentumStrategy')
+        assert partial.weights == {'NEO/USDT': 0.3, 'GAS/USDT': 0.0}
+        assert result['equity'].iloc[0] == pytest.approx(100000, rel=0.01)  # 70% idle cash
@@ -0,0 +1,105 @@
+"""
+Tests for deviation/heartbeat oracle publishing
+"""
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents.oracle_publisher_agent import OraclePublisherAgent
+from src.agents.publication_policy import PublicationPolicy
+
+
+def feed(price=15.0, garch=0.40, regime='normal'):
+    return {
+        'pair': 'NEO/USDT',
+        'timestamp': 0,
+        'spot_price': price,
+        'volatility': {'realized_vol_30d': 0.38, 'garch_forecast': garch,
+                       'implied_vol_1m': None, 'implied_vol_3m': None, 'vol_skew_30d': None},
+        'regime': regime,
+    }
+
+
+class TestPublicationPolicy:
+    """Deviation and heartbeat triggers"""
+
+    def test_first_feed_always_publishes(self):
+        assert PublicationPolicy().should_publish('NEO/USDT', feed(), now=0) == (True, 'first')
+
+    def test_small_moves_are_skipped_until_heartbeat(self):
+        policy = PublicationPolicy(deviation=0.01, heartbeat=3600)
+        policy.record('NEO/USDT', feed(), now=0)
+
+        assert policy.should_publish('NEO/USDT', feed(price=15.05), now=60) == (False, 'skipped')
+        assert policy.should_publish('NEO/USDT', feed(price=15.05), now=3600) == (True, 'heartbeat')
+
+    def test_deviation_in_any_tracked_field_publishes(self):
+        policy = PublicationPolicy(deviation=0.01)
+        policy.record('NEO/USDT', feed(), now=0)
+
+        assert policy.evaluate('NEO/USDT', feed(price=15.2), now=1) == (True, 'deviation')
+        assert policy.evaluate('NEO/USDT', feed(garch=0.41), now=1) == (True, 'deviation')
+        assert policy.evaluate('NEO/USDT', feed(regime='high'), now=1) == (True, 'deviation')
+
+    def test_reference_is_last_published_not_last_seen(self):
+        policy = PublicationPolicy(deviation=0.01)
+        policy.record('NEO/USDT', feed(price=15.0), now=0)
+
+        # Each step is under 1% but the drift from the published value is not
+        for step, price in enumerate([15.06, 15.12, 15.18]):
+            publish, _ = policy.should_publish('NEO/USDT', feed(price=price), now=step + 1)
+        assert publish
+
+    def test_per_pair_threshold(self):
+        policy = PublicationPolicy(deviation=0.01, pair_deviation={'GAS/USDT': 0.05})
+        policy.record('NEO/USDT', feed(), now=0)
+        policy.record('GAS/USDT', feed(), now=0)
+
+        assert policy.evaluate('NEO/USDT', feed(price=15.3), now=1)[0]
+        assert not policy.evaluate('GAS/USDT', feed(price=15.3), now=1)[0]
+
+    def test_random_walk_publishes_an_order_of_magnitude_less(self):
+        random.seed(7)
+        policy = PublicationPolicy(deviation=0.005, heartbeat=3600)
+        price, published = 15.0, 0
+        checks = 24 * 60 * 2  # One day of 30s checks
+        for i in range(checks):
+            price *= 1 + random.gauss(0, 0.0003)
+            current = feed(price=round(price, 6))
+            if policy.should_publish('NEO/USDT', current, now=i * 30)[0]:
+                policy.record('NEO/USDT', current, now=i * 30)
+                published += 1
+
+        assert published * 10 < checks
+        assert policy.stats['checked'] == checks
+
+
+class TestOraclePublisherAgent:
+    """Agent only spends a transaction when the policy says so"""
+
+    @pytest.fixture
+    def agent(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'data').mkdir()
+        vol = {'NEO/USDT': {'current_price': 15.0, 'garman_klass_vol': 0.38,
+                            'garch_forecast': 0.40, 'vol_regime': 'normal'}}
+        vol_calculator = SimpleNamespace(
+            market_data_agent=SimpleNamespace(token_pairs=['NEO/USDT']),
+            get_latest_volatility=vol.get)
+        implied = SimpleNamespace(vol_surfaces={})
+        agent = OraclePublisherAgent('Oracle', 'wallet', vol_calculator, implied,
+                                     policy=PublicationPolicy(deviation=0.01, heartbeat=3600))
+        agent.vol = vol
+        return agent
+
+    def test_unchanged_data_is_not_republished(self, agent, tmp_path):
+        first = asyncio.run(agent.execute())
+        second = asyncio.run(agent.execute())
+        agent.vol['NEO/USDT']['current_price'] = 16.0
+        third = asyncio.run(agent.execute())
+
+        assert (first['pairs_published'], second['pairs_published'], third['pairs_published']) == (1, 0, 1)
+        assert second['pairs_skipped'] == 1
+        assert [f['spot_price'] for f in agent.get_published_feeds('NEO/USDT')] == [15.0, 16.0]
@@ -0,0 +1,198 @@
+"""
+Tests for Redis streaming against an in-process fakeredis server
+"""
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.streaming import codecs
+from src.streaming.redis_stream import AsyncRedisStreamer, RedisStreamer, StreamConsumer
+
+UPDATES = {
+    'NEO/USDT': {'price': 15.0, 'realized_vol': 0.40, 'implied_vol': 0.45,
+                 'garch_forecast': 0.42, 'spread': 0.05},
+    'GAS/USDT': {'price': 3.5, 'realized_vol': 0.50, 'implied_vol': 0.52,
+                 'garch_forecast': 0.51, 'spread': 0.02},
+}
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def streamer(server):
+    return RedisStreamer(client=fakeredis.FakeRedis(server=server, decode_responses=False))
+
+
+class TestBatchPublishing:
+    """Pipelined publishing"""
+
+    @pytest.mark.parametrize('transaction', [False, True])
+    def test_batch_writes_stream_and_cache_for_every_pair(self, streamer, transaction):
+        assert streamer.publish_batch(UPDATES, transaction=transaction) == 2
+
+        for pair, data in UPDATES.items():
+            assert streamer.get_latest(pair) == data
+            entries = streamer.get_stream(pair)
+            assert len(entries) == 1
+            assert entries[0]['realized_vol'] == data['realized_vol']
+
+    def test_batch_is_one_round_trip(self, streamer, monkeypatch):
+        executes = []
+        real_pipeline = streamer.redis_client.pipeline
+
+        def counting_pipeline(*args, **kwargs):
+            pipe = real_pipeline(*args, **kwargs)
+            real_execute = pipe.execute
+            pipe.execute = lambda *a, **k: executes.append(1) or real_execute(*a, **k)
+            return pipe
+
+        monkeypatch.setattr(streamer.redis_client, 'pipeline', counting_pipeline)
+        streamer.publish_batch(UPDATES)
+        assert executes == [1]
+
+    def test_single_publish_still_supported(self, streamer):
+        assert streamer.publish_volatility('NEO/USDT', UPDATES['NEO/USDT'])
+        assert streamer.get_latest('NEO/USDT') == UPDATES['NEO/USDT']
+
+    def test_async_batch(self, server):
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis(server=server, decode_responses=False)
+            publisher = AsyncRedisStreamer(client=client)
+            assert await publisher.connect()
+            count = await publisher.publish_batch(UPDATES, transaction=True)
+            await publisher.close()
+            return count
+
+        assert asyncio.run(scenario()) == 2
+        reader = RedisStreamer(client=fakeredis.FakeRedis(server=server, decode_responses=False))
+        assert reader.get_latest('GAS/USDT') == UPDATES['GAS/USDT']
+
+
+class TestConsumerGroups:
+    """XREADGROUP consumers, acknowledgements and pending recovery"""
+
+    def test_replicas_split_entries_without_duplication(self, server, streamer):
+        for i in range(10):
+            streamer.publish_batch({'NEO/USDT': {**UPDATES['NEO/USDT'], 'price': float(i)}})
+
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis(server=server, decode_responses=False)
+            a = StreamConsumer(client, consumer='a', pairs=['NEO/USDT'], count=5, block_ms=10)
+            b = StreamConsumer(client, consumer='b', pairs=['NEO/USDT'], count=5, block_ms=10)
+            seen = {'a': [], 'b': []}
+            for name, consumer in (('a', a), ('b', b)):
+                batch = await consumer.read()
+                seen[name] = [record['price'] for _, _, record in batch]
+                await consumer.ack('NEO/USDT', *[entry_id for _, entry_id, _ in batch])
+            pending = await client.xpending('volatility:NEO/USDT', 'agentspoons')
+            return seen, pending['pending']
+
+        seen, pending = asyncio.run(scenario())
+        assert sorted(seen['a'] + seen['b']) == [float(i) for i in range(10)]
+        assert not set(seen['a']) & set(seen['b'])
+        assert pending == 0
+
+    def test_unacked_entries_are_reclaimed(self, server, streamer):
+        streamer.publish_batch(UPDATES)
+
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis(server=server, decode_responses=False)
+            crashed = StreamConsumer(client, consumer='crashed', block_ms=10)
+            await crashed.discover()
+            delivered = await crashed.read()  # never acknowledged
+
+            survivor = StreamConsumer(client, consumer='survivor', block_ms=10, claim_idle_ms=0)
+            await survivor.discover()
+            received = []
+
+            async def handle(pair, record):
+                received.append(pair)
+
+            await survivor._process(await survivor.recover_pending(), handle)
+            pending = await client.xpending('volatility:NEO/USDT', 'agentspoons')
+            return len(delivered), received, pending['pending']
+
+        delivered, received, pending = asyncio.run(scenario())
+        assert delivered == 2
+        assert sorted(received) == ['GAS/USDT', 'NEO/USDT']
+        assert pending == 0
+
+    def test_discovery_and_pairs_use_scan(self, streamer, monkeypatch):
+        streamer.publish_batch(UPDATES)
+        monkeypatch.setattr(streamer.redis_client, 'keys', None)  # KEYS must not be used
+        assert sorted(streamer.get_all_pairs()) == ['GAS/USDT', 'NEO/USDT']
+
+
+class TestSubscription:
+    """Pub/sub subscription no longer blocks the event loop"""
+
+    def test_sync_subscribe_yields_to_event_loop(self, server, streamer):
+        async def scenario():
+            received = []
+            ticks = 0
+
+            async def on_update(data):
+                received.append(data)
+
+            task = asyncio.create_task(streamer.subscribe('NEO/USDT', on_update))
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                ticks += 1
+                if ticks == 5:
+                    streamer.publish_volatility('NEO/USDT', UPDATES['NEO/USDT'])
+                if received:
+                    break
+            task.cancel()
+            return ticks, received
+
+        ticks, received = asyncio.run(scenario())
+        assert ticks >= 5
+        assert received == [UPDATES['NEO/USDT']]
+
+
+class TestCodecs:
+    """Versioned encoding shared by stream, pub/sub and cache"""
+
+    @pytest.mark.parametrize('name', ['struct', 'msgpack', 'json'])
+    def test_round_trip_through_redis(self, server, name):
+        if name == 'msgpack':
+            pytest.importorskip('msgpack')
+        client = fakeredis.FakeRedis(server=server)
+        streamer = RedisStreamer(client=client, codec=name)
+        data = {**UPDATES['NEO/USDT'], 'vol_regime': 'normal'}
+        streamer.publish_volatility('NEO/USDT', data)
+
+        assert streamer.get_latest('NEO/USDT') == data
+        assert streamer.get_stream('NEO/USDT')[0]['implied_vol'] == 0.45
+
+    def test_legacy_text_entries_still_decode(self, server):
+        client = fakeredis.FakeRedis(server=server)
+        client.xadd('volatility:NEO/USDT', {'timestamp': '2025-12-06T12:00:00', 'price': '15.0',
+                                            'realized_vol': '0.4', 'implied_vol': '0.45',
+                                            'garch_forecast': '0.42', 'spread': '0.05'})
+        client.set('latest:NEO/USDT', '{"price": 15.0}')
+        streamer = RedisStreamer(client=client, codec='struct')
+
+        assert streamer.get_stream('NEO/USDT')[0]['spread'] == 0.05
+        assert streamer.get_latest('NEO/USDT') == {'price': 15.0}
+
+    def test_decoding_client_rejected(self, server):
+        with pytest.raises(ValueError, match='decode_responses'):
+            RedisStreamer(client=fakeredis.FakeRedis(server=server, decode_responses=True))
+        with pytest.raises(ValueError, match='decode_responses'):
+            StreamConsumer(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+
+    def test_struct_entries_are_smaller_than_text(self):
+        entry = {'timestamp': '2025-12-06T12:00:00.123456', **UPDATES['NEO/USDT']}
+        packed = codecs.StructCodec().encode(entry)
+
+        assert len(packed) < len(codecs.JsonCodec().encode(entry)) / 2
+        assert codecs.decode_payload(packed) == entry
+
+    def test_unknown_version_rejected(self):
+        with pytest.raises(codecs.CodecError):
+            codecs.decode_payload(bytes([99, 0, 0]))
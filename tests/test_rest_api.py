@@ -0,0 +1,55 @@
+"""
+Tests for the REST API
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.rest_api import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """API client backed by a small results.json snapshot"""
+    records = [
+        {'pair': 'NEO/USDT', 'timestamp': '2025-12-06T12:00:00', 'price': 15.0,
+         'realized_vol': 0.40, 'implied_vol': 0.45, 'garch_forecast': 0.42, 'spread': 0.05},
+        {'pair': 'GAS/USDT', 'timestamp': '2025-12-06T12:00:01', 'price': 3.5,
+         'realized_vol': 0.50, 'implied_vol': 0.52, 'garch_forecast': 0.51, 'spread': 0.02},
+        {'pair': 'NEO/USDT', 'timestamp': '2025-12-06T12:00:02', 'price': 15.2,
+         'realized_vol': 0.41, 'implied_vol': 0.47, 'garch_forecast': 0.43, 'spread': 0.06},
+    ]
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'results.json').write_text(json.dumps(records))
+    monkeypatch.chdir(tmp_path)
+    return TestClient(app)
+
+
+class TestVolatilityBatch:
+    """Test the batch multi-pair endpoint"""
+
+    def test_returns_latest_per_pair(self, client):
+        resp = client.post('/api/v1/volatility/batch',
+                           json={'pairs': ['NEO/USDT', 'GAS/USDT', 'BTC/USDT']})
+        assert resp.status_code == 200
+        body = resp.json()
+
+        assert body['as_of'] == '2025-12-06T12:00:02'
+        assert body['results']['NEO/USDT']['price'] == 15.2
+        assert body['results']['GAS/USDT']['realized_vol'] == 0.50
+        assert body['missing'] == ['BTC/USDT']
+
+    def test_field_projection(self, client):
+        resp = client.post('/api/v1/volatility/batch',
+                           json={'pairs': ['NEO/USDT'], 'fields': ['implied_vol', 'spread']})
+        assert resp.json()['results']['NEO/USDT'] == {'implied_vol': 0.47, 'spread': 0.06}
+
+    def test_unknown_field_rejected(self, client):
+        resp = client.post('/api/v1/volatility/batch',
+                           json={'pairs': ['NEO/USDT'], 'fields': ['gamma']})
+        assert resp.status_code == 400
+
+    def test_single_pair_endpoint_404(self, client):
+        resp = client.get('/api/v1/volatility/BTCUSDT')
+        assert resp.status_code == 404
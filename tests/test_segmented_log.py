@@ -0,0 +1,172 @@
+"""
+Tests for the append-only segmented log and the blockchain archive built on it
+"""
+import json
+import os
+
+import pytest
+
+from src.neo.dashboard_integration import BlockchainDataStreamToDb
+from src.utils.segmented_log import SegmentedLog
+
+
+def record(i, pair='NEO/USDT'):
+    return {'timestamp': f"2025-12-06T12:{i // 60:02d}:{i % 60:02d}", 'pair': pair, 'value': i}
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = SegmentedLog(str(tmp_path / 'log'), segment_bytes=2048, sparse_every=8, index_flush_every=10)
+    yield log
+    log.close()
+
+
+class TestSegmentedLog:
+    """Append, rotate, seek and recover"""
+
+    def test_appends_rotate_into_segments_without_rewrites(self, log, tmp_path):
+        for i in range(200):
+            log.append(record(i, 'NEO/USDT' if i % 2 else 'GAS/USDT'))
+
+        segments = sorted(p for p in os.listdir(tmp_path / 'log') if p.startswith('segment-'))
+        assert len(segments) > 5
+        assert all(os.path.getsize(tmp_path / 'log' / s) <= 2048 + 100 for s in segments)
+        stats = log.stats()
+        assert stats['total_records'] == 200
+        assert stats['keys']['NEO/USDT']['count'] == 100
+        assert stats['keys']['GAS/USDT']['first'] == record(0)['timestamp']
+
+    def test_time_range_and_pair_lookup(self, log):
+        for i in range(300):
+            log.append(record(i, 'NEO/USDT' if i % 3 else 'GAS/USDT'))
+
+        start, end = record(100)['timestamp'], record(150)['timestamp']
+        values = [r['value'] for r in log.read('GAS/USDT', start, end)]
+        assert values == [i for i in range(100, 151) if i % 3 == 0]
+        assert len(list(log.read())) == 300
+
+    def test_seek_skips_earlier_records(self, log):
+        for i in range(300):
+            log.append(record(i))
+        segment = log.index['segments'][-1]
+
+        offset = log._seek_offset(segment, segment['last'])
+        assert offset > 0
+        assert [r['value'] for r in log.read(start=segment['last'])] == [299]
+
+    def test_reopen_recovers_unindexed_tail_and_torn_line(self, tmp_path):
+        path = str(tmp_path / 'log')
+        log = SegmentedLog(path, index_flush_every=1000)
+        for i in range(25):
+            log.append(record(i))
+        log.handle.write(b'{"timestamp": "2025-12')  # Crash mid-write, index never saved
+        log.handle.flush()
+
+        reopened = SegmentedLog(path)
+        assert len(reopened) == 25
+        assert reopened.append(record(25)) == 25
+        assert [r['value'] for r in reopened.read()] == list(range(26))
+        reopened.close()
+
+    def test_missing_index_is_rebuilt(self, tmp_path):
+        path = str(tmp_path / 'log')
+        log = SegmentedLog(path, segment_bytes=512)
+        for i in range(40):
+            log.append(record(i))
+        log.close()
+        os.remove(os.path.join(path, 'index.json'))
+
+        rebuilt = SegmentedLog(path, segment_bytes=512)
+        assert rebuilt.stats() == log.stats()
+
+
+class TestCompressedRotation:
+    """Closed segments are compressed block-wise and stay seekable"""
+
+    @pytest.mark.parametrize('codec', ['gzip', 'zstd'])
+    def test_closed_segments_compressed_and_readable(self, tmp_path, codec):
+        if codec == 'zstd':
+            pytest.importorskip('zstandard')
+        log = SegmentedLog(str(tmp_path / 'log'), segment_bytes=4096, sparse_every=16, compress=codec)
+        for i in range(500):
+            log.append(record(i))
+
+        stats = log.stats()
+        assert stats['compressed_segments'] == stats['segments'] - 1 > 0
+        plain = [n for n in os.listdir(tmp_path / 'log') if n.endswith('.jsonl')]
+        assert plain == [log.index['segments'][-1]['name']]  # Only the active segment
+        assert [r['value'] for r in log.read()] == list(range(500))
+        log.close()
+
+    def test_range_read_decompresses_only_needed_blocks(self, tmp_path, monkeypatch):
+        from src.utils import segmented_log
+
+        log = SegmentedLog(str(tmp_path / 'log'), segment_bytes=64 * 1024, sparse_every=16, compress='gzip')
+        for i in range(2000):
+            log.append(record(i))
+        log.close()
+
+        calls = []
+        real = segmented_log.CODECS['gzip']
+        monkeypatch.setitem(segmented_log.CODECS, 'gzip',
+                            (real[0], real[1], lambda data: calls.append(1) or real[2](data)))
+        start, end = record(500)['timestamp'], record(520)['timestamp']
+
+        assert [r['value'] for r in log.read(start=start, end=end)] == list(range(500, 521))
+        assert len(calls) <= 3
+
+    def test_rotates_by_age(self, tmp_path, monkeypatch):
+        from src.utils import segmented_log
+
+        now = [1_000_000.0]
+        monkeypatch.setattr(segmented_log.time, 'time', lambda: now[0])
+        log = SegmentedLog(str(tmp_path / 'log'), segment_seconds=3600, compress='gzip')
+        log.append(record(0))
+        now[0] += 3600
+        log.append(record(1))
+
+        assert log.stats()['segments'] == 2
+        assert log.index['segments'][0]['name'].endswith('.jsonl.gz')
+        log.close()
+
+    def test_reopen_after_crash_compresses_leftovers(self, tmp_path):
+        path = str(tmp_path / 'log')
+        plain = SegmentedLog(path, segment_bytes=1024)
+        for i in range(100):
+            plain.append(record(i))
+        plain.close()
+
+        log = SegmentedLog(path, segment_bytes=1024, compress='gzip')
+        assert log.stats()['compressed_segments'] == log.stats()['segments'] - 1
+        assert len(list(log.read())) == 100
+        log.close()
+
+
+class TestBlockchainArchive:
+    """BlockchainDataStreamToDb on the segmented log"""
+
+    def test_stats_and_lookup(self, tmp_path):
+        archive = BlockchainDataStreamToDb(None, str(tmp_path / 'archive.json'))
+        for pair in ['NEO/USDT', 'GAS/USDT', 'NEO/USDT']:
+            archive.archive_submission({'pair': pair, 'volatility': 0.4})
+
+        stats = archive.get_archive_stats()
+        assert stats['total_records'] == 3
+        assert stats['pairs_breakdown'] == {'NEO/USDT': 2, 'GAS/USDT': 1}
+        assert [r['archive_index'] for r in archive.get_records('NEO/USDT')] == [0, 2]
+        archive.close()
+
+    def test_legacy_json_archive_is_migrated(self, tmp_path):
+        legacy = tmp_path / 'archive.json'
+        legacy.write_text(json.dumps([
+            {'timestamp': '2025-12-01T00:00:00', 'data': {'pair': 'NEO/USDT'}, 'archive_index': 0},
+            {'timestamp': '2025-12-02T00:00:00', 'data': {'pair': 'GAS/USDT'}, 'archive_index': 1},
+        ]))
+
+        archive = BlockchainDataStreamToDb(None, str(legacy))
+        archive.archive_submission({'pair': 'NEO/USDT'})
+
+        assert archive.get_archive_stats()['total_records'] == 3
+        assert archive.get_archive_stats()['first_timestamp'] == '2025-12-01T00:00:00'
+        assert not legacy.exists()
+        archive.close()
@@ -0,0 +1,99 @@
+"""
+Tests for streaming anomaly detection in the smart alert system
+"""
+import time
+
+import numpy as np
+
+from src.alerts.smart_alerts import SmartAlertSystem, StreamingDetector
+
+
+def feed(system, ticks, pairs, rng, price_sd=0.002):
+    """Random-walk prices, noisy vol and volume for every pair; returns per-tick alerts"""
+    prices = np.full(len(pairs), 10.0)
+    out = []
+    for _ in range(ticks):
+        prices = prices * np.exp(rng.normal(0, price_sd, len(pairs)))
+        vols = 0.5 + rng.normal(0, 0.01, len(pairs))
+        volumes = 1e6 * np.exp(rng.normal(0, 0.1, len(pairs)))
+        out.append(system.add_batch(pairs, prices, vols, volumes))
+    return prices, out
+
+
+class TestStreamingDetector:
+    """Vectorized per-pair statistics"""
+
+    def test_ewma_and_quantile_track_each_pair(self):
+        rng = np.random.default_rng(0)
+        detector = StreamingDetector(halflife=200, quantile=0.9, quantile_rate=0.02)
+        detector.grow(2)
+        idx = np.array([0, 1])
+        for _ in range(5000):
+            detector.update(idx, np.array([rng.normal(0, 1), rng.normal(100, 10)]))
+        # Scale-free: pair 1 is pair 0 times 10 plus 100
+        scaled = np.array([1.0, 10.0])
+        np.testing.assert_allclose((detector.mean - [0, 100]) / scaled, 0, atol=0.3)
+        np.testing.assert_allclose(np.sqrt(detector.var) / scaled, 1, atol=0.2)
+        np.testing.assert_allclose((detector.q - [0, 100]) / scaled, 1.28, atol=0.3)  # 90th percentile
+
+    def test_cusum_catches_a_small_persistent_shift(self):
+        rng = np.random.default_rng(1)
+        detector = StreamingDetector(halflife=500)
+        detector.grow(1)
+        idx = np.array([0])
+        alarms = [int(detector.update(idx, [rng.normal(0, 1)])['cusum'][0]) for _ in range(300)]
+        assert alarms.count(1) == 0
+        # +0.8 sd drift: no single tick is extreme, but CUSUM accumulates it
+        alarms = [int(detector.update(idx, [rng.normal(0.8, 1)])['cusum'][0]) for _ in range(100)]
+        assert 1 in alarms
+
+    def test_nan_values_leave_state_untouched(self):
+        detector = StreamingDetector()
+        detector.grow(2)
+        detector.update(np.array([0, 1]), [1.0, 2.0])
+        result = detector.update(np.array([0, 1]), [np.nan, 3.0])
+        assert detector.count.tolist() == [1, 2]
+        assert np.isnan(result['z'][0])
+
+
+class TestSmartAlertSystem:
+    """Batch alerts across pairs"""
+
+    def test_spikes_are_attributed_to_their_pair(self):
+        rng = np.random.default_rng(2)
+        system = SmartAlertSystem()
+        pairs = [f"P{i}/USDT" for i in range(50)]
+        prices, history = feed(system, 50, pairs, rng)
+        assert not any(history[20:])
+
+        prices[3] *= 1.08
+        vols = np.full(50, 0.5)
+        vols[7] = 0.75
+        volumes = np.full(50, 1e6)
+        volumes[11] = 5e6
+        alerts = system.add_batch(pairs, prices, vols, volumes)
+        assert {(a['type'], a['pair']) for a in alerts} == {
+            ('PRICE_SPIKE', 'P3/USDT'), ('VOLATILITY_SPIKE', 'P7/USDT'), ('VOLUME_SPIKE', 'P11/USDT')}
+
+    def test_z_score_flags_moves_below_the_fixed_threshold(self):
+        rng = np.random.default_rng(3)
+        system = SmartAlertSystem()
+        prices, _ = feed(system, 100, ['NEO/USDT'], rng, price_sd=0.001)
+        alerts = system.add_data_point(prices[0] * 1.02, 0.5, 1e6, pair='NEO/USDT')
+        assert [a['type'] for a in alerts] == ['PRICE_SPIKE']
+        assert alerts[0]['z_score'] > 10
+
+    def test_single_series_api(self):
+        system = SmartAlertSystem()
+        for _ in range(15):
+            assert system.add_data_point(15.0, 0.5, None) == []
+        alerts = system.add_data_point(16.5, 0.5, None)
+        assert alerts[0]['type'] == 'PRICE_SPIKE' and alerts[0]['pair'] == 'default'
+
+    def test_keeps_up_with_hundreds_of_pairs(self):
+        rng = np.random.default_rng(4)
+        system = SmartAlertSystem()
+        pairs = [f"P{i}/USDT" for i in range(500)]
+        started = time.perf_counter()
+        feed(system, 200, pairs, rng)
+        assert time.perf_counter() - started < 2.0  # 100k pair-ticks
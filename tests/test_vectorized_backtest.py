@@ -0,0 +1,94 @@
+"""
+Tests for the vectorized backtester and its parity with the backtrader engine
+"""
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting.vectorized import VectorizedBacktester, rolling_mean
+
+
+def market(n=800, seed=0):
+    rng = np.random.default_rng(seed)
+    steps = np.arange(n)
+    price = 15 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    rv = 0.4 + 0.1 * np.sin(steps / 15) + rng.normal(0, 0.02, n)
+    iv = rv + 0.15 * np.sin(steps / 7) + rng.normal(0, 0.03, n)
+    garch = rv * (1 + rng.normal(0.1, 0.15, n))
+    return pd.DataFrame({'price': price, 'realized_vol': rv, 'implied_vol': iv, 'garch_forecast': garch},
+                        index=pd.date_range('2022-01-01', periods=n, freq='D'))
+
+
+def backtrader_run(data, strategy, **params):
+    from src.backtesting.strategy_backtester import BacktestEngine
+
+    engine = BacktestEngine(initial_cash=100000)
+    engine.add_strategy(strategy, **params)
+    with contextlib.redirect_stdout(io.StringIO()):
+        strat = engine.run(data)
+    trades = strat.analyzers.trades.get_analysis()
+    return {
+        'final_value': engine.cerebro.broker.getvalue(),
+        'max_drawdown': strat.analyzers.drawdown.get_analysis().max.drawdown,
+        'total_return': strat.analyzers.returns.get_analysis()['rtot'],
+        'sharpe_ratio': strat.analyzers.sharpe.get_analysis()['sharperatio'],
+        'total_trades': trades.total.total if 'total' in trades else 0,
+        'won': trades.won.total if 'won' in trades else 0,
+    }
+
+
+class TestVectorizedBacktester:
+    """Accounting and speed"""
+
+    def test_rolling_mean(self):
+        out = rolling_mean(np.arange(5.0), 3)
+        assert np.isnan(out[:2]).all()
+        assert out[2:].tolist() == [1.0, 2.0, 3.0]
+
+    def test_equity_reconciles_with_trades(self):
+        result = VectorizedBacktester(market()).run('VolatilityArbitrageStrategy')
+        closed = [t for t in result['trades'] if t['exit_bar'] is not None]
+
+        assert result['closed_trades'] == len(closed) > 0
+        if result['total_trades'] == result['closed_trades']:
+            assert result['final_value'] == pytest.approx(100000 + sum(t['pnlcomm'] for t in closed))
+        assert all(t['entry_bar'] < t['exit_bar'] for t in closed)
+
+    def test_unknown_parameter_rejected(self):
+        with pytest.raises(ValueError):
+            VectorizedBacktester(market()).run('VolatilityArbitrageStrategy', threshold=0.1)
+
+    def test_runs_in_milliseconds(self):
+        engine = VectorizedBacktester(market(n=5000))
+        started = time.perf_counter()
+        for threshold in np.linspace(0.05, 0.15, 50):
+            engine.run('VolatilityArbitrageStrategy', spread_threshold=threshold)
+        assert (time.perf_counter() - started) / 50 < 0.05
+
+
+class TestBacktraderParity:
+    """Same fills, trades and analyzer statistics as BacktestEngine"""
+
+    @pytest.mark.parametrize('seed', [0, 1])
+    @pytest.mark.parametrize('strategy,params', [
+        ('VolatilityArbitrageStrategy', {}),
+        ('VolatilityArbitrageStrategy', {'spread_threshold': 0.05, 'stop_loss': 0.02, 'position_size': 0.99}),
+        ('GARCHMomentumStrategy', {}),
+        ('GARCHMomentumStrategy', {'forecast_threshold': 0.05, 'lookback': 30}),
+    ])
+    def test_matches_backtrader(self, seed, strategy, params):
+        pytest.importorskip('backtrader')
+        from src.backtesting import strategy_backtester
+
+        data = market(seed=seed)
+        expected = backtrader_run(data, getattr(strategy_backtester, strategy), **params)
+        result = VectorizedBacktester(data).run(strategy, **params)
+
+        assert result['total_trades'] == expected['total_trades']
+        assert result['won'] == expected['won']
+        for key in ('final_value', 'max_drawdown', 'total_return', 'sharpe_ratio'):
+            assert result[key] == pytest.approx(expected[key], rel=1e-9), key
@@ -0,0 +1,83 @@
+"""
+Volatility oracle contract on a local neo-go chain (neo3-boa + boa-test-constructor)
+"""
+import asyncio
+import pathlib
+import shutil
+import tempfile
+
+import pytest
+
+pytest.importorskip('boa3')
+boaconstructor = pytest.importorskip('boaconstructor')
+
+from boa3.boa3 import Boa3
+
+from src.contracts import oracle_layout
+
+CONTRACT = pathlib.Path(__file__).parent.parent / 'src' / 'contracts' / 'volatility_oracle.py'
+
+
+class TestVolatilityOracleContract(boaconstructor.SmartContractTestCase):
+    """Batch entry point and fixed-width storage"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.build_dir = tempfile.mkdtemp(prefix='agentspoons_contract_')
+        source = pathlib.Path(cls.build_dir) / CONTRACT.name
+        shutil.copy(CONTRACT, source)
+        Boa3.compile_and_save(str(source))
+        cls.addClassCleanup(shutil.rmtree, cls.build_dir)
+        asyncio.run(cls.deploy_oracle(source.with_suffix('.nef')))
+
+    @classmethod
+    async def deploy_oracle(cls, nef):
+        cls.publisher = cls.node.account_committee
+        cls.contract_hash = await cls.deploy(str(nef), cls.publisher)
+        await cls.call('add_publisher', [cls.publisher.script_hash], return_type=bool,
+                       signing_accounts=[cls.publisher])
+
+    async def stored(self, pair):
+        record, _ = await self.call('get_volatility', [pair], return_type=bytes)
+        return oracle_layout.unpack_record(record) if record else None
+
+    async def test_batch_updates_every_pair_in_one_transaction(self):
+        records = {
+            'NEO/USDT': oracle_layout.pack_record(15.25, 0.41, 0.45, 0.42, 1_765_000_000),
+            'GAS/USDT': oracle_layout.pack_record(3.5, 0.5, 0.52, 0.51, 1_765_000_000),
+            'FLM/USDT': oracle_layout.pack_record(0.08, 0.9, 0.95, 0.88, 1_765_000_000),
+        }
+        packed = oracle_layout.pack_batch(records.items())
+
+        count, _ = await self.call('update_volatility_batch', [packed], return_type=int,
+                                   signing_accounts=[self.publisher])
+
+        assert count == 3
+        for pair, record in records.items():
+            assert await self.stored(pair) == oracle_layout.unpack_record(record)
+
+    async def test_single_update_uses_same_layout(self):
+        await self.call('update_volatility', ['NEO/USDT', 1_525_000_000, 41_000_000, 45_000_000,
+                                              42_000_000, 1_765_000_000],
+                        return_type=bool, signing_accounts=[self.publisher])
+
+        stored = await self.stored('NEO/USDT')
+        assert stored['spot_price'] == 15.25
+        assert stored['timestamp'] == 1_765_000_000
+
+    async def test_truncated_batch_is_rejected(self):
+        packed = oracle_layout.pack_batch([('NEO/USDT', oracle_layout.pack_record(1, 1, 1, 1, 1))])
+
+        with pytest.raises(Exception):
+            await self.call('update_volatility_batch', [packed[:-1]], return_type=int,
+                            signing_accounts=[self.publisher])
+
+    async def test_unknown_pair_is_empty(self):
+        assert await self.stored('XYZ/USDT') is None
+
+    async def test_unsigned_update_is_rejected(self):
+        packed = oracle_layout.pack_batch([('NEO/USDT', oracle_layout.pack_record(1, 1, 1, 1, 1))])
+
+        with pytest.raises(Exception):
+            await self.call('update_volatility_batch', [packed], return_type=int)
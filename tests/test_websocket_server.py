@@ -0,0 +1,250 @@
+"""
+Tests for the WebSocket fan-out server
+"""
+import asyncio
+import json
+
+import pytest
+
+from src.api import binary_protocol
+from src.api.websocket_dashboard import WebSocketDashboardClient
+from src.api.websocket_server import AgentSpoonsWebSocketServer
+
+
+class FakeSocket:
+    """Stand-in for a websockets connection that records sent frames"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        if isinstance(message, bytes):
+            self.sent.append(binary_protocol.decode_frame(message))
+        else:
+            self.sent.append(json.loads(message))
+
+
+@pytest.fixture
+def server():
+    return AgentSpoonsWebSocketServer()
+
+
+class StalledSocket(FakeSocket):
+    """Client whose sends never complete"""
+
+    def __init__(self):
+        super().__init__()
+        self.closed_with = None
+
+    async def send(self, message):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000, reason=''):
+        self.closed_with = code
+
+
+async def settle():
+    """Let the per-client writer tasks drain their queues"""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def connect(server, pairs, metrics, socket_cls=FakeSocket):
+    ws = socket_cls()
+    await server.register(ws)
+    await server.handle_message(ws, json.dumps(
+        {'action': 'subscribe', 'pairs': pairs, 'metrics': metrics}))
+    return ws
+
+
+class TestSubscriptions:
+    """Per-topic fan-out"""
+
+    def test_only_subscribed_metrics_are_sent(self, server):
+        async def scenario():
+            neo_vol = await connect(server, ['NEO/USDT'], ['realized_vol'])
+            gas_all = await connect(server, ['GAS/USDT'], ['*'])
+            await server.publish({'pair': 'NEO/USDT', 'realized_vol': 0.4, 'price': 15.0})
+            await settle()
+            return neo_vol, gas_all
+
+        neo_vol, gas_all = asyncio.run(scenario())
+        assert neo_vol.sent == [{'type': 'volatility_update', 'pair': 'NEO/USDT',
+                                 'data': {'realized_vol': 0.4},
+                                 'timestamp': neo_vol.sent[0]['timestamp']}]
+        assert gas_all.sent == []
+
+    def test_unchanged_values_are_not_resent(self, server):
+        async def scenario():
+            ws = await connect(server, ['*'], ['*'])
+            await server.publish({'pair': 'NEO/USDT', 'realized_vol': 0.4, 'price': 15.0})
+            await settle()
+            await server.publish({'pair': 'NEO/USDT', 'realized_vol': 0.4, 'price': 15.0})
+            await settle()
+            await server.publish({'pair': 'NEO/USDT', 'realized_vol': 0.4, 'price': 15.1})
+            await settle()
+            return ws
+
+        ws = asyncio.run(scenario())
+        assert len(ws.sent) == 2
+        assert ws.sent[1]['data'] == {'price': 15.1}
+
+    def test_unsubscribe_and_disconnect(self, server):
+        async def scenario():
+            ws = await connect(server, ['NEO/USDT'], ['price'])
+            await server.handle_message(ws, json.dumps(
+                {'action': 'unsubscribe', 'pairs': ['NEO/USDT'], 'metrics': ['price']}))
+            await server.publish({'pair': 'NEO/USDT', 'price': 15.0})
+            await settle()
+            await server.unregister(ws)
+            return ws
+
+        ws = asyncio.run(scenario())
+        assert ws.sent == []
+        assert not server.topics
+        assert not server.subscriptions
+
+    def test_subscribe_returns_snapshot(self, server):
+        async def scenario():
+            await server.publish({'pair': 'NEO/USDT', 'realized_vol': 0.4, 'price': 15.0})
+            ws = FakeSocket()
+            await server.register(ws)
+            return await server.handle_message(ws, json.dumps(
+                {'action': 'subscribe', 'pairs': ['NEO/USDT'], 'metrics': ['price']}))
+
+        reply = asyncio.run(scenario())
+        assert reply['type'] == 'subscribed'
+        assert reply['snapshot'] == {'NEO/USDT': {'price': 15.0}}
+
+    @pytest.mark.parametrize('message', ['[]', '1', '"x"', '{"action": "subscribe", "pairs": "NEO/USDT"}',
+                                         '{"action": "subscribe", "metrics": {"price": 1}}'])
+    def test_malformed_requests_get_an_error_reply(self, server, message):
+        async def scenario():
+            ws = FakeSocket()
+            await server.register(ws)
+            return await server.handle_message(ws, message)
+
+        assert asyncio.run(scenario())['type'] == 'error'
+        assert not server.topics
+
+
+class TestSlowConsumers:
+    """Per-client queues isolate healthy clients from slow ones"""
+
+    def test_stalled_client_does_not_delay_healthy_client(self):
+        server = AgentSpoonsWebSocketServer(send_timeout=0.05)
+
+        async def scenario():
+            stalled = await connect(server, ['*'], ['*'], StalledSocket)
+            healthy = await connect(server, ['*'], ['*'])
+            await server.publish({'pair': 'NEO/USDT', 'price': 15.0})
+            await settle()
+            delivered = list(healthy.sent)
+            await asyncio.sleep(0.1)
+            await settle()
+            return stalled, delivered
+
+        stalled, delivered = asyncio.run(scenario())
+        assert [m['data'] for m in delivered] == [{'price': 15.0}]
+        assert stalled.closed_with == 1013
+        assert stalled not in server.clients
+        assert server.client_stats()['forced_disconnects'] == 1
+
+    def test_pending_updates_coalesce_latest_value_wins(self, server):
+        async def scenario():
+            ws = await connect(server, ['*'], ['*'])
+            await settle()
+            # No yield between publishes: the writer sees one merged frame
+            await server.publish({'pair': 'NEO/USDT', 'price': 15.0, 'realized_vol': 0.4})
+            await server.publish({'pair': 'NEO/USDT', 'price': 15.1})
+            await settle()
+            return ws
+
+        ws = asyncio.run(scenario())
+        assert len(ws.sent) == 1
+        assert ws.sent[0]['data'] == {'price': 15.1, 'realized_vol': 0.4}
+        assert server.client_stats()['connections'][0]['coalesced'] == 1
+
+    def test_client_over_drop_threshold_is_disconnected(self):
+        server = AgentSpoonsWebSocketServer(max_queue=2, max_drops=3, send_timeout=10)
+
+        async def scenario():
+            ws = await connect(server, ['*'], ['*'], StalledSocket)
+            await settle()
+            for i in range(10):
+                await server.publish({'pair': f'P{i}/USDT', 'price': float(i)})
+            await settle()
+            return ws
+
+        ws = asyncio.run(scenario())
+        assert ws.closed_with == 1013
+        assert not server.connections
+
+
+class TestBinaryProtocol:
+    """Snapshot + delta binary frames"""
+
+    def test_frame_round_trip(self):
+        frame = binary_protocol.encode_frame(
+            binary_protocol.DELTA, 7, '2025-12-06T12:40:00', 'NEO/USDT',
+            {'realized_vol': 0.41, 'price': 15.2, 'vol_regime': 'normal'})
+        decoded = binary_protocol.decode_frame(frame)
+
+        assert decoded['kind'] == binary_protocol.DELTA
+        assert decoded['seq'] == 7
+        assert decoded['pair'] == 'NEO/USDT'
+        assert decoded['data'] == {'realized_vol': 0.41, 'price': 15.2}
+        assert len(frame) < len(json.dumps({'type': 'volatility_update', 'pair': 'NEO/USDT',
+                                            'data': decoded['data'],
+                                            'timestamp': '2025-12-06T12:40:00'}))
+
+    def test_truncated_frame_rejected(self):
+        frame = binary_protocol.encode_frame(binary_protocol.DELTA, 1, 0, 'NEO/USDT', {'price': 1.0})
+        with pytest.raises(binary_protocol.ProtocolError):
+            binary_protocol.decode_frame(frame[:-3])
+
+    def test_server_sends_snapshot_then_deltas(self, server):
+        async def scenario():
+            await server.publish({'pair': 'NEO/USDT', 'price': 15.0, 'realized_vol': 0.4})
+            ws = FakeSocket()
+            await server.register(ws)
+            await server.handle_message(ws, json.dumps({'action': 'protocol', 'format': 'binary'}))
+            await server.handle_message(ws, json.dumps({'action': 'subscribe'}))
+            await settle()
+            await server.publish({'pair': 'NEO/USDT', 'price': 15.1, 'realized_vol': 0.4})
+            await settle()
+            return ws
+
+        ws = asyncio.run(scenario())
+        snapshot, delta = ws.sent
+        assert snapshot['kind'] == binary_protocol.SNAPSHOT
+        assert snapshot['data'] == {'price': 15.0, 'realized_vol': 0.4}
+        assert delta['kind'] == binary_protocol.DELTA
+        assert delta['data'] == {'price': 15.1}
+        assert delta['seq'] == snapshot['seq'] + 1
+
+    def test_client_detects_gap_and_requests_resync(self):
+        client = WebSocketDashboardClient(protocol='binary')
+        requests = []
+
+        async def fake_send(message):
+            requests.append(message)
+        client.send = fake_send
+
+        def frame(kind, seq, data):
+            return binary_protocol.encode_frame(kind, seq, 0, 'NEO/USDT', data)
+
+        async def scenario():
+            await client.handle_binary(frame(binary_protocol.SNAPSHOT, 1, {'price': 15.0}))
+            await client.handle_binary(frame(binary_protocol.DELTA, 2, {'price': 15.1}))
+            skipped = await client.handle_binary(frame(binary_protocol.DELTA, 4, {'price': 15.3}))
+            ignored = await client.handle_binary(frame(binary_protocol.DELTA, 5, {'price': 15.4}))
+            await client.handle_binary(frame(binary_protocol.SNAPSHOT, 6, {'price': 15.5}))
+            await client.handle_binary(frame(binary_protocol.DELTA, 7, {'price': 15.6}))
+            return skipped, ignored
+
+        skipped, ignored = asyncio.run(scenario())
+        assert skipped is None and ignored is None
+        assert client.gaps == 1
+        assert requests == [{'action': 'resync', 'pairs': ['NEO/USDT']}]
+        assert client.latest['NEO/USDT'] == {'price': 15.6}